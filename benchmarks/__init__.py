@@ -0,0 +1,8 @@
+#!/usr/bin/python3
+"""
+Benchmarks package for AirBnB clone project.
+
+This package contains scripts measuring the speed of the models and
+storage engines. They work on temporary files and leave file.json
+untouched.
+"""
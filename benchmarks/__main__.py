@@ -0,0 +1,9 @@
+#!/usr/bin/python3
+"""
+Entry point of python3 -m benchmarks, see benchmarks.harness.
+"""
+
+import sys
+from benchmarks.harness import main
+
+sys.exit(main())
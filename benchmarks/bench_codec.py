@@ -0,0 +1,78 @@
+#!/usr/bin/python3
+"""
+Benchmark of the JSON codecs used by FileStorage.
+
+Usage: python3 -m benchmarks.bench_codec [number of objects]
+
+For every installed codec, prints how many objects per second a full
+save() (every object dirty) and a reload() followed by the hydration of
+every object go through.
+"""
+
+import os
+import sys
+import tempfile
+import time
+from models import storage
+from models.engine.codec import CODECS
+from models.engine.file_storage import FileStorage
+from models.user import User
+
+
+def populate(count):
+    """
+    Replace the stored objects with count new users.
+    
+    Args:
+        count (int): Number of users to create
+    """
+    FileStorage._FileStorage__objects = {}
+    storage.reindex()
+    for number in range(count):
+        user = User()
+        user.email = "user{}@hbnb.io".format(number)
+        user.first_name = "User"
+        user.last_name = str(number)
+
+
+def run(count):
+    """
+    Time save() and reload() with each codec.
+    
+    Args:
+        count (int): Number of objects to store
+    """
+    print("{:<8} {:>14} {:>14} {:>12}".format(
+        "codec", "save obj/s", "reload obj/s", "file bytes"))
+    saved_path = FileStorage._FileStorage__file_path
+    saved_objects = FileStorage._FileStorage__objects
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        FileStorage._FileStorage__file_path = os.path.join(tmp_dir, "file.json")
+        try:
+            for name, codec in CODECS.items():
+                storage.codec = codec
+                populate(count)
+                FileStorage._FileStorage__encoded = {}
+                start = time.perf_counter()
+                storage.save()
+                save_time = time.perf_counter() - start
+                
+                FileStorage._FileStorage__objects = {}
+                storage.reindex()
+                start = time.perf_counter()
+                storage.reload()
+                for obj in storage.all().values():
+                    pass
+                reload_time = time.perf_counter() - start
+                print("{:<8} {:>14,.0f} {:>14,.0f} {:>12,}".format(
+                    name, count / save_time, count / reload_time,
+                    os.path.getsize(FileStorage._FileStorage__file_path)))
+        finally:
+            del storage.codec
+            FileStorage._FileStorage__file_path = saved_path
+            FileStorage._FileStorage__objects = saved_objects
+            storage.reindex()
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,64 @@
+#!/usr/bin/python3
+"""
+Benchmark of the memory used by regular and compact model instances.
+
+Usage: python3 -m benchmarks.bench_compact [number of objects]
+
+Builds the same users from dictionaries, as reload() does, once with
+the regular User class and once with its compact variant, and prints
+the memory allocated per object (attribute values included).
+"""
+
+import sys
+import tracemalloc
+import uuid
+from datetime import datetime
+from models.compact import compact
+from models.user import User
+
+
+def measure(cls, records):
+    """
+    Return the bytes allocated per instance built from records.
+    
+    Args:
+        cls: Class to instantiate
+        records (list): Dictionaries to build the instances from
+    
+    Returns:
+        float: Bytes allocated per instance
+    """
+    tracemalloc.start()
+    instances = [cls(**record) for record in records]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size / len(instances)
+
+
+def run(count):
+    """
+    Print the memory used per user by both representations.
+    
+    Args:
+        count (int): Number of users to build
+    """
+    now = datetime.now().isoformat()
+    records = [{
+        'id': str(uuid.uuid4()),
+        'created_at': now,
+        'updated_at': now,
+        'email': "user{}@hbnb.io".format(number),
+        'first_name': "User",
+        'last_name': str(number),
+        '__class__': "User",
+    } for number in range(count)]
+    regular = measure(User, records)
+    small = measure(compact(User), records)
+    print("regular User: {:8.1f} bytes/object".format(regular))
+    print("compact User: {:8.1f} bytes/object".format(small))
+    print("saved:        {:8.1f} bytes/object ({:.0%})".format(
+        regular - small, (regular - small) / regular))
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,100 @@
+#!/usr/bin/python3
+"""
+Benchmark of the compressed storage files.
+
+Usage: python3 -m benchmarks.bench_compression [number of objects]
+
+Saves and reloads the same users without compression and with every
+compression available (gzip, lzma, and zstd when installed), and prints
+the file size, the objects per second of save() and reload(), and the
+peak memory allocated by reload().
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from models import storage
+from models.engine.file_storage import FileStorage
+from models.engine.jsonstream import zstandard
+from models.user import User
+
+
+def populate(count):
+    """
+    Replace the stored objects with count new users.
+    
+    Args:
+        count (int): Number of users to create
+    """
+    FileStorage._FileStorage__objects = {}
+    FileStorage._FileStorage__encoded = {}
+    storage.reindex()
+    for number in range(count):
+        user = User()
+        user.email = "user{}@hbnb.io".format(number)
+        user.first_name = "User"
+        user.last_name = str(number)
+
+
+def forget():
+    """
+    Drop the stored objects, as if the program restarted.
+    """
+    FileStorage._FileStorage__objects = {}
+    storage.reindex()
+
+
+def run(count):
+    """
+    Time save() and reload() with each compression.
+    
+    Args:
+        count (int): Number of objects to store
+    """
+    compressions = [None, "gzip", "lzma"]
+    if zstandard is not None:
+        compressions.append("zstd")
+    print("{:<8} {:>12} {:>7} {:>14} {:>14} {:>12}".format(
+        "format", "file bytes", "ratio", "save obj/s", "reload obj/s",
+        "peak KiB"))
+    saved_path = FileStorage._FileStorage__file_path
+    saved_objects = FileStorage._FileStorage__objects
+    saved_compression = storage.compression
+    plain_size = None
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        FileStorage._FileStorage__file_path = os.path.join(tmp_dir, "file.json")
+        try:
+            for compression in compressions:
+                storage.compression = compression
+                populate(count)
+                start = time.perf_counter()
+                storage.save()
+                save_time = time.perf_counter() - start
+                size = os.path.getsize(storage._snapshot_path())
+                plain_size = plain_size or size
+                
+                forget()
+                start = time.perf_counter()
+                storage.reload()
+                reload_time = time.perf_counter() - start
+                
+                forget()
+                tracemalloc.start()
+                storage.reload()
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                print("{:<8} {:>12,} {:>7.2f} {:>14,.0f} {:>14,.0f} "
+                      "{:>12,}".format(compression or "json", size,
+                                       plain_size / size, count / save_time,
+                                       count / reload_time, peak // 1024))
+        finally:
+            storage.compression = saved_compression
+            FileStorage._FileStorage__file_path = saved_path
+            FileStorage._FileStorage__objects = saved_objects
+            storage.reindex()
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
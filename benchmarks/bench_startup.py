@@ -0,0 +1,95 @@
+#!/usr/bin/python3
+"""
+Benchmark of the start-up of the models package.
+
+Usage: python3 -m benchmarks.bench_startup [number of objects]
+
+Starts fresh interpreters in a directory holding an empty store, then a
+store of the given number of users, and prints the best time of
+"import models" and of the first use of the objects that follows it
+(storage.all(), which runs the deferred reload()).
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+
+PROBE = """
+import time
+start = time.perf_counter()
+import models
+imported = time.perf_counter()
+count = len(models.storage.all())
+loaded = time.perf_counter()
+print(imported - start, loaded - imported, count)
+"""
+RUNS = 5
+
+
+def measure(directory):
+    """
+    Time the probe in fresh interpreters and keep the best run.
+    
+    Args:
+        directory (str): Working directory, holding the store
+    
+    Returns:
+        tuple: (import time, first use time, number of objects seen)
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root)
+    env.pop("HBNB_TYPE_STORAGE", None)
+    best = None
+    for run in range(RUNS):
+        output = subprocess.run([sys.executable, "-c", PROBE],
+                                cwd=directory, env=env, check=True,
+                                capture_output=True, text=True).stdout
+        imported, loaded, count = output.split()
+        current = (float(imported), float(loaded), int(count))
+        if best is None or sum(current[:2]) < sum(best[:2]):
+            best = current
+    return best
+
+
+def write_store(directory, count):
+    """
+    Save count users to the file.json of a directory, in a fresh
+    interpreter so that this process keeps its own storage.
+    
+    Args:
+        directory (str): Directory of the store
+        count (int): Number of users
+    """
+    code = ("from models import storage\n"
+            "from models.user import User\n"
+            "for number in range({}):\n"
+            "    user = User()\n"
+            "    user.email = 'user{{}}@hbnb.io'.format(number)\n"
+            "    user.first_name = 'User'\n"
+            "storage.save()\n").format(count)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    subprocess.run([sys.executable, "-c", code], cwd=directory, check=True,
+                   env=dict(os.environ, PYTHONPATH=root))
+
+
+def run(count):
+    """
+    Time the start-up with an empty store and a large one.
+    
+    Args:
+        count (int): Number of objects of the large store
+    """
+    print("{:<10} {:>10} {:>12} {:>14}".format(
+        "store", "objects", "import ms", "first use ms"))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for label, size in (("empty", 0), ("large", count)):
+            if size:
+                write_store(tmp_dir, size)
+            imported, loaded, seen = measure(tmp_dir)
+            print("{:<10} {:>10,} {:>12.1f} {:>14.1f}".format(
+                label, seen, imported * 1000, loaded * 1000))
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,390 @@
+#!/usr/bin/python3
+"""
+Benchmark harness of the AirBnB clone project.
+
+Usage: python3 -m benchmarks [--sizes 1000,100000] [--only NAME]
+                             [--repeat N] [--output FILE]
+                             [--baseline FILE] [--save-baseline]
+                             [--threshold FRACTION]
+
+Times model construction, to_dict(), construction from a dictionary,
+FileStorage save() and reload() for each store size, and the console
+commands (through HBNBCommand.onecmd) on a store of the smallest size.
+Each case runs --repeat times and keeps its best time.
+
+The results are printed as a table and written as JSON with --output.
+They are compared to the baseline file (benchmarks/baseline.json by
+default): a case more than --threshold slower than its baseline is
+flagged and makes the command exit with status 1. --save-baseline
+stores the results as the new baseline instead. Baselines are only
+meaningful on the machine that recorded them.
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from contextlib import contextmanager, redirect_stdout
+from datetime import datetime
+from console import HBNBCommand
+from models import storage
+from models.base_model import BaseModel
+from models.engine.file_storage import FileStorage
+from models.user import User
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        "baseline.json")
+CONSOLE_COMMANDS = 100
+
+
+@contextmanager
+def isolated_storage():
+    """
+    Point FileStorage at an empty temporary file for the duration of
+    the block, and put the stored objects back afterwards.
+    """
+    saved = {name: getattr(FileStorage, name) for name in (
+        '_FileStorage__file_path', '_FileStorage__objects',
+        '_FileStorage__dirty', '_FileStorage__encoded',
+        '_FileStorage__deleted')}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        FileStorage._FileStorage__file_path = os.path.join(tmp_dir,
+                                                           "file.json")
+        try:
+            yield
+            storage.flush()
+        finally:
+            for name, value in saved.items():
+                setattr(FileStorage, name, value)
+            storage.reindex()
+
+
+def forget():
+    """
+    Drop the stored objects, as if the program restarted.
+    """
+    FileStorage._FileStorage__objects = {}
+    FileStorage._FileStorage__dirty = {}
+    FileStorage._FileStorage__encoded = {}
+    FileStorage._FileStorage__deleted = set()
+    storage.reindex()
+
+
+def populate(size):
+    """
+    Replace the stored objects with new users.
+    
+    Args:
+        size (int): Number of users
+    
+    Returns:
+        list: The users
+    """
+    forget()
+    users = []
+    for number in range(size):
+        user = User()
+        user.email = "user{}@hbnb.io".format(number)
+        user.first_name = "User"
+        user.last_name = str(number)
+        users.append(user)
+    return users
+
+
+def bench_construct(size):
+    """
+    Time BaseModel() for new objects, storage.new() included.
+    """
+    forget()
+    start = time.perf_counter()
+    for number in range(size):
+        BaseModel()
+    return size, time.perf_counter() - start
+
+
+def bench_to_dict(size):
+    """
+    Time to_dict() of stored users.
+    """
+    users = populate(size)
+    start = time.perf_counter()
+    for user in users:
+        user.to_dict()
+    return size, time.perf_counter() - start
+
+
+def bench_from_dict(size):
+    """
+    Time User(**kwargs) from the dictionaries of to_dict().
+    """
+    records = [user.to_dict() for user in populate(size)]
+    forget()
+    start = time.perf_counter()
+    for record in records:
+        User(**record)
+    return size, time.perf_counter() - start
+
+
+def bench_save(size):
+    """
+    Time a save() of a store where every object is new.
+    """
+    populate(size)
+    start = time.perf_counter()
+    storage.save()
+    storage.flush()
+    return size, time.perf_counter() - start
+
+
+def bench_save_one(size):
+    """
+    Time a save() after one object of the store changed.
+    """
+    users = populate(size)
+    storage.save()
+    storage.flush()
+    users[0].first_name = "Changed"
+    start = time.perf_counter()
+    storage.save()
+    storage.flush()
+    return 1, time.perf_counter() - start
+
+
+def bench_reload(size):
+    """
+    Time reload() until every instance is built.
+    """
+    populate(size)
+    storage.save()
+    storage.flush()
+    forget()
+    start = time.perf_counter()
+    storage.reload()
+    for obj in storage.all().values():
+        pass
+    return size, time.perf_counter() - start
+
+
+def run_commands(lines):
+    """
+    Time console commands, discarding what they print.
+    
+    Args:
+        lines (list): Command lines
+    
+    Returns:
+        tuple: (number of commands, seconds)
+    """
+    console = HBNBCommand()
+    with redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for line in lines:
+            console.onecmd(line)
+        elapsed = time.perf_counter() - start
+    return len(lines), elapsed
+
+
+def bench_console_create(size):
+    """
+    Time the create command on a store of size users.
+    """
+    populate(size)
+    storage.save()
+    return run_commands(["create User"] * CONSOLE_COMMANDS)
+
+
+def bench_console_show(size):
+    """
+    Time the show command on a store of size users.
+    """
+    users = populate(size)
+    return run_commands(["show User {}".format(users[number % size].id)
+                         for number in range(CONSOLE_COMMANDS)])
+
+
+def bench_console_update(size):
+    """
+    Time the update command on a store of size users.
+    """
+    users = populate(size)
+    storage.save()
+    return run_commands(['update User {} first_name "Bench"'.format(
+        users[number % size].id) for number in range(CONSOLE_COMMANDS)])
+
+
+def bench_console_all(size):
+    """
+    Time the all command on a store of size users.
+    """
+    populate(size)
+    return run_commands(["all User"] * 5)
+
+
+def bench_console_destroy(size):
+    """
+    Time the destroy command on a store of size users.
+    """
+    users = populate(max(size, CONSOLE_COMMANDS))
+    storage.save()
+    return run_commands(["destroy User {}".format(user.id)
+                         for user in users[:CONSOLE_COMMANDS]])
+
+
+# (name, function, run at every size rather than the smallest only)
+CASES = [
+    ("model.construct", bench_construct, True),
+    ("model.to_dict", bench_to_dict, True),
+    ("model.from_dict", bench_from_dict, True),
+    ("storage.save", bench_save, True),
+    ("storage.save_one", bench_save_one, True),
+    ("storage.reload", bench_reload, True),
+    ("console.create", bench_console_create, False),
+    ("console.show", bench_console_show, False),
+    ("console.update", bench_console_update, False),
+    ("console.all", bench_console_all, False),
+    ("console.destroy", bench_console_destroy, False),
+]
+
+
+def run(sizes, only=None, repeat=3):
+    """
+    Run the benchmark cases.
+    
+    Args:
+        sizes (list): Store sizes
+        only (str): Only run the cases whose name contains it
+        repeat (int): Runs per case, the best one is kept
+    
+    Returns:
+        list: One result dictionary per case and size
+    """
+    results = []
+    for name, function, scales in CASES:
+        if only and only not in name:
+            continue
+        for size in (sizes if scales else sizes[:1]):
+            best = None
+            with isolated_storage():
+                for attempt in range(repeat):
+                    ops, seconds = function(size)
+                    if best is None or seconds < best:
+                        best = seconds
+            results.append({'name': name, 'size': size, 'ops': ops,
+                            'seconds': best,
+                            'ops_per_s': ops / best if best else None})
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare results to a baseline.
+    
+    Args:
+        results (list): Results of run()
+        baseline (list): Results of an earlier run
+        threshold (float): Slowdown flagged as a regression, e.g. 0.25
+            for 25% fewer operations per second
+    
+    Returns:
+        list: The results, each with the baseline ops_per_s, its
+        change (fraction, None without baseline) and regressed flag
+    """
+    previous = {(result['name'], result['size']): result['ops_per_s']
+                for result in baseline}
+    rows = []
+    for result in results:
+        row = dict(result)
+        before = previous.get((result['name'], result['size']))
+        row['baseline_ops_per_s'] = before
+        row['change'] = None
+        row['regressed'] = False
+        if before and result['ops_per_s']:
+            row['change'] = result['ops_per_s'] / before - 1
+            row['regressed'] = row['change'] < -threshold
+        rows.append(row)
+    return rows
+
+
+def report(rows):
+    """
+    Print compared results as a table.
+    
+    Args:
+        rows (list): Results of compare()
+    """
+    print("{:<18} {:>9} {:>14} {:>14} {:>8}".format(
+        "case", "size", "ops/s", "baseline", "change"))
+    for row in rows:
+        baseline = row['baseline_ops_per_s']
+        change = "" if row['change'] is None else \
+            "{:+.0%}".format(row['change'])
+        print("{:<18} {:>9,} {:>14,.0f} {:>14} {:>8}{}".format(
+            row['name'], row['size'], row['ops_per_s'] or 0,
+            "" if baseline is None else "{:,.0f}".format(baseline),
+            change, "  REGRESSION" if row['regressed'] else ""))
+
+
+def main(argv=None):
+    """
+    Run the benchmarks from the command line.
+    
+    Args:
+        argv (list): Command line arguments, defaults to sys.argv[1:]
+    
+    Returns:
+        int: Exit status, 1 if a case regressed
+    """
+    parser = argparse.ArgumentParser(
+        prog="python3 -m benchmarks",
+        description="Benchmark the models, storage and console.")
+    parser.add_argument('--sizes', default="1000,100000",
+                        help="comma separated store sizes "
+                             "(default: 1000,100000)")
+    parser.add_argument('--only', metavar='NAME',
+                        help="only run the cases whose name contains NAME")
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="runs per case, the best is kept (default: 3)")
+    parser.add_argument('--output', metavar='FILE',
+                        help="write the results as JSON to FILE")
+    parser.add_argument('--baseline', default=BASELINE, metavar='FILE',
+                        help="baseline to compare to")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="store the results as the baseline")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="slowdown flagged as a regression "
+                             "(default: 0.25)")
+    args = parser.parse_args(argv)
+    
+    sizes = [int(size) for size in args.sizes.split(",")]
+    results = run(sizes, args.only, args.repeat)
+    document = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'codec': storage.codec.name,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(document, f, indent=2)
+    
+    baseline = []
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+    rows = compare(results, baseline, args.threshold)
+    report(rows)
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(document, f, indent=2)
+        print("baseline saved to {}".format(args.baseline))
+        return 0
+    return 1 if any(row['regressed'] for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,13 +1,21 @@
 #!/usr/bin/env python3
 """
 Command interpreter for the AirBnB clone project.
+
+Run without arguments for the interactive interpreter, or with
+--batch <script> (- for stdin) to replay a file of commands, saving
+storage once at the end or every --flush-every commands.
 """
 
+import argparse
 import cmd
 import sys
-from models.base_model import BaseModel
-from models.user import User
+import time
+from itertools import islice
 from models import storage
+from models.compact import compact
+from models.engine.metrics import metrics
+from models.registry import get_model
 
 
 class HBNBCommand(cmd.Cmd):
@@ -25,7 +33,8 @@ class HBNBCommand(cmd.Cmd):
     
     def get_class(self, class_name):
         """
-        Get the class object from class name.
+        Get the class object from class name, through the model
+        registry.
         
         Args:
             class_name (str): Name of the class
@@ -33,16 +42,63 @@ class HBNBCommand(cmd.Cmd):
         Returns:
             class: The class object or None if not found
         """
-        classes = {
-            'BaseModel': BaseModel,
-            'User': User
-        }
-        return classes.get(class_name)
+        cls = get_model(class_name)
+        if cls is not None and storage.compact_models:
+            cls = compact(cls)
+        return cls
+    
+    def run_batch(self, lines, flush_every=0):
+        """
+        Run commands without prompts, saving storage once per batch.
+        
+        The commands run inside a storage transaction, so their save()
+        calls are deferred to a single one when the batch ends. A
+        command that raises is reported on stderr and only its own
+        changes are undone. A throughput summary is printed to stderr.
+        
+        Args:
+            lines: Iterable of command lines, e.g. an open file
+            flush_every (int): Commands per batch, 0 for a single batch
+        
+        Returns:
+            int: Number of commands run
+        """
+        lines = iter(lines)
+        count = 0
+        flushes = 0
+        start = time.perf_counter()
+        stop = False
+        while not stop:
+            stop = True
+            first = count
+            with storage.transaction():
+                for line in lines:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    count += 1
+                    try:
+                        if self.onecmd(line):
+                            break
+                    except Exception as error:
+                        print("** line {}: {} **".format(count, error),
+                              file=sys.stderr)
+                    if flush_every and count % flush_every == 0:
+                        stop = False
+                        break
+            if count > first:
+                flushes += 1
+        elapsed = time.perf_counter() - start
+        print("{} commands in {:.3f}s ({:.0f} commands/s, {} flushes)".format(
+            count, elapsed, count / elapsed if elapsed else 0, flushes),
+            file=sys.stderr)
+        return count
     
     def do_quit(self, arg):
         """
         Quit command to exit the program
         """
+        storage.flush()
         return True
     
     def do_EOF(self, arg):
@@ -50,6 +106,7 @@ class HBNBCommand(cmd.Cmd):
         EOF command to exit the program
         """
         print()
+        storage.flush()
         return True
     
     def do_create(self, arg):
@@ -67,8 +124,9 @@ class HBNBCommand(cmd.Cmd):
             print("** class doesn't exist **")
             return
         
-        new_instance = cls()
-        new_instance.save()
+        with storage.transaction():
+            new_instance = cls()
+            new_instance.save()
         print(new_instance.id)
     
     def do_show(self, arg):
@@ -92,14 +150,13 @@ class HBNBCommand(cmd.Cmd):
             return
         
         instance_id = args[1]
-        key = "{}.{}".format(class_name, instance_id)
-        objects = storage.all()
+        obj = storage.get(class_name, instance_id)
         
-        if key not in objects:
+        if obj is None:
             print("** no instance found **")
             return
         
-        print(objects[key])
+        print(obj)
     
     def do_destroy(self, arg):
         """
@@ -122,40 +179,102 @@ class HBNBCommand(cmd.Cmd):
             return
         
         instance_id = args[1]
-        key = "{}.{}".format(class_name, instance_id)
-        objects = storage.all()
+        obj = storage.get(class_name, instance_id)
         
-        if key not in objects:
+        if obj is None:
             print("** no instance found **")
             return
         
-        del objects[key]
-        storage.save()
+        with storage.transaction():
+            storage.delete(obj)
+            storage.save()
     
     def do_all(self, arg):
         """
         Prints all string representation of all instances.
-        Usage: all [<class name>]
-        """
-        objects = storage.all()
+        Usage: all [<class name>] [--jsonl] [--limit <n>] [--offset <n>]
+                   [--page <n>]
         
-        if arg:
-            class_name = arg.strip()
-            cls = self.get_class(class_name)
-            if cls is None:
-                print("** class doesn't exist **")
+        The instances are printed as they are read, in the format of a
+        printed list, or as one JSON object per line with --jsonl.
+        --offset skips the first instances, --limit caps how many are
+        printed, and --page <n> prints the n-th page of --limit
+        instances.
+        """
+        args = arg.split()
+        options = {'jsonl': False, 'limit': None, 'offset': 0, 'page': None}
+        class_name = None
+        while args:
+            word = args.pop(0)
+            option = word[2:] if word.startswith('--') else None
+            if option == 'jsonl':
+                options['jsonl'] = True
+            elif option in ('limit', 'offset', 'page'):
+                value = args.pop(0) if args else ""
+                if not value.isdigit():
+                    print("** {} must be a number **".format(word))
+                    return
+                options[option] = int(value)
+            elif class_name is None and option is None:
+                class_name = word
+            else:
+                print("** unknown option: {} **".format(word))
                 return
-            
-            # Filter objects by class name
-            filtered_objects = []
-            for key, obj in objects.items():
-                if obj.__class__.__name__ == class_name:
-                    filtered_objects.append(str(obj))
-            print(filtered_objects)
+        
+        if class_name is not None and self.get_class(class_name) is None:
+            print("** class doesn't exist **")
+            return
+        
+        start = options['offset']
+        stop = options['limit']
+        if options['page'] is not None and stop is not None:
+            start += max(options['page'] - 1, 0) * stop
+        if stop is not None:
+            stop += start
+        
+        # Objects are formatted one at a time through the storage
+        # stream, so output starts at once and memory stays flat
+        objects = islice(storage.stream(class_name), start, stop)
+        if options['jsonl']:
+            self.print_jsonl(objects)
         else:
-            # Print all objects
-            all_objects = [str(obj) for obj in objects.values()]
-            print(all_objects)
+            self.print_list(objects)
+    
+    def print_list(self, objects):
+        """
+        Print the string representations of objects as a list, the way
+        print() shows a list of str, without building the list.
+        
+        Args:
+            objects: Iterable of instances
+        """
+        out = sys.stdout
+        out.write("[")
+        separator = ""
+        for obj in objects:
+            out.write(separator + repr(str(obj)))
+            if not separator:
+                out.flush()
+                separator = ", "
+        out.write("]\n")
+        out.flush()
+    
+    def print_jsonl(self, objects):
+        """
+        Print the dictionary representations of objects as JSON lines.
+        
+        Args:
+            objects: Iterable of instances
+        """
+        out = sys.stdout
+        dumps = storage.codec.dumps
+        first = True
+        for obj in objects:
+            out.write(dumps(obj.to_dict()) + "\n")
+            if first:
+                out.flush()
+                first = False
+        out.flush()
     
     def do_update(self, arg):
         """
@@ -178,10 +297,9 @@ class HBNBCommand(cmd.Cmd):
             return
         
         instance_id = args[1]
-        key = "{}.{}".format(class_name, instance_id)
-        objects = storage.all()
+        obj = storage.get(class_name, instance_id)
         
-        if key not in objects:
+        if obj is None:
             print("** no instance found **")
             return
         
@@ -200,9 +318,6 @@ class HBNBCommand(cmd.Cmd):
         if attr_value.startswith('"') and attr_value.endswith('"'):
             attr_value = attr_value[1:-1]
         
-        # Get the object and update the attribute
-        obj = objects[key]
-        
         # Try to convert to int or float if possible
         try:
             if '.' in attr_value:
@@ -213,9 +328,64 @@ class HBNBCommand(cmd.Cmd):
             # Keep as string if conversion fails
             pass
         
-        setattr(obj, attr_name, attr_value)
-        obj.save()
+        with storage.transaction():
+            setattr(obj, attr_name, attr_value)
+            obj.save()
+    
+    def do_stats(self, arg):
+        """
+        Prints the storage and console metrics.
+        Usage: stats [--json | reset]
+        
+        Metrics are collected when HBNB_METRICS=1 is set: the latency
+        of the storage operations and of every command, the bytes
+        written and the number of objects of each class. reset clears
+        the counters and latencies.
+        """
+        arg = arg.strip()
+        if arg not in ("", "--json", "reset"):
+            print("** unknown option: {} **".format(arg))
+            return
+        if not metrics.enabled:
+            print("** metrics are disabled, set HBNB_METRICS=1 **")
+            return
+        if arg == "reset":
+            metrics.reset()
+        elif arg == "--json":
+            print(storage.codec.dumps(metrics.snapshot()))
+        else:
+            print(metrics.report())
+
+
+metrics.register(HBNBCommand, {
+    name: "console." + name[len("do_"):]
+    for name in vars(HBNBCommand) if name.startswith("do_")})
+
+
+def main(argv=None):
+    """
+    Run the interactive interpreter or a batch script.
+    
+    Args:
+        argv (list): Command line arguments, defaults to sys.argv[1:]
+    """
+    parser = argparse.ArgumentParser(
+        description="Command interpreter for the AirBnB clone project.")
+    parser.add_argument('--batch', metavar='SCRIPT',
+                        help="run the commands of SCRIPT (- for stdin) and "
+                             "save storage once")
+    parser.add_argument('--flush-every', type=int, default=0, metavar='N',
+                        help="with --batch, save storage every N commands")
+    args = parser.parse_args(argv)
+    
+    if args.batch is None:
+        HBNBCommand().cmdloop()
+    elif args.batch == '-':
+        HBNBCommand().run_batch(sys.stdin, args.flush_every)
+    else:
+        with open(args.batch, 'r', encoding='utf-8') as f:
+            HBNBCommand().run_batch(f, args.flush_every)
 
 
 if __name__ == '__main__':
-    HBNBCommand().cmdloop()
\ No newline at end of file
+    main()
\ No newline at end of file
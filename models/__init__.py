@@ -4,12 +4,66 @@ Models package for AirBnB clone project.
 
 This package contains all the model classes for the AirBnB clone project,
 including the BaseModel class and all derived classes.
+
+Storage behaviour can be tuned through environment variables:
+    HBNB_TYPE_STORAGE: "db" to store objects in SQLite ($HBNB_DB_PATH)
+    HBNB_STORAGE_JOURNAL: "1" to append changes to a journal on save()
+    HBNB_STORAGE_LAZY: "1" to build instances on first access rather
+        than in reload()
+    HBNB_STORAGE_DURABILITY: "fsync", "group" or "os" (default)
+    HBNB_STORAGE_SHARED: "1" to lock the file and merge the changes of
+        other processes on save()
+    HBNB_STORAGE_THREADSAFE: "1" to share the storage between threads
+    HBNB_STORAGE_SHARDS: "class" for one file per class, or a number of
+        hash buckets, to store objects in a directory of shard files
+    HBNB_STORAGE_FORMAT: "binary" to store objects in a memory-mapped
+        binary snapshot instead of the JSON file
+    HBNB_STORAGE_COMPRESSION: "gzip", "lzma" or "zstd" to compress the
+        JSON file (also picked from a .gz, .xz or .zst file name)
+    HBNB_STORAGE_WRITE_BEHIND: milliseconds between background writes
+        of the changes saved, enables the write-behind and threadsafe
+        modes
+    HBNB_STORAGE_WRITE_BEHIND_CHANGES: pending objects that trigger a
+        write-behind flush before the delay is over
+    HBNB_COMPACT_MODELS: "1" to load and create __slots__ based objects
+    HBNB_JSON_CODEC: "json", "ujson" or "orjson", defaults to the
+        fastest one installed
+    HBNB_METRICS: "1" to collect the storage and console metrics shown
+        by the stats command (see models.engine.metrics)
 """
 
+import os
 from models.engine.file_storage import FileStorage
+from models.engine.metrics import metrics
+
+if os.getenv("HBNB_METRICS") == "1":
+    metrics.enable()
 
-# Create a unique FileStorage instance for the application
-storage = FileStorage()
+# Create a unique storage instance for the application
+if os.getenv("HBNB_TYPE_STORAGE") == "db":
+    from models.engine.db_storage import DBStorage
+    storage = DBStorage()
+else:
+    storage = FileStorage()
+    storage.journal = os.getenv("HBNB_STORAGE_JOURNAL") == "1"
+    storage.lazy = os.getenv("HBNB_STORAGE_LAZY") == "1"
+    storage.durability = os.getenv("HBNB_STORAGE_DURABILITY", "os")
+    storage.shared = os.getenv("HBNB_STORAGE_SHARED") == "1"
+    storage.threadsafe = os.getenv("HBNB_STORAGE_THREADSAFE") == "1"
+    storage.shards = os.getenv("HBNB_STORAGE_SHARDS") or None
+    if storage.shards is not None and storage.shards.isdigit():
+        storage.shards = int(storage.shards)
+    storage.snapshot_format = os.getenv("HBNB_STORAGE_FORMAT", "json")
+    storage.compression = os.getenv("HBNB_STORAGE_COMPRESSION") or None
+    if os.getenv("HBNB_STORAGE_WRITE_BEHIND"):
+        storage.write_behind = True
+        storage.threadsafe = True
+        storage.write_behind_ms = int(os.getenv("HBNB_STORAGE_WRITE_BEHIND"))
+    if os.getenv("HBNB_STORAGE_WRITE_BEHIND_CHANGES"):
+        storage.write_behind_changes = int(
+            os.getenv("HBNB_STORAGE_WRITE_BEHIND_CHANGES"))
+storage.compact_models = os.getenv("HBNB_COMPACT_MODELS") == "1"
+metrics.gauge('objects', storage.counts)
 
-# Call reload() method on this variable
-storage.reload()
+# Load the stored objects on their first use rather than on import
+storage.defer_reload()
@@ -0,0 +1,20 @@
+#!/usr/bin/python3
+"""
+Amenity class for AirBnB clone project.
+
+This module contains the Amenity class that inherits from BaseModel
+and defines amenity-specific attributes.
+"""
+
+from models.base_model import BaseModel
+
+
+class Amenity(BaseModel):
+    """
+    Amenity class that inherits from BaseModel.
+    
+    Public class attributes:
+        name: string - empty string
+    """
+    
+    name = ""
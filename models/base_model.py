@@ -9,13 +9,83 @@ attributes and methods for other classes in the AirBnB clone project.
 import uuid
 from datetime import datetime
 from models import storage
+from models.registry import register
+
+# Unbound, so that the compiled functions skip the attribute lookups
+_fromisoformat = datetime.fromisoformat
+_isoformat = datetime.isoformat
+
+
+def _compile(info):
+    """
+    Build the serializer and deserializer of a model class and store
+    them in its registry metadata.
+    
+    The serializer is to_dict() with the class name bound in. The
+    deserializer turns the timestamps read as strings into datetimes
+    and copies the keyword arguments into the attributes of the
+    instance in one step, skipping __setattr__: a new instance is not
+    stored yet, so there is no change to report to storage. Updating
+    the instance dictionary rather than replacing it keeps the key
+    sharing dictionary of the class, which takes less memory. Classes
+    that define their own __setattr__ get the attribute by attribute
+    deserializer instead.
+    
+    Args:
+        info (ModelInfo): Registry metadata of the class
+    """
+    name = info.name
+    
+    def serializer(obj):
+        record = obj.__dict__.copy()
+        record['__class__'] = name
+        record['created_at'] = _isoformat(obj.created_at)
+        record['updated_at'] = _isoformat(obj.updated_at)
+        return record
+    
+    def deserializer(obj, kwargs):
+        # kwargs is the fresh dictionary of a ** call, it can be changed
+        kwargs.pop('__class__', None)
+        created_at = kwargs.get('created_at')
+        if created_at.__class__ is str:
+            kwargs['created_at'] = _fromisoformat(created_at)
+        updated_at = kwargs.get('updated_at')
+        if updated_at.__class__ is str:
+            kwargs['updated_at'] = _fromisoformat(updated_at)
+        obj.__dict__.update(kwargs)
+    
+    def generic_deserializer(obj, kwargs):
+        for key, value in kwargs.items():
+            if key == 'created_at' or key == 'updated_at':
+                # Convert string back to datetime object
+                setattr(obj, key, _fromisoformat(value))
+            elif key != '__class__':
+                setattr(obj, key, value)
+    
+    info.serializer = serializer
+    if info.cls.__setattr__ is BaseModel.__setattr__:
+        info.deserializer = deserializer
+    else:
+        info.deserializer = generic_deserializer
 
 
 class BaseModel:
     """
     BaseModel class that defines all common attributes/methods for other classes.
+    
+    Every subclass is registered in models.registry when it is defined.
     """
     
+    def __init_subclass__(cls, **kwargs):
+        """
+        Register a new model class.
+        
+        Args:
+            **kwargs: Class keyword arguments, passed on
+        """
+        super().__init_subclass__(**kwargs)
+        _compile(register(cls))
+    
     def __init__(self, *args, **kwargs):
         """
         Initialize BaseModel instance.
@@ -25,6 +95,10 @@ class BaseModel:
             **kwargs: Arbitrary keyword arguments
         """
         if kwargs:
+            info = type(self).__dict__.get('_model_info')
+            if info is not None:
+                info.deserializer(self, kwargs)
+                return
             for key, value in kwargs.items():
                 if key == 'created_at' or key == 'updated_at':
                     # Convert string back to datetime object
@@ -32,12 +106,27 @@ class BaseModel:
                 elif key != '__class__':
                     setattr(self, key, value)
         else:
-            self.id = str(uuid.uuid4())
-            self.created_at = datetime.now()
-            self.updated_at = datetime.now()
+            # Not stored yet, so there is no change to report through
+            # __setattr__; object.__setattr__ also fills the slots of
+            # the compact models, which have no __dict__
+            object.__setattr__(self, 'id', str(uuid.uuid4()))
+            object.__setattr__(self, 'created_at', datetime.now())
+            object.__setattr__(self, 'updated_at', datetime.now())
             # Add new instance to storage
             storage.new(self)
     
+    def __setattr__(self, name, value):
+        """
+        Set an attribute and report the change to storage.
+        
+        Args:
+            name (str): Name of the attribute
+            value: New value of the attribute
+        """
+        storage.before_change(self)
+        super().__setattr__(name, value)
+        storage.mark_dirty(self, name)
+    
     def __str__(self):
         """
         String representation of the BaseModel instance.
@@ -66,8 +155,14 @@ class BaseModel:
         Returns:
             dict: Dictionary representation of the instance
         """
+        info = type(self).__dict__.get('_model_info')
+        if info is not None:
+            return info.serializer(self)
         dict_copy = self.__dict__.copy()
         dict_copy['__class__'] = self.__class__.__name__
         dict_copy['created_at'] = self.created_at.isoformat()
         dict_copy['updated_at'] = self.updated_at.isoformat()
         return dict_copy
+
+
+_compile(register(BaseModel))
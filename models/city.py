@@ -0,0 +1,22 @@
+#!/usr/bin/python3
+"""
+City class for AirBnB clone project.
+
+This module contains the City class that inherits from BaseModel
+and defines city-specific attributes.
+"""
+
+from models.base_model import BaseModel
+
+
+class City(BaseModel):
+    """
+    City class that inherits from BaseModel.
+    
+    Public class attributes:
+        state_id: string - empty string (it will be the State.id)
+        name: string - empty string
+    """
+    
+    state_id = ""
+    name = ""
@@ -0,0 +1,184 @@
+#!/usr/bin/python3
+"""
+Compact model classes for AirBnB clone project.
+
+This module builds __slots__ based variants of the model classes for
+large in-memory stores. A compact instance keeps its known attributes
+(id, created_at, updated_at and the class attributes declared on the
+model, such as User.email) in slots instead of a per-instance
+dictionary; any other attribute, e.g. one added by the console's
+update command, goes to an overflow dictionary that is only created
+when needed.
+
+Compact classes have the same name, methods and serialized form as the
+model they are built from, but they do not inherit from it: use
+type(obj).model to get the original class.
+"""
+
+from models import storage
+from models.base_model import BaseModel
+from models.registry import schema
+
+
+class CompactModel:
+    """
+    CompactModel class that compact model classes are built on.
+    """
+    
+    __slots__ = ('_extra', '__weakref__')
+    
+    model = BaseModel
+    fields = ()
+    
+    __init__ = BaseModel.__init__
+    save = BaseModel.save
+    
+    def __setattr__(self, name, value):
+        """
+        Set an attribute, in its slot or in the overflow dictionary,
+        and report the change to storage.
+        
+        Args:
+            name (str): Name of the attribute
+            value: New value of the attribute
+        """
+        storage.before_change(self)
+        if name in self.fields:
+            object.__setattr__(self, name, value)
+        else:
+            if self._get_extra() is None:
+                object.__setattr__(self, '_extra', {})
+            self._extra[name] = value
+        storage.mark_dirty(self, name)
+    
+    def __getattr__(self, name):
+        """
+        Look up an attribute that is not in a slot.
+        
+        Args:
+            name (str): Name of the attribute
+        
+        Returns:
+            The overflow attribute, or the model class default
+        """
+        extra = self._get_extra()
+        if extra is not None and name in extra:
+            return extra[name]
+        if name in self.fields and hasattr(self.model, name):
+            return getattr(self.model, name)
+        raise AttributeError("'{}' object has no attribute '{}'".format(
+            self.__class__.__name__, name))
+    
+    def __delattr__(self, name):
+        """
+        Delete an attribute from its slot or the overflow dictionary.
+        
+        Args:
+            name (str): Name of the attribute
+        """
+        if name in self.fields:
+            object.__delattr__(self, name)
+        elif self._get_extra() is not None and name in self._extra:
+            del self._extra[name]
+        else:
+            raise AttributeError(name)
+    
+    def __str__(self):
+        """
+        String representation of the instance, same as BaseModel's.
+        
+        Returns:
+            str: Formatted string representation
+        """
+        return "[{}] ({}) {}".format(
+            self.__class__.__name__,
+            self.id,
+            self._get_state()
+        )
+    
+    def to_dict(self):
+        """
+        Return a dictionary containing all attributes of the instance.
+        
+        Returns:
+            dict: Dictionary representation of the instance
+        """
+        dict_copy = self._get_state()
+        dict_copy['__class__'] = self.__class__.__name__
+        dict_copy['created_at'] = self.created_at.isoformat()
+        dict_copy['updated_at'] = self.updated_at.isoformat()
+        return dict_copy
+    
+    def _get_extra(self):
+        """
+        Return the overflow dictionary, None if it was never created.
+        """
+        try:
+            return object.__getattribute__(self, '_extra')
+        except AttributeError:
+            return None
+    
+    def _get_state(self):
+        """
+        Return the attributes set on the instance.
+        
+        Returns:
+            dict: Attribute values, slots first
+        """
+        state = {}
+        for name in self.fields:
+            try:
+                state[name] = object.__getattribute__(self, name)
+            except AttributeError:
+                pass
+        extra = self._get_extra()
+        if extra:
+            state.update(extra)
+        return state
+    
+    def _set_state(self, state):
+        """
+        Replace the attributes of the instance without reporting the
+        change to storage.
+        
+        Args:
+            state (dict): Attribute values, as given by _get_state()
+        """
+        for name in self.fields:
+            if name in state:
+                object.__setattr__(self, name, state[name])
+            else:
+                try:
+                    object.__delattr__(self, name)
+                except AttributeError:
+                    pass
+        extra = {name: value for name, value in state.items()
+                 if name not in self.fields}
+        object.__setattr__(self, '_extra', extra or None)
+
+
+def compact(cls):
+    """
+    Return the compact variant of a model class, building it once.
+    
+    Args:
+        cls: Model class (BaseModel or a subclass)
+    
+    Returns:
+        type: Class with the same name storing its attributes in slots
+    """
+    if issubclass(cls, CompactModel):
+        return cls
+    compact_cls = cls.__dict__.get('_compact_class')
+    if compact_cls is None:
+        fields = schema(cls)
+        compact_cls = type(cls.__name__, (CompactModel,), {
+            '__slots__': fields,
+            '__module__': cls.__module__,
+            '__qualname__': cls.__qualname__,
+            '__doc__': cls.__doc__,
+            'model': cls,
+            'fields': fields,
+        })
+        setattr(cls, '_compact_class', compact_cls)
+    return compact_cls
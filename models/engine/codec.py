@@ -0,0 +1,186 @@
+#!/usr/bin/python3
+"""
+JSON codecs for the AirBnB clone storage engines.
+
+This module picks the JSON library used to encode and decode stored
+objects: orjson or ujson when they are installed, the standard library
+json module otherwise. Every codec encodes datetime values as ISO 8601
+strings itself, so serialized objects do not have to be converted
+beforehand.
+"""
+
+import json
+import math
+import os
+import warnings
+from datetime import datetime
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+def _default(value):
+    """
+    Encode the values the JSON libraries do not know about.
+    
+    Args:
+        value: Value to encode
+    
+    Returns:
+        str: ISO 8601 form of a datetime
+    """
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError("Object of type {} is not JSON serializable".format(
+        value.__class__.__name__))
+
+
+class Codec:
+    """
+    Codec class pairing the encode and decode functions of a JSON
+    library.
+    
+    Attributes:
+        name (str): Name of the library
+    """
+    
+    def __init__(self, name, dumps, loads):
+        """
+        Initialize Codec instance.
+        
+        Args:
+            name (str): Name of the library
+            dumps: Function encoding a value to a str
+            loads: Function decoding a str or bytes
+        """
+        self.name = name
+        self.dumps = dumps
+        self.loads = loads
+    
+    def __repr__(self):
+        """
+        Return the representation of the codec.
+        """
+        return "<Codec {}>".format(self.name)
+
+
+def _json_dumps(value):
+    """
+    Encode a value with the standard library.
+    """
+    return json.dumps(value, default=_default)
+
+
+def _has_non_finite(value):
+    """
+    Tell whether a value holds an infinite or NaN float.
+    
+    Args:
+        value: Decoded JSON value
+    
+    Returns:
+        bool: True if a float of the value is not finite
+    """
+    if isinstance(value, float):
+        return not math.isfinite(value)
+    if isinstance(value, dict):
+        return any(_has_non_finite(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return any(_has_non_finite(item) for item in value)
+    return False
+
+
+def _orjson_dumps(value):
+    """
+    Encode a value with orjson, falling back to the standard library
+    for what orjson rejects (non-str keys, integers over 64 bits) or
+    writes as null (infinite and NaN floats).
+    """
+    try:
+        text = orjson.dumps(value)
+    except TypeError:
+        return _json_dumps(value)
+    # Only values holding a null can hide a non-finite float
+    if b"null" in text and _has_non_finite(value):
+        return _json_dumps(value)
+    return text.decode('utf-8')
+
+
+def _orjson_loads(text):
+    """
+    Decode with orjson, falling back to the standard library for the
+    Infinity and NaN the standard library writes.
+    """
+    try:
+        return orjson.loads(text)
+    except ValueError:
+        return json.loads(text)
+
+
+def _ujson_dumps(value):
+    """
+    Encode a value with ujson, falling back to the standard library
+    for infinite and NaN floats, which ujson rejects.
+    """
+    try:
+        return ujson.dumps(value, default=_default)
+    except OverflowError:
+        return _json_dumps(value)
+
+
+def _ujson_loads(text):
+    """
+    Decode with ujson, falling back to the standard library for what
+    ujson rejects.
+    """
+    try:
+        return ujson.loads(text)
+    except ValueError:
+        return json.loads(text)
+
+
+CODECS = {'json': Codec('json', _json_dumps, json.loads)}
+if ujson is not None:
+    CODECS['ujson'] = Codec('ujson', _ujson_dumps, _ujson_loads)
+if orjson is not None:
+    CODECS['orjson'] = Codec('orjson', _orjson_dumps, _orjson_loads)
+
+
+def get_codec(name=None):
+    """
+    Return a codec by name.
+    
+    An unavailable library named by $HBNB_JSON_CODEC only gives a
+    warning, so that a typo does not prevent importing the models.
+    
+    Args:
+        name (str): "json", "ujson" or "orjson"; defaults to
+            $HBNB_JSON_CODEC, then to the fastest installed library
+    
+    Returns:
+        Codec: The codec
+    
+    Raises:
+        ValueError: If the library given as name is unknown or not
+            installed
+    """
+    if name is None:
+        name = os.getenv("HBNB_JSON_CODEC")
+        if name is not None and name not in CODECS:
+            warnings.warn("JSON codec {!r} is not available, using the "
+                          "default one".format(name), RuntimeWarning)
+            name = None
+    if name is None:
+        for name in ('orjson', 'ujson', 'json'):
+            if name in CODECS:
+                break
+    if name not in CODECS:
+        raise ValueError("JSON codec {!r} is not available".format(name))
+    return CODECS[name]
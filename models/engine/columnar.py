@@ -0,0 +1,258 @@
+#!/usr/bin/python3
+"""
+Columnar view of a FileStorage file for the AirBnB clone project.
+
+This module contains the ColumnStore and Table classes, which load the
+objects of a JSON storage file into one column per attribute and per
+class, without building any model instance. Columns are NumPy arrays
+when NumPy is installed (timestamps as datetime64[us]) and plain lists
+otherwise (timestamps as datetime), so that reports can filter, group
+and count over millions of records with vectorized operations.
+"""
+
+from collections import Counter
+from datetime import datetime
+from models.engine.file_storage import FileStorage, _model_classes
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+TIMESTAMPS = ('created_at', 'updated_at')
+
+
+class Table:
+    """
+    Table class holding the columns of the objects of one class.
+    
+    Attributes:
+        name (str): Name of the class
+        columns (dict): Column values keyed by attribute name
+    """
+    
+    def __init__(self, name, columns, length):
+        """
+        Initialize Table instance.
+        
+        Args:
+            name (str): Name of the class
+            columns (dict): Column values keyed by attribute name
+            length (int): Number of rows
+        """
+        self.name = name
+        self.columns = columns
+        self.length = length
+    
+    def __len__(self):
+        """
+        Return the number of rows.
+        """
+        return self.length
+    
+    def __getitem__(self, column):
+        """
+        Return the values of a column.
+        
+        Args:
+            column (str): Attribute name
+        
+        Returns:
+            Column values, one per row
+        """
+        return self.columns[column]
+    
+    def count(self):
+        """
+        Return the number of rows.
+        
+        Returns:
+            int: Number of rows
+        """
+        return self.length
+    
+    def filter(self, mask):
+        """
+        Return the rows selected by a boolean mask.
+        
+        Args:
+            mask: One boolean per row, e.g. table['email'] == "x"
+        
+        Returns:
+            Table: New table holding the selected rows
+        """
+        if np is not None:
+            mask = np.asarray(mask, dtype=bool)
+            columns = {name: values[mask]
+                       for name, values in self.columns.items()}
+            return Table(self.name, columns, int(mask.sum()))
+        rows = [index for index, selected in enumerate(mask) if selected]
+        columns = {name: [values[index] for index in rows]
+                   for name, values in self.columns.items()}
+        return Table(self.name, columns, len(rows))
+    
+    def where(self, column, value):
+        """
+        Return the rows whose column equals value.
+        
+        Args:
+            column (str): Attribute name
+            value: Value to compare with
+        
+        Returns:
+            Table: New table holding the matching rows
+        """
+        values = self.columns[column]
+        if np is not None:
+            return self.filter(values == value)
+        return self.filter([item == value for item in values])
+    
+    def day(self, column):
+        """
+        Return a timestamp column truncated to the day.
+        
+        Args:
+            column (str): Name of a timestamp column
+        
+        Returns:
+            Days, as datetime64[D] values or date objects
+        """
+        values = self.columns[column]
+        if np is not None:
+            return values.astype('datetime64[D]')
+        return [value.date() if value is not None else None
+                for value in values]
+    
+    def group_count(self, keys):
+        """
+        Count the rows per distinct key.
+        
+        Args:
+            keys: Column name, or one key per row (e.g. the result of
+                day())
+        
+        Returns:
+            dict: Number of rows keyed by key value
+        """
+        if isinstance(keys, str):
+            keys = self.columns[keys]
+        if np is not None:
+            keys = np.asarray(keys)
+            if keys.dtype != object:
+                values, counts = np.unique(keys, return_counts=True)
+                return dict(zip(values.tolist(), counts.tolist()))
+            keys = keys.tolist()
+        return dict(Counter(keys))
+
+
+class ColumnStore:
+    """
+    ColumnStore class giving a read-only columnar view of a storage
+    file, with one Table per class.
+    
+    Attributes:
+        tables (dict): Tables keyed by class name
+    """
+    
+    def __init__(self, tables):
+        """
+        Initialize ColumnStore instance.
+        
+        Args:
+            tables (dict): Tables keyed by class name
+        """
+        self.tables = tables
+    
+    def __getitem__(self, class_name):
+        """
+        Return the table of a class.
+        
+        Args:
+            class_name (str): Name of the class
+        
+        Returns:
+            Table: Table of the class, empty if it has no objects
+        """
+        if class_name not in self.tables:
+            return Table(class_name, {}, 0)
+        return self.tables[class_name]
+    
+    @classmethod
+    def load(cls, path=None):
+        """
+        Build the columns from a storage file and its journal.
+        
+        Attributes missing from a record get the class default
+        (e.g. "" for User.email) or None.
+        
+        Args:
+            path (str): JSON file, defaults to the storage file
+        
+        Returns:
+            ColumnStore: The columnar view
+        """
+        if path is None:
+            path = FileStorage._FileStorage__file_path
+        reader = FileStorage()
+        changes = {}
+        for log_path in reader._journals_to_replay(path):
+            changes.update(reader._journal_changes(log_path))
+        
+        # The records are streamed into lists of values per attribute,
+        # so that they are never all held at once besides the columns
+        classes = _model_classes()
+        values = {}
+        counts = {}
+        for key, record in reader._replay_stream(path, changes):
+            class_name = record.get('__class__')
+            model = classes.get(class_name)
+            lists = values.setdefault(class_name, {})
+            count = counts.get(class_name, 0)
+            for name, value in record.items():
+                if name == '__class__':
+                    continue
+                column = lists.get(name)
+                if column is None:
+                    column = [getattr(model, name, None)] * count
+                    lists[name] = column
+                column.append(value)
+            for name, column in lists.items():
+                if len(column) == count:
+                    column.append(getattr(model, name, None))
+            counts[class_name] = count + 1
+        
+        tables = {}
+        for class_name, lists in values.items():
+            columns = {}
+            for name in list(lists):
+                columns[name] = cls._column(name, lists.pop(name))
+            tables[class_name] = Table(class_name, columns,
+                                       counts[class_name])
+        return cls(tables)
+    
+    @staticmethod
+    def _column(name, values):
+        """
+        Convert the values of an attribute to a column.
+        
+        Args:
+            name (str): Attribute name
+            values (list): One value per record
+        
+        Returns:
+            NumPy array or list
+        """
+        if name in TIMESTAMPS:
+            if np is not None:
+                return np.array(values, dtype='datetime64[us]')
+            return [datetime.fromisoformat(value) if value else None
+                    for value in values]
+        if np is None:
+            return values
+        kinds = {type(value) for value in values}
+        if len(kinds) == 1 and kinds <= {str, int, float, bool}:
+            return np.array(values)
+        # Mixed, missing or nested values
+        column = np.empty(len(values), dtype=object)
+        column[:] = values
+        return column
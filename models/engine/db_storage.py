@@ -0,0 +1,420 @@
+#!/usr/bin/python3
+"""
+DBStorage class for AirBnB clone project.
+
+This module contains the DBStorage class that stores objects in a
+SQLite database, with one table per class.
+"""
+
+import json
+import os
+import sqlite3
+import weakref
+from contextlib import contextmanager
+from datetime import datetime
+from models.engine.codec import get_codec
+from models.engine.file_storage import _get_state, _model_classes, _set_state
+from models.engine.metrics import metrics
+
+# Values bound to SQL parameters as they are
+_SCALARS = (str, int, float, type(None))
+
+
+class DBStorage:
+    """
+    DBStorage class that stores instances in a SQLite database.
+    
+    Every class gets its own table holding the indexed id, created_at
+    and updated_at columns plus the other attributes as JSON. Objects
+    are only read when asked for, and new or changed objects are kept
+    in memory until save() writes them all in a single transaction.
+    
+    Inside transaction() every save() is deferred to a single one when
+    the outermost transaction ends, and the changes made to the objects
+    are undone if it raises.
+    """
+    
+    def __init__(self, path=None):
+        """
+        Initialize DBStorage instance.
+        
+        Args:
+            path (str): Database file, defaults to $HBNB_DB_PATH or
+                hbnb.db
+        """
+        if path is None:
+            path = os.getenv("HBNB_DB_PATH", "hbnb.db")
+        self.__path = path
+        self.__connection = None
+        self.__tables = set()
+        # Instances already read, kept only while referenced elsewhere
+        self.__loaded = weakref.WeakValueDictionary()
+        self.__pending = {}
+        self.__deleted = set()
+        self.__undo = []
+        self.__save_requested = False
+        self.codec = get_codec()
+        self.compact_models = False
+    
+    def all(self, cls=None):
+        """
+        Return the stored objects, read from the database.
+        
+        Args:
+            cls: Class or class name to restrict the result to
+        
+        Returns:
+            dict: Objects keyed by <class name>.id
+        """
+        return {"{}.{}".format(obj.__class__.__name__, obj.id): obj
+                for obj in self.stream(cls)}
+    
+    def stream(self, cls=None):
+        """
+        Yield the stored objects one at a time, reading the tables
+        through a cursor instead of building a dictionary.
+        
+        Args:
+            cls: Class or class name to restrict the result to
+        
+        Yields:
+            The objects, in the order of all()
+        """
+        if cls is None:
+            class_names = [name for name in _model_classes()
+                           if name in self.__tables]
+        else:
+            class_names = [cls if isinstance(cls, str) else cls.__name__]
+        seen = set()
+        for class_name in class_names:
+            if class_name not in self.__tables:
+                continue
+            rows = self.__connection.execute(
+                'SELECT id, created_at, updated_at, data FROM "{}"'.format(
+                    class_name))
+            for row in rows:
+                key = "{}.{}".format(class_name, row[0])
+                if key in self.__deleted:
+                    continue
+                if key in self.__pending:
+                    seen.add(key)
+                    yield self.__pending[key]
+                else:
+                    yield self._instance(class_name, row)
+        for key, obj in list(self.__pending.items()):
+            if key not in seen and \
+                    (cls is None or key.partition('.')[0] in class_names):
+                yield obj
+    
+    def get(self, cls, id):
+        """
+        Return one object through its primary key.
+        
+        Args:
+            cls: Class or class name of the object
+            id (str): Id of the object
+        
+        Returns:
+            The object, or None if it is not stored
+        """
+        class_name = cls if isinstance(cls, str) else cls.__name__
+        key = "{}.{}".format(class_name, id)
+        if key in self.__deleted:
+            return None
+        obj = self.__pending.get(key)
+        if obj is None and class_name in self.__tables:
+            row = self.__connection.execute(
+                'SELECT id, created_at, updated_at, data FROM "{}" '
+                'WHERE id = ?'.format(class_name), (id,)).fetchone()
+            if row is not None:
+                obj = self._instance(class_name, row)
+        return obj
+    
+    def find(self, cls, **criteria):
+        """
+        Return the objects of a class whose attributes equal the given
+        values, filtering in SQL.
+        
+        Args:
+            cls: Class or class name of the objects
+            **criteria: Attribute names and the values they must equal
+        
+        Returns:
+            list: Matching objects
+        
+        Raises:
+            ValueError: If a timestamp is not a datetime or an ISO
+                string, or a value cannot be encoded as JSON
+        """
+        class_name = cls if isinstance(cls, str) else cls.__name__
+        for attr_name in ('created_at', 'updated_at'):
+            if isinstance(criteria.get(attr_name), str):
+                criteria[attr_name] = datetime.fromisoformat(
+                    criteria[attr_name])
+            elif attr_name in criteria and \
+                    not isinstance(criteria[attr_name], datetime):
+                raise ValueError("{} must be a datetime or an ISO "
+                                 "string".format(attr_name))
+        found = {}
+        if class_name in self.__tables:
+            model = _model_classes().get(class_name)
+            clauses = []
+            params = []
+            for attr_name, value in criteria.items():
+                if attr_name in ('id', 'created_at', 'updated_at'):
+                    clauses.append("{} = ?".format(attr_name))
+                    if attr_name != 'id':
+                        value = value.isoformat()
+                    params.append(value)
+                    continue
+                # Class attributes are not stored, compare to the default
+                default = getattr(model, attr_name, None)
+                params.append("$." + json.dumps(attr_name))
+                if isinstance(value, _SCALARS):
+                    clauses.append("COALESCE(json_extract(data, ?), ?) = ?")
+                    params.append(default if isinstance(default, _SCALARS)
+                                  else None)
+                else:
+                    # Lists and dictionaries are extracted as JSON text
+                    clauses.append("COALESCE(json_extract(data, ?), "
+                                   "json(?)) = json(?)")
+                    try:
+                        params.append(json.dumps(default))
+                        value = json.dumps(value)
+                    except TypeError as error:
+                        raise ValueError("cannot compare {}: {}".format(
+                            attr_name, error)) from None
+                params.append(value)
+            query = 'SELECT id, created_at, updated_at, data FROM "{}"'.format(
+                class_name)
+            if clauses:
+                query += " WHERE " + " AND ".join(clauses)
+            for row in self.__connection.execute(query, params):
+                key = "{}.{}".format(class_name, row[0])
+                if key not in self.__deleted and key not in self.__pending:
+                    found[key] = self._instance(class_name, row)
+        for key, obj in self.__pending.items():
+            if key.partition('.')[0] == class_name and all(
+                    getattr(obj, name, None) == value
+                    for name, value in criteria.items()):
+                found[key] = obj
+        return list(found.values())
+    
+    def new(self, obj):
+        """
+        Add obj to the objects written by the next save().
+        
+        Args:
+            obj: Object to store
+        """
+        key = "{}.{}".format(obj.__class__.__name__, obj.id)
+        self.__pending[key] = obj
+        self.__loaded[key] = obj
+        self.__deleted.discard(key)
+    
+    def before_change(self, obj):
+        """
+        Record the state of a stored object about to be changed, so that
+        the running transaction can restore it.
+        
+        Args:
+            obj: Object about to change
+        """
+        if not self.__undo:
+            return
+        key = "{}.{}".format(obj.__class__.__name__, getattr(obj, 'id', None))
+        changes = self.__undo[-1][2]
+        if self.__loaded.get(key) is obj and key not in changes:
+            changes[key] = (obj, _get_state(obj))
+    
+    def mark_dirty(self, obj, attr_name):
+        """
+        Record that an attribute of a stored object has changed.
+        
+        Args:
+            obj: Object whose attribute was set
+            attr_name (str): Name of the attribute
+        """
+        key = "{}.{}".format(obj.__class__.__name__, getattr(obj, 'id', None))
+        if self.__loaded.get(key) is obj:
+            self.__pending[key] = obj
+    
+    def delete(self, obj=None):
+        """
+        Delete obj from the database on the next save().
+        
+        Args:
+            obj: Object to delete, nothing is done if None
+        """
+        if obj is None:
+            return
+        key = "{}.{}".format(obj.__class__.__name__, obj.id)
+        self.__pending.pop(key, None)
+        self.__loaded.pop(key, None)
+        self.__deleted.add(key)
+    
+    def save(self):
+        """
+        Write every new, changed and deleted object in one transaction.
+        
+        Within transaction() the write only happens when it ends.
+        """
+        if self.__undo:
+            self.__save_requested = True
+            return
+        rows = {}
+        for key, obj in self.__pending.items():
+            obj_dict = obj.to_dict()
+            class_name = obj_dict.pop('__class__')
+            row = (obj_dict.pop('id'), obj_dict.pop('created_at'),
+                   obj_dict.pop('updated_at'), self.codec.dumps(obj_dict))
+            rows.setdefault(class_name, []).append(row)
+        removed = {}
+        for key in self.__deleted:
+            class_name, _, obj_id = key.partition('.')
+            removed.setdefault(class_name, []).append((obj_id,))
+        
+        with self.__connection:
+            for class_name, class_rows in rows.items():
+                self._create_table(class_name)
+                self.__connection.executemany(
+                    'INSERT OR REPLACE INTO "{}" (id, created_at, updated_at, '
+                    'data) VALUES (?, ?, ?, ?)'.format(class_name), class_rows)
+            for class_name, ids in removed.items():
+                if class_name in self.__tables:
+                    self.__connection.executemany(
+                        'DELETE FROM "{}" WHERE id = ?'.format(class_name), ids)
+        self.__pending.clear()
+        self.__deleted.clear()
+    
+    def flush(self):
+        """
+        Write what is pending; nothing is, since save() writes through.
+        """
+    
+    def counts(self):
+        """
+        Return the number of objects of each class in the database.
+        
+        Objects not saved yet are not counted.
+        
+        Returns:
+            dict: Numbers of objects keyed by class name
+        """
+        counts = {}
+        for class_name in sorted(self.__tables):
+            count = self.__connection.execute(
+                'SELECT COUNT(*) FROM "{}"'.format(class_name)).fetchone()[0]
+            if count:
+                counts[class_name] = count
+        return counts
+    
+    @contextmanager
+    def transaction(self):
+        """
+        Group changes so that they are saved once, or not at all.
+        
+        Calls to save() made inside the block are deferred to a single
+        save() when the outermost transaction exits. If the block
+        raises, the pending writes and the attributes of the objects
+        changed in it are put back as they were.
+        
+        Yields:
+            DBStorage: This storage
+        """
+        self.__undo.append((dict(self.__pending), set(self.__deleted), {}))
+        try:
+            yield self
+        except BaseException:
+            pending, deleted, changes = self.__undo.pop()
+            for obj, state in changes.values():
+                _set_state(obj, state)
+            self.__pending = pending
+            self.__deleted = deleted
+            if not self.__undo:
+                self.__save_requested = False
+            raise
+        changes = self.__undo.pop()[2]
+        if self.__undo:
+            for key, previous in changes.items():
+                self.__undo[-1][2].setdefault(key, previous)
+        elif self.__save_requested:
+            self.__save_requested = False
+            self.save()
+    
+    def reload(self):
+        """
+        Open the database and create the tables of the model classes.
+        
+        Objects are not read here, but on demand by all(), get() and
+        find(); instances already read are forgotten.
+        """
+        if self.__connection is None:
+            self.__connection = sqlite3.connect(self.__path)
+            self.__connection.execute("PRAGMA journal_mode=WAL")
+        self.__tables = {row[0] for row in self.__connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'")}
+        with self.__connection:
+            for class_name in _model_classes():
+                self._create_table(class_name)
+        self.__loaded = weakref.WeakValueDictionary(self.__pending)
+    
+    def defer_reload(self):
+        """
+        Open the database; reload() reads no object, so it runs at once.
+        """
+        self.reload()
+    
+    def close(self):
+        """
+        Close the database connection.
+        """
+        if self.__connection is not None:
+            self.__connection.close()
+            self.__connection = None
+    
+    def _create_table(self, class_name):
+        """
+        Create the table of a class and its index if they are missing.
+        
+        Args:
+            class_name (str): Name of the class
+        """
+        if class_name in self.__tables:
+            return
+        self.__connection.execute(
+            'CREATE TABLE IF NOT EXISTS "{}" (id TEXT PRIMARY KEY, '
+            'created_at TEXT NOT NULL, updated_at TEXT NOT NULL, '
+            'data TEXT NOT NULL)'.format(class_name))
+        self.__connection.execute(
+            'CREATE INDEX IF NOT EXISTS "{0}_updated_at" '
+            'ON "{0}" (updated_at)'.format(class_name))
+        self.__tables.add(class_name)
+    
+    def _instance(self, class_name, row):
+        """
+        Return the instance for a table row, reusing the one already
+        read if it is still alive.
+        
+        Args:
+            class_name (str): Name of the class
+            row (tuple): (id, created_at, updated_at, data)
+        
+        Returns:
+            The model instance
+        """
+        key = "{}.{}".format(class_name, row[0])
+        obj = self.__loaded.get(key)
+        if obj is None:
+            obj_dict = self.codec.loads(row[3])
+            obj_dict.update(id=row[0], created_at=row[1], updated_at=row[2])
+            obj = _model_classes(self.compact_models)[class_name](**obj_dict)
+            self.__loaded[key] = obj
+        return obj
+
+
+metrics.register(DBStorage, {
+    'new': 'storage.new',
+    'save': 'storage.save',
+    'reload': 'storage.reload',
+})
@@ -6,18 +6,374 @@ This module contains the FileStorage class that handles serialization
 and deserialization of objects to/from JSON files.
 """
 
-import json
+import atexit
+import functools
 import os
+import shutil
+import threading
+import time
+import warnings
+import weakref
+import zlib
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from models.engine.codec import get_codec
+from models.engine.flusher import Flusher
+from models.engine.index import HashIndex, SortedIndex
+from models.engine.jsonstream import EXTENSIONS, compression_of, \
+    extension_of, iter_file, load_file, object_chunks, open_file
+from models.engine.metrics import metrics
+from models.engine.rwlock import RWLock
+from models.registry import get_model, models
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Stands in for the storage lock when threadsafe is off
+_NO_LOCK = nullcontext()
+
+
+def _model_classes(compact=False):
+    """
+    Return the model classes that can be loaded from storage.
+    
+    The classes come from models.registry, which imports the model
+    modules the first time.
+    
+    Args:
+        compact (bool): Return the __slots__ variants of the classes
+            (see models.compact)
+    
+    Returns:
+        dict: Classes keyed by class name, not to be changed
+    """
+    classes = models()
+    if compact:
+        from models.compact import compact
+        classes = {name: compact(cls) for name, cls in classes.items()}
+    return classes
+
+
+def _get_state(obj):
+    """
+    Return a copy of the attributes of a model instance.
+    
+    Args:
+        obj: Model instance, regular or compact
+    
+    Returns:
+        dict: Attribute values
+    """
+    get_state = getattr(obj, '_get_state', None)
+    if get_state is not None:
+        return get_state()
+    return dict(obj.__dict__)
+
+
+def _set_state(obj, state):
+    """
+    Replace the attributes of a model instance without going through
+    __setattr__.
+    
+    Args:
+        obj: Model instance, regular or compact
+        state (dict): Attribute values, as given by _get_state()
+    """
+    set_state = getattr(obj, '_set_state', None)
+    if set_state is not None:
+        set_state(state)
+    else:
+        obj.__dict__.clear()
+        obj.__dict__.update(state)
+
+
+def _reloaded(method):
+    """
+    Decorate a public FileStorage method so that it first runs the
+    reload deferred by defer_reload().
+    
+    The check is made when the method is called, also for generators
+    and coroutines.
+    
+    Args:
+        method: Method reading or changing the stored objects
+    
+    Returns:
+        function: The decorated method
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if FileStorage._FileStorage__reload_pending:
+            self._reload_pending()
+        return method(self, *args, **kwargs)
+    return wrapper
+
+
+class _LazyObjects(dict):
+    """
+    Dictionary of stored objects whose values may still be the raw
+    dictionaries read from the JSON file.
+    
+    A raw entry is turned into a model instance the first time it is
+    looked up or iterated over through values()/items(); membership
+    tests, len() and key iteration never build instances.
+    
+    With a sharded layout, loader is called with the keys that are
+    looked up but missing, to read their shard if it was not yet.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        """
+        Initialize the mapping.
+        """
+        super().__init__(*args, **kwargs)
+        self.classes = {}
+        self.lock = threading.Lock()
+        self.loader = None
+    
+    def _hydrate(self, key, value):
+        """
+        Build and store the instance for a raw entry.
+        
+        Args:
+            key (str): Key of the entry
+            value: Stored value, raw dictionary or instance
+        
+        Returns:
+            The model instance
+        """
+        if type(value) is dict:
+            # Two threads must not build two instances for one entry
+            with self.lock:
+                value = dict.get(self, key, value)
+                if type(value) is dict:
+                    value = self.classes[value['__class__']](**value)
+                    if key in self:
+                        dict.__setitem__(self, key, value)
+        return value
+    
+    def _hydrate_all(self):
+        """
+        Build the instances of every raw entry.
+        """
+        for key, value in dict.items(self):
+            if type(value) is dict:
+                self._hydrate(key, value)
+    
+    def __contains__(self, key):
+        """
+        Tell whether key is stored, loading its shard if it has not
+        been read yet.
+        """
+        if dict.__contains__(self, key):
+            return True
+        if self.loader is not None:
+            self.loader(key)
+            return dict.__contains__(self, key)
+        return False
+    
+    def __getitem__(self, key):
+        """
+        Return the instance stored under key.
+        """
+        if self.loader is not None and not dict.__contains__(self, key):
+            self.loader(key)
+        return self._hydrate(key, dict.__getitem__(self, key))
+    
+    def get(self, key, default=None):
+        """
+        Return the instance stored under key, or default.
+        """
+        if key in self:
+            return self[key]
+        return default
+    
+    def pop(self, key, *default):
+        """
+        Remove key and return its instance.
+        """
+        value = dict.pop(self, key, *default)
+        if type(value) is dict:
+            value = self.classes[value['__class__']](**value)
+        return value
+    
+    def setdefault(self, key, default=None):
+        """
+        Return the instance stored under key, storing default first
+        if the key is missing.
+        """
+        if key not in self:
+            self[key] = default
+        return self[key]
+    
+    def values(self):
+        """
+        Return a view of the instances, building all of them.
+        """
+        self._hydrate_all()
+        return dict.values(self)
+    
+    def items(self):
+        """
+        Return a view of the (key, instance) pairs, building all of them.
+        """
+        self._hydrate_all()
+        return dict.items(self)
+    
+    def copy(self):
+        """
+        Return a plain dictionary holding every instance.
+        """
+        self._hydrate_all()
+        return dict(dict.items(self))
 
 
 class FileStorage:
     """
-    FileStorage class that serializes instances to a JSON file and 
+    FileStorage class that serializes instances to a JSON file and
     deserializes JSON file to instances.
+    
+    When journal is enabled, save() appends one record per changed or
+    deleted object to "<__file_path>.log" instead of rewriting the whole
+    file, and the log is compacted back into the snapshot in the
+    background once it grows past journal_max_bytes or journal_max_ratio
+    times the size of the snapshot.
+    
+    Instances report attribute changes through mark_dirty(), and the
+    JSON encoding of every clean object is cached so that a save() only
+    re-serializes the objects mutated since the previous one.
+    
+    When lazy is enabled, reload() keeps the raw dictionaries read from
+    the file and the instances are only built when first accessed. It
+    is off by default: entries not accessed yet are raw dictionaries to
+    code reading all() as a plain dict, e.g. dict(storage.all()).
+    
+    The keys of every class are indexed, and add_index() declares extra
+    indexes on attributes of a class that find() and find_range() use
+    instead of scanning the objects.
+    
+    Files are always written to a temporary file that is then renamed
+    over the target, so a crash never leaves a truncated file.
+    durability chooses when the data is forced to disk: "fsync" on
+    every write, "group" at most every group_commit_ms milliseconds
+    from a background timer, or "os" to leave it to the OS buffers.
+    
+    Inside transaction() every save() is deferred to a single one when
+    the outermost transaction ends, and the changes made to the stored
+    objects are undone if it raises.
+    
+    JSON goes through codec (see models.engine.codec), which encodes
+    the timestamps of objects that do not override to_dict() itself.
+    
+    When shared is enabled, several processes can use the same file:
+    reload(), save() and compact() hold an advisory lock on
+    "<__file_path>.lock", and save() first merges the changes other
+    processes wrote since this one last read or wrote the files.
+    Objects changed or deleted here win over the versions on disk;
+    the other objects take their version from disk, and disappear if
+    another process deleted them.
+    
+    When threadsafe is enabled, the objects are guarded by a
+    readers-writer lock so that threads can share the storage: all()
+    returns a copy, a transaction keeps other threads from changing
+    objects until it ends, and save() hands the write over to a
+    background flusher thread. The flusher copies what it has to write
+    while holding the lock and serializes it after releasing it, and
+    saves requested while it works are coalesced into its next write.
+    save() still returns once the objects are written.
+    
+    asave(), aget() and aall() are the asyncio counterparts of save(),
+    get() and all(), for code running in an event loop.
+    
+    When shards is set, the objects are stored in a directory of shard
+    files, "<__file_path>.d", instead of a single file: one file per
+    class with shards = "class", or one per hash bucket of the key with
+    shards = <number of buckets>. save() only rewrites the shards
+    holding changed or deleted objects. In lazy mode (unless
+    threadsafe) reload() reads no shard at all and each one is read
+    the first time one of its objects or classes is looked up;
+    otherwise the shards are parsed in parallel in worker processes
+    once they total shard_pool_min_bytes. The sharded layout does not
+    support the journal or shared modes.
+    
+    With snapshot_format = "binary" the objects are stored in the
+    binary snapshot "<__file_path without extension>.hbnb" (see
+    models.engine.snapshot) instead of the JSON file. In lazy mode
+    (unless threadsafe or shared) reload() maps it and reads only its
+    index, each record is decoded the first time its object is looked
+    up, and save() copies the records never read as they are. The
+    binary snapshot does not support the journal or shards modes.
+    
+    The JSON file is compressed when __file_path ends with ".gz", ".xz"
+    (or ".lzma") or ".zst", or when compression is set to "gzip",
+    "lzma" or "zstd", which adds that extension to __file_path. It is
+    then written and read one record at a time (see
+    models.engine.jsonstream). The journal stays uncompressed, and
+    compression does not apply to the shards or the binary snapshot.
+    
+    When write_behind is enabled (it needs threadsafe), save() returns
+    at once and the background flusher writes the changes at most
+    write_behind_ms milliseconds later, or as soon as
+    write_behind_changes objects are pending. flush() writes what is
+    pending and is run at exit; flush_stats() reports the pending
+    saves and how long the writes take.
     """
     
     _FileStorage__file_path = "file.json"
     _FileStorage__objects = {}
+    _FileStorage__dirty = {}
+    _FileStorage__encoded = {}
+    _FileStorage__deleted = set()
+    _FileStorage__compactor = None
+    _FileStorage__by_class = {}
+    _FileStorage__indexes = {}
+    _FileStorage__sync_lock = threading.Lock()
+    _FileStorage__sync_paths = set()
+    _FileStorage__sync_timer = None
+    _FileStorage__undo = []
+    _FileStorage__save_requested = False
+    _FileStorage__lock_file = None
+    _FileStorage__lock_depth = 0
+    _FileStorage__generation = None
+    _FileStorage__lock_mutex = threading.RLock()
+    _FileStorage__rwlock = RWLock()
+    _FileStorage__flusher = None
+    _FileStorage__write_lock = threading.Lock()
+    _FileStorage__async_saves = weakref.WeakKeyDictionary()
+    _FileStorage__async_writes = 0
+    _FileStorage__async_done = threading.Condition()
+    _FileStorage__unloaded = set()
+    _FileStorage__snapshot = None
+    _FileStorage__reload_pending = False
+    _FileStorage__retired = None
+    _FileStorage__reload_lock = threading.Lock()
+    _FileStorage__behind_timer = None
+    _FileStorage__behind_saves = 0
+    _FileStorage__behind_since = None
+    _FileStorage__behind_registered = False
+    _FileStorage__flush_stats = {'flushes': 0, 'errors': 0, 'last_ms': None,
+                                 'max_ms': 0.0, 'total_ms': 0.0}
+    
+    journal = False
+    journal_max_bytes = 4 * 1024 * 1024
+    journal_max_ratio = 1.0
+    journal_min_bytes = 64 * 1024
+    lazy = False
+    compact_models = False
+    durability = "os"
+    group_commit_ms = 50
+    codec = get_codec()
+    shared = False
+    threadsafe = False
+    shards = None
+    shard_pool_min_bytes = 1024 * 1024
+    snapshot_format = "json"
+    compression = None
+    write_behind = False
+    write_behind_ms = 100
+    write_behind_changes = 1000
     
     def __init__(self):
         """
@@ -27,56 +383,1931 @@ class FileStorage:
         # Use setattr to avoid name mangling
         setattr(self, '__file_path', "file.json")
     
-    def all(self):
+    @_reloaded
+    def all(self, cls=None):
         """
         Return the dictionary __objects.
         
+        Args:
+            cls: Class or class name to restrict the result to
+        
+        Returns:
+            dict: Dictionary containing all stored objects (a copy in
+            threadsafe mode), or a new dictionary with the objects of
+            cls only
+        """
+        objects = FileStorage._FileStorage__objects
+        with self._reading():
+            if cls is None:
+                self._load_all()
+                return objects.copy() if self.threadsafe else objects
+            return {key: objects[key] for key in self._class_keys(cls)}
+    
+    @_reloaded
+    def stream(self, cls=None):
+        """
+        Yield the stored objects one at a time, building the instances
+        of a lazy store as they are reached instead of all at once.
+        
+        Args:
+            cls: Class or class name to restrict the result to
+        
+        Yields:
+            The objects, in the order of all()
+        """
+        objects = FileStorage._FileStorage__objects
+        if cls is None:
+            self._load_all()
+            keys = dict.keys(objects)
+        else:
+            class_name = cls if isinstance(cls, str) else cls.__name__
+            self._load_class(class_name)
+            keys = FileStorage._FileStorage__by_class.get(class_name, {})
+        if self.threadsafe:
+            with self._reading():
+                keys = list(keys)
+        for key in keys:
+            # Hydrating an entry replaces its value, not its key
+            obj = objects.get(key)
+            if obj is not None:
+                yield obj
+    
+    @_reloaded
+    def get(self, cls, id):
+        """
+        Return one object through its class and id.
+        
+        Args:
+            cls: Class or class name of the object
+            id (str): Id of the object
+        
         Returns:
-            dict: Dictionary containing all stored objects
+            The object, or None if it is not stored
         """
-        return FileStorage._FileStorage__objects
+        class_name = cls if isinstance(cls, str) else cls.__name__
+        with self._reading():
+            return FileStorage._FileStorage__objects.get(
+                "{}.{}".format(class_name, id))
     
+    @_reloaded
     def new(self, obj):
         """
         Set in __objects the obj with key <obj class name>.id.
         
+        The key is also marked dirty so that the next save() serializes
+        the object again.
+        
         Args:
             obj: Object to store
         """
         key = "{}.{}".format(obj.__class__.__name__, obj.id)
-        FileStorage._FileStorage__objects[key] = obj
+        with self._writing():
+            self._remember(key)
+            if FileStorage._FileStorage__snapshot is not None:
+                # The record of the mapped snapshot is replaced by obj
+                FileStorage._FileStorage__unloaded.discard(key)
+            FileStorage._FileStorage__objects[key] = obj
+            FileStorage._FileStorage__dirty.setdefault(key, set())
+            FileStorage._FileStorage__deleted.discard(key)
+            self._index_add(key, obj)
+    
+    def before_change(self, obj):
+        """
+        Record the state of a stored object about to be changed, so that
+        the running transaction can restore it.
+        
+        Called by BaseModel.__setattr__ before setting the attribute.
+        
+        Args:
+            obj: Object about to change
+        """
+        if not FileStorage._FileStorage__undo:
+            return
+        key = "{}.{}".format(obj.__class__.__name__, getattr(obj, 'id', None))
+        if dict.get(FileStorage._FileStorage__objects, key) is obj:
+            with self._writing():
+                self._remember(key)
+    
+    def mark_dirty(self, obj, attr_name):
+        """
+        Record that an attribute of a stored object has changed.
+        
+        Called by BaseModel.__setattr__; objects that are not (yet) in
+        __objects are ignored.
+        
+        Args:
+            obj: Object whose attribute was set
+            attr_name (str): Name of the attribute
+        """
+        key = "{}.{}".format(obj.__class__.__name__, getattr(obj, 'id', None))
+        if dict.get(FileStorage._FileStorage__objects, key) is not obj:
+            return
+        with self._writing():
+            FileStorage._FileStorage__dirty.setdefault(key, set()).add(attr_name)
+            index = FileStorage._FileStorage__indexes.get(
+                obj.__class__.__name__, {}).get(attr_name)
+            if index is not None:
+                index.add(key, getattr(obj, attr_name, None))
+    
+    @_reloaded
+    def counts(self):
+        """
+        Return the number of objects of each class.
+        
+        In the lazy sharded layout, the objects of the shards not read
+        yet are not counted.
+        
+        Returns:
+            dict: Numbers of objects keyed by class name
+        """
+        with self._reading():
+            return {class_name: len(keys) for class_name, keys
+                    in FileStorage._FileStorage__by_class.items() if keys}
+    
+    @_reloaded
+    def dirty(self):
+        """
+        Return the objects changed since the last save.
+        
+        Returns:
+            dict: Changed attribute names keyed by <class name>.id, an
+            empty set means the whole object must be written
+        """
+        return {key: frozenset(attrs) for key, attrs
+                in FileStorage._FileStorage__dirty.items()}
+    
+    @_reloaded
+    def delete(self, obj=None):
+        """
+        Delete obj from __objects if it is inside.
+        
+        Args:
+            obj: Object to delete, nothing is done if None
+        """
+        if obj is None:
+            return
+        key = "{}.{}".format(obj.__class__.__name__, obj.id)
+        with self._writing():
+            self._remember(key)
+            # A record of the mapped snapshot never read is dropped
+            # without being decoded
+            unread = FileStorage._FileStorage__snapshot is not None and \
+                key in FileStorage._FileStorage__unloaded
+            if unread:
+                FileStorage._FileStorage__unloaded.discard(key)
+            if FileStorage._FileStorage__objects.pop(key, None) is not None \
+                    or unread:
+                FileStorage._FileStorage__dirty.pop(key, None)
+                FileStorage._FileStorage__encoded.pop(key, None)
+                FileStorage._FileStorage__deleted.add(key)
+                self._index_remove(key)
     
+    @_reloaded
     def save(self):
         """
         Serialize __objects to the JSON file (path: __file_path).
+        
+        In journal mode only the objects changed or deleted since the
+        previous save are appended to the journal. Otherwise the whole
+        file is written, reusing the cached encoding of clean objects.
+        Within a transaction the save only happens when it ends. In
+        write-behind mode the save is only scheduled, see flush().
+        """
+        rwlock = FileStorage._FileStorage__rwlock
+        if FileStorage._FileStorage__undo and \
+                (not self.threadsafe or rwlock.writing()):
+            FileStorage._FileStorage__save_requested = True
+            return
+        if self.write_behind:
+            self._schedule_flush()
+        elif self.threadsafe and not rwlock.held():
+            self._get_flusher().request()
+        else:
+            self._flush()
+    
+    def flush(self):
         """
-        objects_dict = {}
-        for key, obj in FileStorage._FileStorage__objects.items():
-            objects_dict[key] = obj.to_dict()
+        Write what write-behind saves left pending, and wait for it.
         
-        with open(FileStorage._FileStorage__file_path, 'w', encoding='utf-8') as f:
-            json.dump(objects_dict, f)
+        Called at exit and by the console when it quits; does nothing
+        when no save is pending.
+        """
+        with FileStorage._FileStorage__sync_lock:
+            timer = FileStorage._FileStorage__behind_timer
+            FileStorage._FileStorage__behind_timer = None
+            pending = FileStorage._FileStorage__behind_saves
+        if timer is not None:
+            timer.cancel()
+        if not pending:
+            # A write handed to the flusher may still be running
+            flusher = FileStorage._FileStorage__flusher
+            if flusher is not None:
+                flusher.wait()
+            return
+        if FileStorage._FileStorage__rwlock.held():
+            # The flusher would wait for the lock this thread holds
+            self._flush()
+        else:
+            self._get_flusher().request()
     
-    def reload(self):
+    def flush_stats(self):
         """
-        Deserialize the JSON file to __objects (only if the JSON file 
-        (__file_path) exists; otherwise, do nothing. If the file doesn't 
-        exist, no exception should be raised).
+        Return the write-behind metrics.
+        
+        Returns:
+            dict: pending_saves (saves not written yet), pending_objects
+            (objects changed or deleted since the last write),
+            oldest_pending_ms (age of the oldest pending save), and the
+            flushes, errors, last_ms, max_ms and total_ms of the writes
+        """
+        with FileStorage._FileStorage__sync_lock:
+            stats = dict(FileStorage._FileStorage__flush_stats)
+            stats['pending_saves'] = FileStorage._FileStorage__behind_saves
+            since = FileStorage._FileStorage__behind_since
+        stats['pending_objects'] = len(FileStorage._FileStorage__dirty) + \
+            len(FileStorage._FileStorage__deleted)
+        stats['oldest_pending_ms'] = None if since is None else \
+            (time.perf_counter() - since) * 1000
+        return stats
+    
+    def _schedule_flush(self):
+        """
+        Note a write-behind save and arrange for it to be written: at
+        once once write_behind_changes objects are pending, otherwise
+        write_behind_ms after the oldest pending save.
+        
+        Raises:
+            ValueError: If threadsafe is off
+        """
+        if not self.threadsafe:
+            raise ValueError("write-behind needs the threadsafe mode")
+        pending = len(FileStorage._FileStorage__dirty) + \
+            len(FileStorage._FileStorage__deleted)
+        with FileStorage._FileStorage__sync_lock:
+            if not FileStorage._FileStorage__behind_registered:
+                atexit.register(self.flush)
+                FileStorage._FileStorage__behind_registered = True
+            FileStorage._FileStorage__behind_saves += 1
+            if FileStorage._FileStorage__behind_since is None:
+                FileStorage._FileStorage__behind_since = time.perf_counter()
+            timer = FileStorage._FileStorage__behind_timer
+            if pending < self.write_behind_changes:
+                if timer is None:
+                    timer = threading.Timer(self.write_behind_ms / 1000,
+                                            self._flush_due)
+                    timer.daemon = True
+                    FileStorage._FileStorage__behind_timer = timer
+                    timer.start()
+                return
+            FileStorage._FileStorage__behind_timer = None
+        if timer is not None:
+            timer.cancel()
+        self._get_flusher().request(wait=False)
+    
+    def _flush_due(self):
+        """
+        Hand the pending write-behind saves to the flusher; run by the
+        write_behind_ms timer.
+        """
+        with FileStorage._FileStorage__sync_lock:
+            FileStorage._FileStorage__behind_timer = None
+        self._get_flusher().request(wait=False)
+    
+    def _flush(self):
+        """
+        Write the changes, merging those of other processes first when
+        shared is enabled, and time the write.
+        """
+        with FileStorage._FileStorage__sync_lock:
+            FileStorage._FileStorage__behind_saves = 0
+            FileStorage._FileStorage__behind_since = None
+        # A newer write must not be overtaken by an older asave() one
+        self._wait_async_writes()
+        start = time.perf_counter()
+        failed = True
+        try:
+            if not self.shared:
+                self._write_changes()
+            else:
+                with self._file_lock():
+                    with self._writing():
+                        self._merge_changes()
+                    self._write_changes()
+                    FileStorage._FileStorage__generation = self._generation()
+            failed = False
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            with FileStorage._FileStorage__sync_lock:
+                stats = FileStorage._FileStorage__flush_stats
+                stats['flushes'] += 1
+                stats['errors'] += failed
+                stats['last_ms'] = elapsed
+                stats['max_ms'] = max(stats['max_ms'], elapsed)
+                stats['total_ms'] += elapsed
+    
+    def _write_changes(self):
+        """
+        Write the objects to the journal or to the JSON file.
+        
+        In threadsafe mode what has to be written is collected under
+        the lock, and the file is written after releasing it.
+        """
+        with self._writing():
+            write = self._prepare_write(detached=self.threadsafe)
+        write()
+    
+    def _prepare_write(self, detached=False):
+        """
+        Collect what save() has to write and return the function that
+        writes it.
+        
+        Only the objects changed since the previous save are encoded
+        here. When detached, the objects and their cached encodings are
+        copied so that the returned function can run while other code
+        keeps changing them.
+        
+        Args:
+            detached (bool): The write runs apart from the caller
+        
+        Returns:
+            function: Callable without arguments writing the file
+        """
+        if self.shards:
+            return self._prepare_shards(detached)
+        if self.snapshot_format == "binary":
+            return self._prepare_binary(detached)
+        if self.journal:
+            lines = self._journal_lines()
+            return lambda: self._append_journal(lines)
+        self._encode_dirty()
+        cached = FileStorage._FileStorage__encoded
+        items = dict.items(FileStorage._FileStorage__objects)
+        if detached:
+            cached = dict(cached)
+            items = list(items)
+        FileStorage._FileStorage__deleted.clear()
+        return lambda: self._write_snapshot(items, cached, detached)
+    
+    def _write_snapshot(self, items, cached, detached):
+        """
+        Write every object to the JSON file.
+        
+        Args:
+            items: (key, object) pairs to write
+            cached (dict): JSON encodings of clean objects by key
+            detached (bool): The objects may have changed since items
+                was taken
+        """
+        encoded = {}
+        with FileStorage._FileStorage__write_lock:
+            self._wait_compaction()
+            # Each object is encoded as it is written, so the text of
+            # the whole file is never held in memory
+            self._write_file(self._snapshot_path(), object_chunks(
+                self._encode_items(items, cached, encoded)))
+            # The snapshot now holds everything, drop any leftover
+            # journal
+            for path in self._journal_paths():
+                if os.path.exists(path):
+                    os.remove(path)
+            self._retire_layouts(self._snapshot_path())
+        if detached:
+            self._cache_encodings(items, encoded)
+        else:
+            FileStorage._FileStorage__encoded = encoded
+    
+    def _encode_items(self, items, cached, encoded):
+        """
+        Encode objects as the "key: record" parts of a JSON object, one
+        at a time.
+        
+        Args:
+            items: (key, object) pairs
+            cached (dict): JSON encodings of clean objects by key
+            encoded (dict): Filled with the encodings by key
+        
+        Yields:
+            str: One part per object
+        """
+        for key, obj in items:
+            record = cached.get(key)
+            if record is None:
+                # Objects loaded by reload() have no cached encoding yet
+                record = self._encode(obj)
+            encoded[key] = record
+            yield "{}: {}".format(self.codec.dumps(key), record)
+    
+    def _cache_encodings(self, items, encoded):
+        """
+        Cache the encodings made from a copy of the objects.
+        
+        Only what is still missing is cached, for the objects that were
+        neither replaced nor changed since the copy was taken.
+        
+        Args:
+            items: (key, object) pairs that were encoded
+            encoded (dict): Their encodings by key
+        """
+        with self._writing():
+            objects = FileStorage._FileStorage__objects
+            dirty = FileStorage._FileStorage__dirty
+            live = FileStorage._FileStorage__encoded
+            for key, obj in items:
+                if key not in live and key not in dirty and \
+                        dict.get(objects, key) is obj:
+                    live[key] = encoded[key]
+    
+    def _shard_dir(self):
+        """
+        Return the directory of the shard files.
+        """
+        return FileStorage._FileStorage__file_path + ".d"
+    
+    def _shard_of(self, key):
+        """
+        Return the name of the shard holding a key.
+        
+        Args:
+            key (str): Storage key <class name>.id
+        
+        Returns:
+            str: Name of the shard file, without directory
+        """
+        if self.shards == "class":
+            return key.partition('.')[0] + ".json"
+        if isinstance(self.shards, int) and self.shards > 0:
+            bucket = zlib.crc32(key.encode('utf-8')) % self.shards
+            return "bucket-{:03d}.json".format(bucket)
+        raise ValueError("unknown shards {!r}".format(self.shards))
+    
+    def _check_layout(self):
+        """
+        Reject the modes the sharded layout and the binary snapshot do
+        not support.
+        
+        Raises:
+            ValueError: If snapshot_format or compression is unknown,
+                if shards is combined with journal or shared, or if the
+                binary snapshot or compression is combined with other
+                layouts
+        """
+        if self.snapshot_format not in ("json", "binary"):
+            raise ValueError("unknown snapshot_format {!r}".format(
+                self.snapshot_format))
+        if self.compression:
+            extension_of(self.compression)
+            if self.shards or self.snapshot_format == "binary":
+                raise ValueError("compression only applies to the JSON "
+                                 "file")
+        if self.shards and (self.journal or self.shared):
+            raise ValueError("sharded storage does not support the "
+                             "journal or shared modes")
+        if self.snapshot_format == "binary" and (self.journal or self.shards):
+            raise ValueError("the binary snapshot does not support the "
+                             "journal or shards modes")
+    
+    def _prepare_shards(self, detached):
+        """
+        Collect the shards holding changed or deleted objects and
+        return the function that rewrites them.
+        
+        Args:
+            detached (bool): The write runs apart from the caller
+        
+        Returns:
+            function: Callable without arguments writing the shards
+        """
+        self._check_layout()
+        objects = FileStorage._FileStorage__objects
+        if os.path.isdir(self._shard_dir()):
+            touched = {self._shard_of(key) for key in
+                       FileStorage._FileStorage__dirty}
+            touched.update(self._shard_of(key) for key in
+                           FileStorage._FileStorage__deleted)
+        else:
+            # First save in this layout, write every shard
+            touched = {self._shard_of(key) for key in dict.keys(objects)}
+        # A shard is rewritten whole, so it must have been read first
+        self._load_shards(touched & FileStorage._FileStorage__unloaded)
+        self._encode_dirty()
+        
+        shard_items = {name: [] for name in touched}
+        if self.shards == "class":
+            by_class = FileStorage._FileStorage__by_class
+            for name in touched:
+                shard_items[name] = [
+                    (key, dict.__getitem__(objects, key))
+                    for key in by_class.get(name[:-len(".json")], ())
+                    if dict.__contains__(objects, key)]
+        else:
+            for key, obj in dict.items(objects):
+                name = self._shard_of(key)
+                if name in shard_items:
+                    shard_items[name].append((key, obj))
+        cached = FileStorage._FileStorage__encoded
+        if detached:
+            cached = dict(cached)
+        FileStorage._FileStorage__deleted.clear()
+        return lambda: self._write_shards(shard_items, cached)
+    
+    def _write_shards(self, shard_items, cached):
+        """
+        Rewrite shard files, removing the ones left empty.
+        
+        Args:
+            shard_items (dict): (key, object) pairs by shard name
+            cached (dict): JSON encodings of clean objects by key
+        """
+        directory = self._shard_dir()
+        os.makedirs(directory, exist_ok=True)
+        for name, items in shard_items.items():
+            encoded = {}
+            path = os.path.join(directory, name)
+            with FileStorage._FileStorage__write_lock:
+                if items:
+                    self._write_file(path, object_chunks(
+                        self._encode_items(items, cached, encoded)))
+                elif os.path.exists(path):
+                    os.remove(path)
+            self._cache_encodings(items, encoded)
+        with FileStorage._FileStorage__write_lock:
+            self._retire_layouts(directory)
+    
+    def _reload_shards(self):
+        """
+        Read the shard directory into __objects, or only note which
+        shards exist when they are to be read on first access.
+        
+        Without a shard directory the files of the other layouts are
+        read, so that switching to the sharded layout keeps the stored
+        objects.
+        """
+        directory = self._shard_dir()
+        if not os.path.isdir(directory):
+            self._install(self._iter_layout(self._other_layout(directory)))
+            return
+        names = {name for name in os.listdir(directory)
+                 if name.endswith(".json")}
+        self._install(())
+        objects = FileStorage._FileStorage__objects
+        FileStorage._FileStorage__unloaded = set(names)
+        if self.lazy and not self.threadsafe:
+            objects.loader = self._load_key_shard
+        else:
+            self._load_shards(names, faulting=False)
+    
+    def _load_key_shard(self, key):
+        """
+        Read the shard of a key if it was not read yet.
+        
+        Args:
+            key (str): Storage key <class name>.id
+        """
+        try:
+            name = self._shard_of(key)
+        except ValueError:
+            return
+        if name in FileStorage._FileStorage__unloaded:
+            self._load_shards([name])
+    
+    def _load_class(self, class_name):
+        """
+        Read the shards, or the binary snapshot records, that may hold
+        objects of a class.
+        
+        Args:
+            class_name (str): Name of the class
+        """
+        unloaded = FileStorage._FileStorage__unloaded
+        if not unloaded:
+            return
+        if FileStorage._FileStorage__snapshot is not None:
+            prefix = class_name + "."
+            self._load_records([key for key in unloaded
+                                if key.startswith(prefix)])
+        elif self.shards == "class":
+            self._load_shards({class_name + ".json"} &
+                              FileStorage._FileStorage__unloaded)
+        else:
+            self._load_all()
+    
+    def _load_all(self):
+        """
+        Read every shard, or binary snapshot record, not read yet.
+        """
+        unloaded = FileStorage._FileStorage__unloaded
+        if not unloaded:
+            return
+        if FileStorage._FileStorage__snapshot is not None:
+            self._load_records(list(unloaded))
+        else:
+            self._load_shards(set(unloaded))
+    
+    def _load_shards(self, names, faulting=True):
+        """
+        Read shards into __objects, in worker processes when they are
+        big enough for it to pay off.
+        
+        An unreadable shard is moved aside to "<shard>.corrupt".
+        
+        Args:
+            names: Names of the shard files
+            faulting (bool): The shards are read on first access rather
+                than by reload(), see _install()
         """
-        if os.path.exists(FileStorage._FileStorage__file_path):
+        names = sorted(names)
+        if not names:
+            return
+        FileStorage._FileStorage__unloaded.difference_update(names)
+        directory = self._shard_dir()
+        paths = [os.path.join(directory, name) for name in names]
+        texts = []
+        for path in paths:
             try:
-                with open(FileStorage._FileStorage__file_path, 'r', encoding='utf-8') as f:
-                    objects_dict = json.load(f)
-                
-                for key, obj_dict in objects_dict.items():
-                    class_name = obj_dict['__class__']
-                    # Import the class dynamically
-                    if class_name == 'BaseModel':
-                        from models.base_model import BaseModel
-                        FileStorage._FileStorage__objects[key] = BaseModel(**obj_dict)
-                    elif class_name == 'User':
-                        from models.user import User
-                        FileStorage._FileStorage__objects[key] = User(**obj_dict)
-            except (json.JSONDecodeError, KeyError, ImportError):
-                # If there's an error loading the file, start with empty objects
-                FileStorage._FileStorage__objects = {}
+                with open(path, 'r', encoding='utf-8') as f:
+                    texts.append(f.read())
+            except OSError:
+                texts.append("{}")
+        
+        results = []
+        if len(texts) > 1 and \
+                sum(map(len, texts)) >= self.shard_pool_min_bytes:
+            # The workers get the decoding function of the JSON library
+            # itself: unpickling anything from the models package would
+            # deadlock a worker forked while models is being imported
+            from concurrent.futures import ProcessPoolExecutor
+            workers = min(len(texts), os.cpu_count() or 1)
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(self.codec.loads, text)
+                           for text in texts]
+                for future in futures:
+                    try:
+                        results.append(future.result())
+                    except ValueError as error:
+                        results.append(error)
+        else:
+            for text in texts:
+                try:
+                    results.append(self.codec.loads(text))
+                except ValueError as error:
+                    results.append(error)
+        for path, result in zip(paths, results):
+            if not isinstance(result, Exception):
+                self._install(result.items(), faulting)
+            elif os.path.exists(path):
+                os.replace(path, path + ".corrupt")
+                warnings.warn("could not load {} ({}), moved it to {}".format(
+                    path, result, path + ".corrupt"), RuntimeWarning)
+    
+    def _snapshot_path(self):
+        """
+        Return the path of the snapshot file: __file_path, with the
+        extension of compression added if it is set, or the same name
+        with the ".hbnb" extension for the binary snapshot.
+        """
+        file_path = FileStorage._FileStorage__file_path
+        if self.snapshot_format == "binary":
+            return os.path.splitext(file_path)[0] + ".hbnb"
+        if self.compression:
+            extension = extension_of(self.compression)
+            if not file_path.endswith(extension):
+                return file_path + extension
+        return file_path
+    
+    def _layout_paths(self):
+        """
+        Return the files and the directory every layout stores its
+        objects in: the JSON file, compressed or not, the binary
+        snapshot and the shard directory.
+        
+        Returns:
+            list: Paths, the plain JSON file first
+        """
+        file_path = FileStorage._FileStorage__file_path
+        paths = [file_path]
+        paths.extend(file_path + extension for extension in EXTENSIONS
+                     if not file_path.endswith(extension))
+        paths.append(os.path.splitext(file_path)[0] + ".hbnb")
+        paths.append(self._shard_dir())
+        return paths
+    
+    def _other_layout(self, target):
+        """
+        Return where another layout than the current one stores the
+        objects, the most recently written one if several do.
+        
+        Args:
+            target (str): Snapshot file or shard directory of the
+                current layout
+        
+        Returns:
+            str: Path of the file or directory, or None if there is none
+        """
+        found = []
+        for path in self._layout_paths():
+            if path != target and os.path.exists(path):
+                found.append((os.path.getmtime(path), path))
+        if not found:
+            return None
+        return max(found)[1]
+    
+    def _iter_layout(self, path):
+        """
+        Read the objects of a snapshot file or shard directory one at a
+        time. The journal is applied to the records of a JSON file.
+        
+        Args:
+            path (str): Path of the file or directory, None to read the
+                journal alone
+        
+        Yields:
+            tuple: (<class name>.id, serialized object)
+        """
+        if path is not None and os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.endswith(".json"):
+                    yield from self._iter_snapshot(os.path.join(path, name))
+            return
+        if path is not None and path == self._layout_paths()[-2]:
+            yield from self._iter_snapshot(path)
+            return
+        changes = {}
+        for log_path in self._journals_to_replay():
+            changes.update(self._journal_changes(log_path))
+        yield from self._replay_stream(
+            path or FileStorage._FileStorage__file_path, changes)
+    
+    def _retire_layouts(self, target):
+        """
+        Move aside to "<path>.migrated" the files of the other layouts
+        once the current one has been written, so that switching back
+        to them later cannot load stale objects.
+        
+        Args:
+            target (str): Snapshot file or shard directory just written
+        """
+        if FileStorage._FileStorage__retired == target:
+            return
+        paths = self._layout_paths()
+        if target in paths[-2:]:
+            # The journal only goes with the JSON file
+            paths.extend(self._journal_paths())
+        for path in paths:
+            if path == target or not os.path.exists(path):
+                continue
+            aside = path + ".migrated"
+            if os.path.isdir(aside):
+                shutil.rmtree(aside)
+            os.replace(path, aside)
+        FileStorage._FileStorage__retired = target
+    
+    def _prepare_binary(self, detached):
+        """
+        Collect what the binary snapshot has to hold and return the
+        function that writes it.
+        
+        Args:
+            detached (bool): The write runs apart from the caller
+        
+        Returns:
+            function: Callable without arguments writing the snapshot
+        """
+        self._check_layout()
+        self._encode_dirty()
+        cached = FileStorage._FileStorage__encoded
+        items = dict.items(FileStorage._FileStorage__objects)
+        if detached:
+            cached = dict(cached)
+            items = list(items)
+        # Records never read are copied from the mapped snapshot as
+        # they are
+        snapshot = FileStorage._FileStorage__snapshot
+        unloaded = list(FileStorage._FileStorage__unloaded)
+        FileStorage._FileStorage__deleted.clear()
+        return lambda: self._write_binary(items, cached, detached,
+                                          snapshot, unloaded)
+    
+    def _write_binary(self, items, cached, detached, snapshot, unloaded):
+        """
+        Write every object to the binary snapshot.
+        
+        Args:
+            items: (key, object) pairs to write
+            cached (dict): JSON encodings of clean objects by key
+            detached (bool): The objects may have changed since items
+                was taken
+            snapshot (Snapshot): Mapped snapshot holding the records
+                not read yet, or None
+            unloaded (list): Keys of those records
+        """
+        encoded = {}
+        records = []
+        for key, obj in items:
+            record = cached.get(key)
+            if record is None:
+                record = self._encode(obj)
+            encoded[key] = record
+            records.append((key, record.encode('utf-8')))
+        if snapshot is not None:
+            records.extend((key, snapshot.raw(key)) for key in unloaded)
+        if detached:
+            self._cache_encodings(items, encoded)
+        else:
+            FileStorage._FileStorage__encoded = encoded
+        
+        from models.engine.snapshot import dump
+        with FileStorage._FileStorage__write_lock:
+            # The mapping of the previous file stays readable after the
+            # new one is renamed over it
+            self._write_file(self._snapshot_path(), dump(records))
+            self._retire_layouts(self._snapshot_path())
+    
+    def _reload_binary(self):
+        """
+        Map the binary snapshot, reading its records on first access
+        in lazy mode, or all of them otherwise.
+        
+        Without a binary snapshot the files of the other layouts are
+        read, so that switching formats keeps the stored objects.
+        """
+        from models.engine.snapshot import Snapshot
+        path = self._snapshot_path()
+        if not os.path.exists(path):
+            self._install(self._iter_layout(self._other_layout(path)))
+            return
+        snapshot = Snapshot(path)
+        if not self.lazy or self.threadsafe or self.shared:
+            # Records must be decoded up front when other threads or
+            # processes may change what they stand for
+            with snapshot:
+                self._install(snapshot.iter_records(self.codec))
+            return
+        self._install(())
+        FileStorage._FileStorage__snapshot = snapshot
+        FileStorage._FileStorage__unloaded = set(snapshot.keys())
+        FileStorage._FileStorage__objects.loader = self._load_key_record
+    
+    def _load_key_record(self, key):
+        """
+        Read the binary snapshot record of a key if it was not read
+        yet.
+        
+        Args:
+            key (str): Storage key <class name>.id
+        """
+        if key in FileStorage._FileStorage__unloaded:
+            self._load_records([key])
+    
+    def _load_records(self, keys):
+        """
+        Decode records of the mapped binary snapshot into __objects.
+        
+        Args:
+            keys (list): Keys of records not read yet
+        """
+        if not keys:
+            return
+        snapshot = FileStorage._FileStorage__snapshot
+        FileStorage._FileStorage__unloaded.difference_update(keys)
+        self._install(((key, snapshot.record(key, self.codec))
+                       for key in keys), faulting=True)
+    
+    @_reloaded
+    async def asave(self):
+        """
+        Save without blocking the event loop.
+        
+        Only the changed objects are encoded on the loop; building the
+        file and writing it run in the default executor. Calls made
+        while a write is running are coalesced into the next one, and
+        each returns once a write covering its changes has finished.
+        
+        In threadsafe mode the whole save() runs in the executor. In
+        shared mode without threadsafe, save() runs on the loop since
+        merging the changes of other processes must not race with it.
+        """
+        import asyncio
+        loop = asyncio.get_running_loop()
+        state = FileStorage._FileStorage__async_saves.get(loop)
+        if state is None:
+            state = {'lock': asyncio.Lock(), 'next': None}
+            FileStorage._FileStorage__async_saves[loop] = state
+        if state['next'] is None:
+            state['next'] = loop.create_task(self._asave_next(state))
+        await asyncio.shield(state['next'])
+    
+    async def _asave_next(self, state):
+        """
+        Run one coalesced asave() once the previous one has finished.
+        
+        Args:
+            state (dict): asave() state of the running event loop
+        """
+        import asyncio
+        async with state['lock']:
+            # Calls made from now on need a write of their own
+            state['next'] = None
+            loop = asyncio.get_running_loop()
+            if FileStorage._FileStorage__undo or \
+                    (self.shared and not self.threadsafe):
+                self.save()
+            elif self.threadsafe:
+                await loop.run_in_executor(None, self.save)
+            else:
+                done = FileStorage._FileStorage__async_done
+                with done:
+                    FileStorage._FileStorage__async_writes += 1
+                try:
+                    write = self._prepare_write(detached=True)
+                except BaseException:
+                    self._async_write_done()
+                    raise
+                
+                def write_and_signal():
+                    # Signalled from the executor: a save() waiting on
+                    # the loop thread blocks the loop until then
+                    try:
+                        write()
+                    finally:
+                        self._async_write_done()
+                
+                await loop.run_in_executor(None, write_and_signal)
+    
+    def _async_write_done(self):
+        """
+        Record that a write prepared by asave() has finished.
+        """
+        done = FileStorage._FileStorage__async_done
+        with done:
+            FileStorage._FileStorage__async_writes -= 1
+            done.notify_all()
+    
+    def _wait_async_writes(self):
+        """
+        Block until the writes prepared by asave() have finished.
+        """
+        done = FileStorage._FileStorage__async_done
+        with done:
+            done.wait_for(lambda: not FileStorage._FileStorage__async_writes)
+    
+    async def aget(self, cls, id):
+        """
+        Return one object through its class and id.
+        
+        Objects are held in memory, so this only wraps get() for code
+        that awaits every storage call.
+        
+        Args:
+            cls: Class or class name of the object
+            id (str): Id of the object
+        
+        Returns:
+            The object, or None if it is not stored
+        """
+        return self.get(cls, id)
+    
+    @_reloaded
+    async def aall(self, cls=None, batch=1000):
+        """
+        Iterate asynchronously over the stored objects.
+        
+        The keys are copied when the iteration starts, so objects
+        created or deleted meanwhile by other tasks do not break it,
+        and control goes back to the loop every batch objects.
+        
+        Args:
+            cls: Class or class name to restrict the result to
+            batch (int): Objects yielded between two loop turns
+        
+        Yields:
+            The objects, in the order of all()
+        """
+        import asyncio
+        objects = FileStorage._FileStorage__objects
+        with self._reading():
+            if cls is None:
+                self._load_all()
+                keys = list(dict.keys(objects))
+            else:
+                keys = self._class_keys(cls)
+        for number, key in enumerate(keys, 1):
+            obj = objects.get(key)
+            if obj is not None:
+                yield obj
+            if number % batch == 0:
+                await asyncio.sleep(0)
+    
+    def reload(self):
+        """
+        Deserialize the JSON file to __objects (only if the JSON file
+        (__file_path) exists; otherwise, do nothing. If the file doesn't
+        exist, no exception should be raised).
+        
+        The JSON file is parsed incrementally and each instance is
+        built as soon as its record is read, so the whole text and the
+        whole tree of dictionaries are never held in memory at once.
+        Journal records left by a journaled save() are read first and
+        applied to the snapshot records as they stream by. In lazy mode
+        the entries are stored as raw dictionaries and only turned into
+        instances when accessed.
+        With a sharded layout the shard directory is read instead, and
+        with snapshot_format "binary" the binary snapshot, see the class
+        documentation.
+        """
+        FileStorage._FileStorage__reload_pending = False
+        self._wait_compaction()
+        self._check_layout()
+        with self._file_lock(), self._writing():
+            objects = FileStorage._FileStorage__objects
+            if isinstance(objects, _LazyObjects):
+                objects.loader = None
+            FileStorage._FileStorage__unloaded = set()
+            snapshot = FileStorage._FileStorage__snapshot
+            if snapshot is not None:
+                FileStorage._FileStorage__snapshot = None
+                snapshot.close()
+            try:
+                if self.shards:
+                    self._reload_shards()
+                elif self.snapshot_format == "binary":
+                    self._reload_binary()
+                else:
+                    path = self._snapshot_path()
+                    if not os.path.exists(path):
+                        # The layout was just changed, e.g. compression
+                        # turned on, keep the objects of the previous one
+                        path = self._other_layout(path) or path
+                    self._install(self._iter_layout(path))
+            except (ValueError, KeyError, ImportError) as error:
+                # If there's an error loading the file, start with empty
+                # objects but keep the unreadable file aside so the next
+                # save() does not overwrite it
+                file_path = self._snapshot_path()
+                if os.path.exists(file_path):
+                    os.replace(file_path, file_path + ".corrupt")
+                    warnings.warn(
+                        "could not load {} ({}), moved it to {}".format(
+                            file_path, error, file_path + ".corrupt"),
+                        RuntimeWarning)
+                FileStorage._FileStorage__objects = {}
+                self.reindex()
+            if self.shared:
+                FileStorage._FileStorage__generation = self._generation()
+    
+    def defer_reload(self):
+        """
+        Have reload() run on the first use of the objects instead of
+        now, so that importing the models reads no file.
+        
+        Any call to the methods decorated with _reloaded (all(),
+        stream(), get(), new(), delete(), save(), transaction(), find(),
+        find_range(), add_index(), counts(), dirty(), asave() and
+        aall()) reloads first; reload() itself cancels the deferral.
+        """
+        FileStorage._FileStorage__reload_pending = True
+    
+    def _reload_pending(self):
+        """
+        Run the reload deferred by defer_reload(), once even when
+        several threads get there together.
+        """
+        with FileStorage._FileStorage__reload_lock:
+            if FileStorage._FileStorage__reload_pending:
+                self.reload()
+    
+    def _install(self, items, faulting=False):
+        """
+        Put serialized objects in __objects, as raw dictionaries in
+        lazy mode and as instances otherwise.
+        
+        Each instance is built as soon as its record is read, so when
+        items is a stream the records are not all held at once.
+        
+        Args:
+            items: (<class name>.id, serialized object) pairs
+            faulting (bool): The records are read on first access, so
+                the keys stored or deleted since reload() keep their
+                current state
+        """
+        classes = _model_classes(self.compact_models)
+        objects = FileStorage._FileStorage__objects
+        if self.lazy and not isinstance(objects, _LazyObjects):
+            objects = _LazyObjects(objects)
+            FileStorage._FileStorage__objects = objects
+        if isinstance(objects, _LazyObjects):
+            objects.classes = classes
+        deleted = FileStorage._FileStorage__deleted
+        for key, obj_dict in items:
+            if faulting and (dict.__contains__(objects, key) or
+                             key in deleted):
+                continue
+            FileStorage._FileStorage__dirty.pop(key, None)
+            FileStorage._FileStorage__encoded.pop(key, None)
+            cls = classes.get(obj_dict['__class__'])
+            if cls is None:
+                continue
+            if self.lazy:
+                dict.__setitem__(objects, key, obj_dict)
+            else:
+                dict.__setitem__(objects, key, cls(**obj_dict))
+            self._index_add(key, dict.__getitem__(objects, key))
+    
+    @_reloaded
+    @contextmanager
+    def transaction(self):
+        """
+        Group changes so that they are saved once, or not at all.
+        
+        Calls to save() made inside the block are deferred to a single
+        save() when the outermost transaction exits. If the block
+        raises, the objects created, changed or deleted in it are put
+        back as they were and nothing is saved. Transactions can be
+        nested; an inner one that raises only undoes its own changes.
+        
+        Changes made in place to mutable attribute values (e.g. a list
+        being appended to) are not undone.
+        
+        In threadsafe mode the transaction holds the write lock, so
+        other threads wait for it to end before changing objects.
+        
+        Yields:
+            FileStorage: This storage
+        """
+        undo = FileStorage._FileStorage__undo
+        save = False
+        with self._writing():
+            undo.append({})
+            try:
+                yield self
+            except BaseException:
+                self._rollback(undo.pop())
+                if not undo:
+                    FileStorage._FileStorage__save_requested = False
+                raise
+            changes = undo.pop()
+            if undo:
+                for key, previous in changes.items():
+                    undo[-1].setdefault(key, previous)
+            else:
+                save = FileStorage._FileStorage__save_requested
+                FileStorage._FileStorage__save_requested = False
+        if save:
+            self.save()
+    
+    @_reloaded
+    def add_index(self, cls, attr_name, ordered=False):
+        """
+        Declare an index on an attribute of a class.
+        
+        Args:
+            cls: Class or class name whose objects are indexed
+            attr_name (str): Name of the indexed attribute
+            ordered (bool): Keep the values sorted so that find_range()
+                can use the index
+        """
+        class_name = cls if isinstance(cls, str) else cls.__name__
+        index = SortedIndex() if ordered else HashIndex()
+        objects = FileStorage._FileStorage__objects
+        with self._writing():
+            FileStorage._FileStorage__indexes.setdefault(
+                class_name, {})[attr_name] = index
+            for key in self._class_keys(class_name):
+                index.add(key, self._attribute(
+                    dict.__getitem__(objects, key), attr_name))
+    
+    def reindex(self):
+        """
+        Rebuild the class and attribute indexes from __objects.
+        
+        Needed only when __objects has been modified directly instead
+        of through new() and delete().
+        """
+        with self._writing():
+            FileStorage._FileStorage__by_class = {}
+            indexes = FileStorage._FileStorage__indexes
+            for class_name in indexes:
+                for attr_name, index in indexes[class_name].items():
+                    indexes[class_name][attr_name] = index.__class__()
+            for key, obj in dict.items(FileStorage._FileStorage__objects):
+                self._index_add(key, obj)
+    
+    @_reloaded
+    def find(self, cls, **criteria):
+        """
+        Return the objects of a class whose attributes equal the given
+        values.
+        
+        An indexed attribute narrows the candidates down before the
+        remaining criteria are checked, otherwise every object of the
+        class is examined.
+        
+        Args:
+            cls: Class or class name of the objects
+            **criteria: Attribute names and the values they must equal
+        
+        Returns:
+            list: Matching objects
+        """
+        class_name = cls if isinstance(cls, str) else cls.__name__
+        with self._reading():
+            indexes = FileStorage._FileStorage__indexes.get(class_name, {})
+            keys = None
+            for attr_name, value in criteria.items():
+                if attr_name in indexes:
+                    keys = indexes[attr_name].lookup(value)
+                    if keys is not None:
+                        break
+            if keys is None:
+                keys = self._class_keys(class_name)
+            objects = FileStorage._FileStorage__objects
+            found = []
+            for key in keys:
+                value = dict.get(objects, key)
+                if value is None:
+                    continue
+                if all(self._attribute(value, name) == expected
+                       for name, expected in criteria.items()):
+                    found.append(objects[key])
+            return found
+    
+    @_reloaded
+    def find_range(self, cls, attr_name, low=None, high=None):
+        """
+        Return the objects of a class whose attribute lies between low
+        and high (both inclusive), ordered by that attribute.
+        
+        Args:
+            cls: Class or class name of the objects
+            attr_name (str): Name of the attribute
+            low: Lower bound, None for no bound
+            high: Upper bound, None for no bound
+        
+        Returns:
+            list: Matching objects
+        """
+        class_name = cls if isinstance(cls, str) else cls.__name__
+        with self._reading():
+            index = FileStorage._FileStorage__indexes.get(
+                class_name, {}).get(attr_name)
+            objects = FileStorage._FileStorage__objects
+            if isinstance(index, SortedIndex):
+                return [objects[key] for key in index.range(low, high)
+                        if key in objects]
+            matches = []
+            for key in self._class_keys(class_name):
+                value = self._attribute(dict.__getitem__(objects, key),
+                                        attr_name)
+                if value is None:
+                    continue
+                if (low is None or value >= low) and \
+                        (high is None or value <= high):
+                    matches.append((value, key))
+            matches.sort()
+            return [objects[key] for value, key in matches]
+    
+    def compact(self, wait=False):
+        """
+        Fold the journal into the snapshot file.
+        
+        The current journal is rotated out of the way so that saves can
+        keep appending to a fresh one, then a background thread replays
+        it over the snapshot and atomically replaces the snapshot.
+        
+        When shared is enabled the compaction holds the file lock and
+        always finishes before compact() returns.
+        
+        Args:
+            wait (bool): Block until the compaction has finished
+        """
+        self._wait_compaction()
+        with self._file_lock():
+            log_path, rotated_path = self._journal_paths()
+            if os.path.exists(rotated_path):
+                # A previous compaction was interrupted, finish it first
+                self._compact_files(rotated_path)
+            if os.path.exists(log_path):
+                os.replace(log_path, rotated_path)
+                compactor = threading.Thread(target=self._compact_files,
+                                             args=(rotated_path,))
+                FileStorage._FileStorage__compactor = compactor
+                compactor.start()
+            if wait or self.shared:
+                # Other processes must not see the files half compacted
+                self._wait_compaction()
+            if self.shared:
+                FileStorage._FileStorage__generation = self._generation()
+    
+    def _remember(self, key):
+        """
+        Keep what is stored under key for the running transaction, if
+        this is the first time it changes in it.
+        
+        Args:
+            key (str): Storage key <class name>.id
+        """
+        undo = FileStorage._FileStorage__undo
+        if not undo or key in undo[-1]:
+            return
+        value = dict.get(FileStorage._FileStorage__objects, key)
+        if value is None:
+            undo[-1][key] = None
+        elif type(value) is dict:
+            undo[-1][key] = (value, None)
+        else:
+            undo[-1][key] = (value, _get_state(value))
+    
+    def _rollback(self, changes):
+        """
+        Put back the objects kept by a transaction.
+        
+        Args:
+            changes (dict): Previous value and attributes of each key
+                changed in the transaction, None for new keys
+        """
+        objects = FileStorage._FileStorage__objects
+        for key, previous in changes.items():
+            if key in objects:
+                dict.__delitem__(objects, key)
+                self._index_remove(key)
+            FileStorage._FileStorage__encoded.pop(key, None)
+            if previous is None:
+                FileStorage._FileStorage__dirty.pop(key, None)
+                continue
+            value, state = previous
+            if state is not None:
+                _set_state(value, state)
+            dict.__setitem__(objects, key, value)
+            self._index_add(key, value)
+            FileStorage._FileStorage__dirty.setdefault(key, set())
+            FileStorage._FileStorage__deleted.discard(key)
+    
+    def _class_keys(self, cls):
+        """
+        Return the keys of the stored objects of a class.
+        
+        Args:
+            cls: Class or class name
+        
+        Returns:
+            list: Storage keys, in insertion order
+        """
+        class_name = cls if isinstance(cls, str) else cls.__name__
+        self._load_class(class_name)
+        objects = FileStorage._FileStorage__objects
+        return [key for key in
+                FileStorage._FileStorage__by_class.get(class_name, ())
+                if key in objects]
+    
+    @staticmethod
+    def _attribute(value, attr_name):
+        """
+        Return an attribute of a stored value without building it.
+        
+        Args:
+            value: Model instance or raw dictionary not yet hydrated
+            attr_name (str): Name of the attribute
+        
+        Returns:
+            The attribute value, the class default or None; timestamps
+            are datetimes, as on the instance
+        """
+        if type(value) is not dict:
+            return getattr(value, attr_name, None)
+        if attr_name in value:
+            if attr_name in ('created_at', 'updated_at') and \
+                    isinstance(value[attr_name], str):
+                return datetime.fromisoformat(value[attr_name])
+            return value[attr_name]
+        cls = get_model(value.get('__class__'))
+        return getattr(cls, attr_name, None)
+    
+    def _index_add(self, key, value):
+        """
+        Add a stored value to the class index and to the attribute
+        indexes of its class.
+        
+        Args:
+            key (str): Storage key <class name>.id
+            value: Model instance or raw dictionary not yet hydrated
+        """
+        class_name = key.partition('.')[0]
+        FileStorage._FileStorage__by_class.setdefault(class_name, {})[key] = None
+        for attr_name, index in FileStorage._FileStorage__indexes.get(
+                class_name, {}).items():
+            index.add(key, self._attribute(value, attr_name))
+    
+    def _index_remove(self, key):
+        """
+        Remove a key from the class index and the attribute indexes.
+        
+        Args:
+            key (str): Storage key <class name>.id
+        """
+        class_name = key.partition('.')[0]
+        FileStorage._FileStorage__by_class.get(class_name, {}).pop(key, None)
+        for index in FileStorage._FileStorage__indexes.get(
+                class_name, {}).values():
+            index.remove(key)
+    
+    def _journal_paths(self, file_path=None):
+        """
+        Return the paths of the live journal and of the journal being
+        compacted.
+        
+        Args:
+            file_path (str): JSON file the journals belong to, defaults
+                to the storage file
+        
+        Returns:
+            tuple: (journal path, rotated journal path)
+        """
+        if file_path is None:
+            file_path = FileStorage._FileStorage__file_path
+        log_path = file_path + ".log"
+        return log_path, log_path + ".compacting"
+    
+    def _journals_to_replay(self, file_path=None):
+        """
+        Return the journals in the order their records must be applied.
+        
+        The rotated journal, left by a compaction that has not finished,
+        holds records older than any in the live journal, so it comes
+        first and the live journal's values win.
+        
+        Args:
+            file_path (str): JSON file the journals belong to, defaults
+                to the storage file
+        
+        Returns:
+            tuple: (rotated journal path, journal path)
+        """
+        log_path, rotated_path = self._journal_paths(file_path)
+        return rotated_path, log_path
+    
+    def _encode_dirty(self):
+        """
+        Refresh the cached JSON encoding of every dirty object.
+        """
+        objects = FileStorage._FileStorage__objects
+        encoded = FileStorage._FileStorage__encoded
+        dirty = FileStorage._FileStorage__dirty
+        for key in dirty:
+            obj = dict.get(objects, key)
+            if obj is not None:
+                encoded[key] = self._encode(obj)
+        dirty.clear()
+    
+    def _encode(self, obj):
+        """
+        Return the JSON encoding of a stored value.
+        
+        Unless its class overrides to_dict(), an instance is encoded
+        straight from its attributes and the codec writes the
+        timestamps, instead of converting them with isoformat() first.
+        
+        Args:
+            obj: Model instance or raw dictionary not yet hydrated
+        
+        Returns:
+            str: JSON text of the serialized object
+        """
+        if type(obj) is dict:
+            return self.codec.dumps(obj)
+        from models.base_model import BaseModel
+        if obj.__class__.to_dict is not BaseModel.to_dict:
+            return self.codec.dumps(obj.to_dict())
+        record = dict(obj.__dict__)
+        record['__class__'] = obj.__class__.__name__
+        return self.codec.dumps(record)
+    
+    def _journal_lines(self):
+        """
+        Return the journal records of every dirty or deleted key.
+        
+        Returns:
+            list: JSON lines, without line endings
+        """
+        deleted = FileStorage._FileStorage__deleted
+        encoded = FileStorage._FileStorage__encoded
+        objects = FileStorage._FileStorage__objects
+        changed = [key for key in FileStorage._FileStorage__dirty
+                   if key in objects]
+        self._encode_dirty()
+        lines = []
+        for key in changed:
+            lines.append('{{"op": "set", "key": {}, "value": {}}}'.format(
+                self.codec.dumps(key), encoded[key]))
+        for key in deleted:
+            lines.append(self.codec.dumps({"op": "del", "key": key}))
+        deleted.clear()
+        return lines
+    
+    def _append_journal(self, lines):
+        """
+        Append records to the journal and compact it if it has grown
+        past the thresholds.
+        
+        Args:
+            lines (list): JSON lines given by _journal_lines()
+        """
+        if not lines:
+            return
+        
+        log_path = self._journal_paths()[0]
+        with FileStorage._FileStorage__write_lock:
+            with open(log_path, 'a', encoding='utf-8') as f:
+                start = f.tell()
+                f.write("\n".join(lines) + "\n")
+                log_size = f.tell()
+                if metrics.enabled:
+                    metrics.incr('storage.bytes_written', log_size - start)
+                self._sync_file(f, log_path)
+        
+        try:
+            snapshot_size = os.path.getsize(self._snapshot_path())
+        except OSError:
+            snapshot_size = 0
+        compactor = FileStorage._FileStorage__compactor
+        if compactor is not None and compactor.is_alive():
+            return
+        if log_size >= self.journal_max_bytes or (
+                log_size >= self.journal_min_bytes and
+                log_size > self.journal_max_ratio * snapshot_size):
+            self.compact()
+    
+    def _compact_files(self, rotated_path):
+        """
+        Replay a rotated journal over the snapshot, write the result
+        next to the snapshot and move it into place.
+        
+        Args:
+            rotated_path (str): Path of the journal to fold in
+        """
+        file_path = self._snapshot_path()
+        changes = dict(self._journal_changes(rotated_path))
+        dumps = self.codec.dumps
+        # The snapshot is read, updated and written a record at a time
+        parts = ("{}: {}".format(dumps(key), dumps(record)) for key, record
+                 in self._replay_stream(file_path, changes))
+        self._write_file(file_path, object_chunks(parts),
+                         tmp_path=file_path + ".compact.tmp")
+        os.remove(rotated_path)
+    
+    def sync(self):
+        """
+        Force to disk the writes still waiting for a group commit.
+        """
+        with FileStorage._FileStorage__sync_lock:
+            paths = FileStorage._FileStorage__sync_paths
+            FileStorage._FileStorage__sync_paths = set()
+            timer = FileStorage._FileStorage__sync_timer
+            FileStorage._FileStorage__sync_timer = None
+        if timer is not None:
+            timer.cancel()
+        for path in paths:
+            self._fsync_path(path)
+    
+    def _write_file(self, path, text, tmp_path=None):
+        """
+        Atomically replace a file with the given text, compressed when
+        the name of the file calls for it.
+        
+        Args:
+            path (str): File to write
+            text (str): New content of the file, bytes for a binary
+                file, or an iterable of str written piece by piece
+            tmp_path (str): Temporary file to write first, defaults to
+                <path>.tmp
+        """
+        if tmp_path is None:
+            tmp_path = path + ".tmp"
+        mode = 'wb' if isinstance(text, bytes) else 'w'
+        with open_file(tmp_path, mode, compression_of(path)) as f:
+            if isinstance(text, (str, bytes)):
+                f.write(text)
+            else:
+                for chunk in text:
+                    f.write(chunk)
+            self._sync_file(f, path)
+        if metrics.enabled:
+            metrics.incr('storage.bytes_written', os.path.getsize(tmp_path))
+        os.replace(tmp_path, path)
+        # The rename itself is only durable once the directory is synced
+        directory = os.path.dirname(os.path.abspath(path))
+        if self.durability == "fsync":
+            self._fsync_path(directory)
+        elif self.durability == "group":
+            self._sync_later(directory)
+    
+    def _sync_file(self, f, path):
+        """
+        Apply the durability setting to a file just written.
+        
+        Args:
+            f: Open file object
+            path (str): Path the data will be found at once written
+        """
+        if self.durability == "fsync":
+            f.flush()
+            os.fsync(f.fileno())
+        elif self.durability == "group":
+            self._sync_later(path)
+        elif self.durability != "os":
+            raise ValueError("unknown durability {!r}".format(self.durability))
+    
+    def _sync_later(self, path):
+        """
+        Queue a path for the next group commit, starting its timer.
+        
+        Args:
+            path (str): File or directory to sync
+        """
+        with FileStorage._FileStorage__sync_lock:
+            FileStorage._FileStorage__sync_paths.add(path)
+            if FileStorage._FileStorage__sync_timer is None:
+                timer = threading.Timer(self.group_commit_ms / 1000, self.sync)
+                timer.daemon = True
+                FileStorage._FileStorage__sync_timer = timer
+                timer.start()
+    
+    @staticmethod
+    def _fsync_path(path):
+        """
+        Flush a file or directory to disk, ignoring ones that vanished
+        or cannot be opened (directories on Windows).
+        
+        Args:
+            path (str): File or directory to sync
+        """
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    
+    def _reading(self):
+        """
+        Return the context manager guarding reads of the objects.
+        """
+        if self.threadsafe:
+            return FileStorage._FileStorage__rwlock.read_lock
+        return _NO_LOCK
+    
+    def _writing(self):
+        """
+        Return the context manager guarding changes to the objects.
+        """
+        if self.threadsafe:
+            return FileStorage._FileStorage__rwlock.write_lock
+        return _NO_LOCK
+    
+    def _get_flusher(self):
+        """
+        Return the background flusher, creating it on first use.
+        """
+        with FileStorage._FileStorage__sync_lock:
+            if FileStorage._FileStorage__flusher is None:
+                FileStorage._FileStorage__flusher = Flusher(self._flush)
+            return FileStorage._FileStorage__flusher
+    
+    @contextmanager
+    def _file_lock(self):
+        """
+        Hold the advisory lock shared with other processes, if shared
+        is enabled. The lock is reentrant for the thread holding it.
+        """
+        if not self.shared or fcntl is None:
+            yield
+            return
+        mutex = FileStorage._FileStorage__lock_mutex
+        mutex.acquire()
+        if FileStorage._FileStorage__lock_depth == 0:
+            lock_file = open(FileStorage._FileStorage__file_path + ".lock",
+                             'a')
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            FileStorage._FileStorage__lock_file = lock_file
+        FileStorage._FileStorage__lock_depth += 1
+        try:
+            yield
+        finally:
+            FileStorage._FileStorage__lock_depth -= 1
+            if FileStorage._FileStorage__lock_depth == 0:
+                lock_file = FileStorage._FileStorage__lock_file
+                FileStorage._FileStorage__lock_file = None
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                lock_file.close()
+            mutex.release()
+    
+    def _generation(self):
+        """
+        Return what identifies the current version of the files: the
+        modification time, size and inode of the snapshot and journals.
+        
+        Returns:
+            tuple: One (mtime_ns, size, inode) or None per file
+        """
+        generation = []
+        for path in (self._snapshot_path(),) + self._journal_paths():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                generation.append(None)
+            else:
+                generation.append((stat.st_mtime_ns, stat.st_size,
+                                   stat.st_ino))
+        return tuple(generation)
+    
+    def _merge_changes(self):
+        """
+        Bring in the objects other processes saved since the files were
+        last read or written here.
+        
+        Objects dirty or deleted here are kept as they are. Clean ones
+        are updated in place to the version on disk, and are dropped if
+        they are no longer on disk; objects only found on disk are
+        added.
+        """
+        generation = self._generation()
+        if generation == FileStorage._FileStorage__generation or \
+                generation == (None,) * len(generation):
+            return
+        self._wait_compaction()
+        on_disk = self._load_snapshot(self._snapshot_path())
+        for path in self._journals_to_replay():
+            self._replay_journal(on_disk, path)
+        
+        objects = FileStorage._FileStorage__objects
+        dirty = FileStorage._FileStorage__dirty
+        deleted = FileStorage._FileStorage__deleted
+        encoded = FileStorage._FileStorage__encoded
+        classes = _model_classes(self.compact_models)
+        for key in [key for key in objects
+                    if key not in on_disk and key not in dirty]:
+            dict.pop(objects, key)
+            encoded.pop(key, None)
+            self._index_remove(key)
+        for key, record in on_disk.items():
+            if key in dirty or key in deleted:
+                continue
+            cls = classes.get(record.get('__class__'))
+            if cls is None:
+                continue
+            current = dict.get(objects, key)
+            if type(current) is dict:
+                if current == record:
+                    continue
+            elif current is not None:
+                # Without a cached encoding (e.g. after an eager
+                # reload) the instance is encoded to compare it
+                cached = encoded.get(key)
+                if cached is None:
+                    cached = self._encode(current)
+                if self.codec.loads(cached) == record:
+                    continue
+            if current is not None:
+                self._index_remove(key)
+            encoded.pop(key, None)
+            if type(current) is not dict and current is not None:
+                # Update the instance in place, so that references held
+                # elsewhere keep reporting their changes
+                _set_state(current, _get_state(cls(**record)))
+            elif isinstance(objects, _LazyObjects):
+                dict.__setitem__(objects, key, record)
+            else:
+                dict.__setitem__(objects, key, cls(**record))
+            dirty.pop(key, None)
+            self._index_add(key, dict.__getitem__(objects, key))
+    
+    def _wait_compaction(self):
+        """
+        Block until a running background compaction has finished.
+        """
+        compactor = FileStorage._FileStorage__compactor
+        if compactor is not None:
+            compactor.join()
+            FileStorage._FileStorage__compactor = None
+    
+    def _load_snapshot(self, path):
+        """
+        Read the dictionaries stored in a snapshot file, JSON or
+        binary.
+        
+        Args:
+            path (str): Path of the snapshot
+        
+        Returns:
+            dict: Serialized objects keyed by <class name>.id
+        """
+        if not os.path.exists(path):
+            return {}
+        compression = compression_of(path)
+        if compression is not None:
+            return load_file(path, compression, self.codec.loads)
+        from models.engine.snapshot import Snapshot, is_snapshot
+        if is_snapshot(path):
+            with Snapshot(path) as snapshot:
+                return snapshot.records(self.codec)
+        with open(path, 'r', encoding='utf-8') as f:
+            return self.codec.loads(f.read())
+    
+    def _iter_snapshot(self, path):
+        """
+        Read the dictionaries stored in a snapshot file one at a time.
+        
+        A JSON file is parsed incrementally (see
+        models.engine.jsonstream), so only one record is held in memory
+        besides the read buffer.
+        
+        Args:
+            path (str): Path of the snapshot
+        
+        Yields:
+            tuple: (<class name>.id, serialized object), in file order
+        """
+        if not os.path.exists(path):
+            return
+        compression = compression_of(path)
+        if compression is None:
+            from models.engine.snapshot import Snapshot, is_snapshot
+            if is_snapshot(path):
+                with Snapshot(path) as snapshot:
+                    yield from snapshot.iter_records(self.codec)
+                return
+        yield from iter_file(path, compression, self.codec.loads)
+    
+    def _replay_stream(self, path, changes):
+        """
+        Read a snapshot file one record at a time with journal changes
+        applied on the fly.
+        
+        Args:
+            path (str): Path of the snapshot
+            changes (dict): Serialized objects from the journal by key,
+                None for deleted keys; emptied as they are applied
+        
+        Yields:
+            tuple: (<class name>.id, serialized object)
+        """
+        for key, record in self._iter_snapshot(path):
+            if key in changes:
+                record = changes.pop(key)
+                if record is None:
+                    continue
+            yield key, record
+        for key, record in changes.items():
+            if record is not None:
+                yield key, record
+    
+    def _journal_changes(self, path):
+        """
+        Read the records of a journal file.
+        
+        A record cut short by a crash is skipped.
+        
+        Args:
+            path (str): Path of the journal
+        
+        Yields:
+            tuple: (<class name>.id, serialized object), the object
+            being None for a deletion
+        """
+        if not os.path.exists(path):
+            return
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = self.codec.loads(line)
+                except ValueError:
+                    continue
+                if record["op"] == "del":
+                    yield record["key"], None
+                else:
+                    yield record["key"], record["value"]
+    
+    def _replay_journal(self, objects_dict, path):
+        """
+        Apply the records of a journal file to serialized objects.
+        
+        Args:
+            objects_dict (dict): Serialized objects to update in place
+            path (str): Path of the journal
+        """
+        for key, record in self._journal_changes(path):
+            if record is None:
+                objects_dict.pop(key, None)
+            else:
+                objects_dict[key] = record
+
+
+metrics.register(FileStorage, {
+    'new': 'storage.new',
+    'save': 'storage.save',
+    'reload': 'storage.reload',
+    '_flush': 'storage.write',
+    '_encode_dirty': 'storage.encode',
+    '_write_file': 'storage.disk',
+    '_append_journal': 'storage.disk',
+})
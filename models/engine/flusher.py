@@ -0,0 +1,102 @@
+#!/usr/bin/python3
+"""
+Background flusher for the AirBnB clone storage engines.
+
+This module contains the Flusher class, a daemon thread that runs a
+flush function on request. Requests that arrive while a flush is
+running are coalesced into the next one, so many threads saving at the
+same time cause a couple of writes instead of one each.
+"""
+
+import threading
+
+
+class Flusher:
+    """
+    Flusher class running a flush function in a background thread.
+    
+    Every request gets a ticket; a flush started after a ticket was
+    handed out covers it.
+    """
+    
+    def __init__(self, flush, name="hbnb-flusher"):
+        """
+        Initialize Flusher instance.
+        
+        Args:
+            flush: Function writing everything that is pending
+            name (str): Name of the thread
+        """
+        self.__flush = flush
+        self.__name = name
+        self.__condition = threading.Condition()
+        self.__requested = 0
+        self.__done = 0
+        self.__error = None
+        self.__thread = None
+    
+    def request(self, wait=True):
+        """
+        Ask for a flush.
+        
+        Args:
+            wait (bool): Block until a flush covering this request has
+                finished
+        
+        Raises:
+            Exception: The error raised by that flush, if any
+        """
+        with self.__condition:
+            self.__requested += 1
+            ticket = self.__requested
+            if self.__thread is None or not self.__thread.is_alive():
+                self.__thread = threading.Thread(target=self.__run,
+                                                 name=self.__name,
+                                                 daemon=True)
+                self.__thread.start()
+            self.__condition.notify_all()
+            if not wait:
+                return
+            while self.__done < ticket:
+                self.__condition.wait()
+            if self.__error is not None and self.__error[0] >= ticket:
+                raise self.__error[1]
+    
+    def wait(self):
+        """
+        Block until the requests made so far have been flushed.
+        """
+        with self.__condition:
+            target = self.__requested
+            while self.__done < target:
+                self.__condition.wait()
+    
+    def pending(self):
+        """
+        Tell whether requests are waiting for a flush.
+        
+        Returns:
+            bool: True if a flush is due or running
+        """
+        with self.__condition:
+            return self.__done < self.__requested
+    
+    def __run(self):
+        """
+        Flush whenever requests are pending.
+        """
+        while True:
+            with self.__condition:
+                while self.__done == self.__requested:
+                    self.__condition.wait()
+                target = self.__requested
+            try:
+                self.__flush()
+                error = None
+            except Exception as exc:
+                error = exc
+            with self.__condition:
+                self.__done = target
+                if error is not None:
+                    self.__error = (target, error)
+                self.__condition.notify_all()
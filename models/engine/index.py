@@ -0,0 +1,154 @@
+#!/usr/bin/python3
+"""
+Attribute indexes for the AirBnB clone storage engines.
+
+This module contains the HashIndex and SortedIndex classes used by
+FileStorage to answer attribute lookups without scanning every object.
+"""
+
+from bisect import bisect_left, bisect_right, insort
+
+
+class HashIndex:
+    """
+    Index mapping attribute values to the keys of the objects holding
+    them, for equality lookups.
+    """
+    
+    def __init__(self):
+        """
+        Initialize an empty index.
+        """
+        self.values = {}
+        self.buckets = {}
+        # Keys whose value is unhashable, candidates of every lookup
+        self.unhashable = {}
+    
+    def add(self, key, value):
+        """
+        Index the object stored under key with the given value.
+        
+        Objects with an unhashable value are kept apart and returned
+        by every lookup, so that the index never hides a match.
+        
+        Args:
+            key (str): Storage key <class name>.id
+            value: Value of the indexed attribute
+        """
+        self.remove(key)
+        try:
+            self.buckets.setdefault(value, {})[key] = None
+        except TypeError:
+            self.unhashable[key] = None
+            return
+        self.values[key] = value
+    
+    def remove(self, key):
+        """
+        Remove the object stored under key from the index.
+        
+        Args:
+            key (str): Storage key <class name>.id
+        """
+        if key not in self.values:
+            self.unhashable.pop(key, None)
+            return
+        value = self.values.pop(key)
+        bucket = self.buckets[value]
+        del bucket[key]
+        if not bucket:
+            del self.buckets[value]
+    
+    def lookup(self, value):
+        """
+        Return the keys of the objects whose attribute equals value.
+        
+        Args:
+            value: Value to look up
+        
+        Returns:
+            list: Storage keys of the matching objects and of the objects
+            with an unhashable value, to be checked by the caller; None
+            if value is unhashable and the index cannot be used
+        """
+        try:
+            keys = list(self.buckets.get(value, ()))
+        except TypeError:
+            return None
+        keys.extend(self.unhashable)
+        return keys
+
+
+class SortedIndex(HashIndex):
+    """
+    Index keeping attribute values in order, for equality and range
+    lookups.
+    
+    Values that cannot be ordered against the ones already indexed are
+    only available to equality lookups.
+    """
+    
+    def __init__(self):
+        """
+        Initialize an empty index.
+        """
+        super().__init__()
+        self.entries = []
+    
+    def add(self, key, value):
+        """
+        Index the object stored under key with the given value.
+        
+        Args:
+            key (str): Storage key <class name>.id
+            value: Value of the indexed attribute
+        """
+        super().add(key, value)
+        if key not in self.values:
+            return
+        try:
+            insort(self.entries, (value, key))
+        except TypeError:
+            pass
+    
+    def remove(self, key):
+        """
+        Remove the object stored under key from the index.
+        
+        Args:
+            key (str): Storage key <class name>.id
+        """
+        if key not in self.values:
+            super().remove(key)
+            return
+        value = self.values[key]
+        super().remove(key)
+        try:
+            position = bisect_left(self.entries, (value, key))
+        except TypeError:
+            return
+        if position < len(self.entries) and \
+                self.entries[position] == (value, key):
+            del self.entries[position]
+    
+    def range(self, low=None, high=None):
+        """
+        Return the keys of the objects whose attribute lies between low
+        and high (both inclusive), in ascending order of value.
+        
+        Args:
+            low: Lower bound, None for no bound
+            high: Upper bound, None for no bound
+        
+        Returns:
+            list: Matching storage keys
+        """
+        entries = self.entries
+        start = 0
+        end = len(entries)
+        if low is not None:
+            start = bisect_left(entries, (low,))
+        if high is not None:
+            # Every (high, key) tuple sorts before (high, "\uffff")
+            end = bisect_right(entries, (high, "\uffff"))
+        return [key for value, key in entries[start:end]]
@@ -0,0 +1,340 @@
+#!/usr/bin/python3
+"""
+Streaming JSON files for the AirBnB clone storage engines.
+
+A FileStorage file is one JSON object mapping "<class name>.id" keys to
+records. This module reads and writes such files one record at a time,
+so that neither side needs the whole document in memory, and opens
+them through gzip, lzma or zstd when their name ends with ".gz", ".xz"
+(or ".lzma") or ".zst".
+
+zstd needs the zstandard package (or Python 3.14's compression.zstd);
+gzip and lzma come with Python.
+"""
+
+import gzip
+import json
+import lzma
+import re
+
+try:
+    import zstandard
+except ImportError:
+    try:
+        from compression import zstd as zstandard
+    except ImportError:
+        zstandard = None
+
+EXTENSIONS = {'.gz': 'gzip', '.xz': 'lzma', '.lzma': 'lzma', '.zst': 'zstd'}
+CHUNK_SIZE = 64 * 1024
+
+# What the decompressors raise on truncated or damaged data
+DECOMPRESSION_ERRORS = (EOFError, gzip.BadGzipFile, lzma.LZMAError)
+if zstandard is not None and hasattr(zstandard, 'ZstdError'):
+    DECOMPRESSION_ERRORS += (zstandard.ZstdError,)
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_decode = json.JSONDecoder().raw_decode
+
+
+def compression_of(path):
+    """
+    Return the compression a file name calls for.
+    
+    Args:
+        path (str): Path of the file
+    
+    Returns:
+        str: "gzip", "lzma", "zstd", or None for a plain file
+    """
+    for extension, compression in EXTENSIONS.items():
+        if path.endswith(extension):
+            return compression
+    return None
+
+
+def extension_of(compression):
+    """
+    Return the file name extension of a compression.
+    
+    Args:
+        compression (str): "gzip", "lzma" or "zstd"
+    
+    Returns:
+        str: The extension, with its dot
+    
+    Raises:
+        ValueError: If the compression is unknown
+    """
+    for extension, name in EXTENSIONS.items():
+        if name == compression:
+            return extension
+    raise ValueError("unknown compression {!r}".format(compression))
+
+
+def open_file(path, mode='r', compression=None):
+    """
+    Open a file for reading or writing, through a compressor.
+    
+    Args:
+        path (str): Path of the file
+        mode (str): "r" or "w" for text, "rb" or "wb" for bytes
+        compression (str): "gzip", "lzma", "zstd" or None
+    
+    Returns:
+        File object
+    
+    Raises:
+        ValueError: If the compression is unknown or not installed
+    """
+    encoding = None if 'b' in mode else 'utf-8'
+    if compression is None:
+        return open(path, mode, encoding=encoding)
+    if 'b' not in mode:
+        mode += 't'
+    if compression == 'gzip':
+        return gzip.open(path, mode, compresslevel=6, encoding=encoding)
+    if compression == 'lzma':
+        lzma_format = lzma.FORMAT_ALONE if path.endswith('.lzma') else None
+        if 'w' in mode and lzma_format is None:
+            lzma_format = lzma.FORMAT_XZ
+        return lzma.open(path, mode, format=lzma_format, encoding=encoding)
+    if compression == 'zstd':
+        if zstandard is None:
+            raise ValueError("zstd compression needs the zstandard package")
+        return zstandard.open(path, mode, encoding=encoding)
+    raise ValueError("unknown compression {!r}".format(compression))
+
+
+def object_chunks(parts):
+    """
+    Yield the text of a JSON object made of '"key": value' parts.
+    
+    Joining the chunks gives "{" + ", ".join(parts) + "}".
+    
+    Args:
+        parts: Iterable of '"key": value' strings
+    
+    Yields:
+        str: Pieces of the JSON text
+    """
+    yield "{"
+    separator = ""
+    for part in parts:
+        yield separator
+        yield part
+        separator = ", "
+    yield "}"
+
+
+class _Buffer:
+    """
+    _Buffer class holding the part of a text file not parsed yet.
+    """
+    
+    def __init__(self, f, chunk_size):
+        """
+        Initialize _Buffer instance.
+        
+        Args:
+            f: Text file object
+            chunk_size (int): Characters read at a time
+        """
+        self.f = f
+        self.chunk_size = chunk_size
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+    
+    def fill(self):
+        """
+        Read more of the file, dropping what was parsed. At least as
+        much as is left is read, so a record longer than chunk_size is
+        re-parsed a logarithmic number of times only.
+        
+        Returns:
+            bool: False at the end of the file
+        """
+        if self.eof:
+            return False
+        left = self.text[self.pos:]
+        chunk = self.f.read(max(self.chunk_size, len(left)))
+        self.text = left + chunk
+        self.pos = 0
+        self.eof = not chunk
+        return not self.eof
+    
+    def peek(self):
+        """
+        Skip whitespace and return the next character.
+        
+        Returns:
+            str: The character, "" at the end of the file
+        """
+        while True:
+            self.pos = _WHITESPACE.match(self.text, self.pos).end()
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill():
+                return ""
+    
+    def expect(self, chars):
+        """
+        Consume one of the given punctuation characters.
+        
+        Args:
+            chars (str): Characters allowed next
+        
+        Returns:
+            str: The character read
+        
+        Raises:
+            ValueError: If something else comes next
+        """
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError("expected {!r}, found {!r}".format(
+                chars, char or "end of file"))
+        self.pos += 1
+        return char
+    
+    def value(self):
+        """
+        Decode the next JSON value.
+        
+        Returns:
+            The value
+        
+        Raises:
+            ValueError: If it is not valid JSON
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = _decode(self.text, self.pos)
+            except ValueError:
+                if self.fill():
+                    continue
+                raise
+            # A number ending with the buffer may go on in the file
+            if end == len(self.text) and self.fill():
+                continue
+            self.pos = end
+            return value
+
+
+def _batch(buffer, loads):
+    """
+    Decode at once the members of the buffer up to the last record
+    that visibly ends in it.
+    
+    The text is cut after the last "}, " followed by a key, as
+    object_chunks() writes them. A cut inside a string or a nested
+    object cannot give a valid JSON object, so when loads() accepts
+    the cut text it holds exactly those members.
+    
+    Args:
+        buffer (_Buffer): Buffer positioned on a key
+        loads: JSON decoding function taking str
+    
+    Returns:
+        dict: The members decoded, empty if there is no usable cut
+    """
+    cut = buffer.text.rfind('}, "', buffer.pos)
+    if cut == -1:
+        return {}
+    try:
+        members = loads("{" + buffer.text[buffer.pos:cut + 1] + "}")
+    except ValueError:
+        return {}
+    if type(members) is not dict:
+        return {}
+    buffer.pos = cut + 2
+    return members
+
+
+def iter_items(f, chunk_size=CHUNK_SIZE, loads=None):
+    """
+    Parse a JSON object from a text file one member at a time.
+    
+    Only the member being parsed is held in memory besides the read
+    buffer. Given loads, the records found whole in the buffer are
+    decoded by it in one call, one buffer at a time, which is much
+    faster with the C JSON libraries; the rest goes through the member
+    by member parser.
+    
+    Args:
+        f: Text file object
+        chunk_size (int): Characters read at a time
+        loads: JSON decoding function taking str, e.g. Codec.loads
+    
+    Yields:
+        tuple: (key, value) of each member, in file order
+    
+    Raises:
+        ValueError: If the file is not a single JSON object
+    """
+    buffer = _Buffer(f, chunk_size)
+    buffer.expect("{")
+    if buffer.peek() == "}":
+        buffer.pos += 1
+    else:
+        while True:
+            if buffer.peek() != '"':
+                raise ValueError("expected a key, found {!r}".format(
+                    buffer.peek() or "end of file"))
+            if loads is not None:
+                members = _batch(buffer, loads)
+                if members:
+                    yield from members.items()
+                    continue
+            key = buffer.value()
+            buffer.expect(":")
+            yield key, buffer.value()
+            if buffer.expect(",}") == "}":
+                break
+    if buffer.peek():
+        raise ValueError("extra data after the JSON object")
+
+
+def iter_file(path, compression=None, loads=None):
+    """
+    Parse the JSON object stored in a file one member at a time.
+    
+    Args:
+        path (str): Path of the file
+        compression (str): "gzip", "lzma", "zstd" or None
+        loads: JSON decoding function, see iter_items()
+    
+    Yields:
+        tuple: (key, value) of each member, in file order
+    
+    Raises:
+        ValueError: If the file is not a single JSON object or its
+            compressed data is damaged
+    """
+    try:
+        with open_file(path, 'r', compression) as f:
+            yield from iter_items(f, loads=loads)
+    except DECOMPRESSION_ERRORS as error:
+        raise ValueError("damaged {} data in {}: {}".format(
+            compression, path, error)) from error
+
+
+def load_file(path, compression=None, loads=None):
+    """
+    Read the JSON object stored in a file, one member at a time.
+    
+    Args:
+        path (str): Path of the file
+        compression (str): "gzip", "lzma", "zstd" or None
+        loads: JSON decoding function, see iter_items()
+    
+    Returns:
+        dict: The object
+    
+    Raises:
+        ValueError: If the file is not a single JSON object or its
+            compressed data is damaged
+    """
+    return dict(iter_file(path, compression, loads))
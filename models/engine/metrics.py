@@ -0,0 +1,277 @@
+#!/usr/bin/python3
+"""
+Metrics for the AirBnB clone storage engines and console.
+
+This module contains the Metrics class and its shared instance,
+metrics, which keeps counters, latency histograms and gauges. Code
+declares the methods to time with register(); they are only wrapped
+while the metrics are enabled, so that disabled metrics cost nothing
+but the "if metrics.enabled" tests of the few counters updated inline.
+
+The metrics are enabled by setting HBNB_METRICS=1 (see the models
+package), and read with the stats console command or from Python:
+    
+    from models.engine.metrics import metrics
+    metrics.enable()
+    ...
+    print(metrics.report())
+    metrics.snapshot()['histograms']['storage.save']['p99_ms']
+"""
+
+import functools
+import threading
+import time
+
+# Upper bounds of the histogram buckets, in microseconds: 1, 2, 4, ...
+# up to about 2 minutes, the last bucket holding anything longer
+BUCKETS = 28
+
+
+class Histogram:
+    """
+    Histogram class counting durations in power of two buckets.
+    
+    Attributes:
+        count (int): Number of durations recorded
+        total (float): Sum of the durations, in seconds
+        min (float): Shortest duration, None when empty
+        max (float): Longest duration, None when empty
+    """
+    
+    def __init__(self):
+        """
+        Initialize an empty Histogram instance.
+        """
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.buckets = [0] * BUCKETS
+    
+    def record(self, seconds):
+        """
+        Add a duration.
+        
+        Args:
+            seconds (float): Duration
+        """
+        self.count += 1
+        self.total += seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        if self.max is None or seconds > self.max:
+            self.max = seconds
+        bucket = int(seconds * 1000000).bit_length()
+        self.buckets[min(bucket, BUCKETS - 1)] += 1
+    
+    def quantile(self, fraction):
+        """
+        Estimate a quantile from the buckets.
+        
+        Args:
+            fraction (float): Quantile between 0 and 1, e.g. 0.99
+        
+        Returns:
+            float: Upper bound of the bucket holding it, in seconds,
+            at most max; None when empty
+        """
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for bucket, number in enumerate(self.buckets):
+            seen += number
+            if seen >= rank and number:
+                return min((1 << bucket) / 1000000, self.max)
+        return self.max
+    
+    def summary(self):
+        """
+        Return the statistics of the histogram, in milliseconds.
+        
+        Returns:
+            dict: count, total_ms, mean_ms, min_ms, max_ms, p50_ms,
+            p90_ms and p99_ms
+        """
+        def ms(seconds):
+            return None if seconds is None else seconds * 1000
+        
+        return {'count': self.count,
+                'total_ms': self.total * 1000,
+                'mean_ms': ms(self.total / self.count if self.count
+                              else None),
+                'min_ms': ms(self.min), 'max_ms': ms(self.max),
+                'p50_ms': ms(self.quantile(0.5)),
+                'p90_ms': ms(self.quantile(0.9)),
+                'p99_ms': ms(self.quantile(0.99))}
+
+
+class Metrics:
+    """
+    Metrics class keeping counters, latency histograms and gauges.
+    
+    Attributes:
+        enabled (bool): Whether the metrics are collected
+    """
+    
+    def __init__(self):
+        """
+        Initialize Metrics instance, disabled.
+        """
+        self.enabled = False
+        self.__lock = threading.Lock()
+        self.__counters = {}
+        self.__histograms = {}
+        self.__gauges = {}
+        # (class, attribute name, metric name) of the methods to time
+        self.__targets = []
+        # (class, attribute name) -> original method while enabled
+        self.__originals = {}
+    
+    def register(self, cls, methods):
+        """
+        Declare methods of a class to time while the metrics are on.
+        
+        Args:
+            cls: Class defining the methods
+            methods (dict): Metric names keyed by method name
+        """
+        for name, metric in methods.items():
+            self.__targets.append((cls, name, metric))
+            if self.enabled:
+                self.__wrap(cls, name, metric)
+    
+    def gauge(self, name, function):
+        """
+        Declare a value read when the metrics are reported.
+        
+        Args:
+            name (str): Name of the gauge
+            function: Callable without arguments returning the value
+        """
+        self.__gauges[name] = function
+    
+    def enable(self):
+        """
+        Start collecting, wrapping the registered methods.
+        """
+        if self.enabled:
+            return
+        self.enabled = True
+        for cls, name, metric in self.__targets:
+            self.__wrap(cls, name, metric)
+    
+    def disable(self):
+        """
+        Stop collecting and put the registered methods back. What was
+        collected is kept until reset().
+        """
+        self.enabled = False
+        for (cls, name), method in self.__originals.items():
+            setattr(cls, name, method)
+        self.__originals = {}
+    
+    def __wrap(self, cls, name, metric):
+        """
+        Replace a method by one recording how long it takes.
+        
+        Args:
+            cls: Class defining the method
+            name (str): Name of the method
+            metric (str): Name of the histogram
+        """
+        if (cls, name) in self.__originals:
+            return
+        method = cls.__dict__[name]
+        observe = self.observe
+        
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                observe(metric, time.perf_counter() - start)
+        
+        self.__originals[(cls, name)] = method
+        setattr(cls, name, timed)
+    
+    def incr(self, name, value=1):
+        """
+        Add to a counter.
+        
+        Args:
+            name (str): Name of the counter
+            value (int): Amount to add
+        """
+        with self.__lock:
+            self.__counters[name] = self.__counters.get(name, 0) + value
+    
+    def observe(self, name, seconds):
+        """
+        Record a duration in a histogram.
+        
+        Args:
+            name (str): Name of the histogram
+            seconds (float): Duration
+        """
+        with self.__lock:
+            histogram = self.__histograms.get(name)
+            if histogram is None:
+                histogram = self.__histograms[name] = Histogram()
+            histogram.record(seconds)
+    
+    def reset(self):
+        """
+        Forget the counters and histograms.
+        """
+        with self.__lock:
+            self.__counters = {}
+            self.__histograms = {}
+    
+    def snapshot(self):
+        """
+        Return the current metrics.
+        
+        Returns:
+            dict: counters (values by name), histograms (summaries by
+            name, see Histogram.summary()) and gauges (values by name)
+        """
+        with self.__lock:
+            counters = dict(self.__counters)
+            histograms = {name: histogram.summary() for name, histogram
+                          in self.__histograms.items()}
+        gauges = {name: function() for name, function
+                  in self.__gauges.items()}
+        return {'counters': counters, 'histograms': histograms,
+                'gauges': gauges}
+    
+    def report(self):
+        """
+        Format the current metrics as a table.
+        
+        Returns:
+            str: One line per histogram, counter and gauge value
+        """
+        current = self.snapshot()
+        lines = ["{:<24} {:>8} {:>10} {:>10} {:>10} {:>10}".format(
+            "latency", "count", "mean ms", "p50 ms", "p99 ms", "max ms")]
+        for name, summary in sorted(current['histograms'].items()):
+            lines.append(
+                "{:<24} {:>8} {:>10.3f} {:>10.3f} {:>10.3f} {:>10.3f}".format(
+                    name, summary['count'], summary['mean_ms'],
+                    summary['p50_ms'], summary['p99_ms'], summary['max_ms']))
+        for name, value in sorted(current['counters'].items()):
+            lines.append("{:<24} {:>8}".format(name, value))
+        for name, value in sorted(current['gauges'].items()):
+            if isinstance(value, dict):
+                for key, item in sorted(value.items()):
+                    lines.append("{:<24} {:>8}".format(
+                        "{}.{}".format(name, key), item))
+            else:
+                lines.append("{:<24} {:>8}".format(name, value))
+        return "\n".join(lines)
+
+
+# Shared by the storage engines and the console
+metrics = Metrics()
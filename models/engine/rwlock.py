@@ -0,0 +1,149 @@
+#!/usr/bin/python3
+"""
+Readers-writer lock for the AirBnB clone storage engines.
+
+This module contains the RWLock class, which lets any number of threads
+read at the same time while writers get exclusive access. Waiting
+writers go before new readers so that a steady flow of reads cannot
+starve them.
+"""
+
+import threading
+
+
+class _Guard:
+    """
+    _Guard class turning a pair of acquire and release functions into
+    a reusable context manager.
+    """
+    
+    def __init__(self, acquire, release):
+        """
+        Initialize _Guard instance.
+        
+        Args:
+            acquire: Function taking the lock
+            release: Function releasing it
+        """
+        self.acquire = acquire
+        self.release = release
+    
+    def __enter__(self):
+        """
+        Take the lock.
+        """
+        self.acquire()
+    
+    def __exit__(self, *exc_info):
+        """
+        Release the lock.
+        """
+        self.release()
+        return False
+
+
+class RWLock:
+    """
+    RWLock class, a writer preferring readers-writer lock.
+    
+    Both sides are reentrant: a thread may take the read lock again
+    while it holds it, and a writer may also take the read lock. A
+    reader asking for the write lock gets a RuntimeError instead of
+    waiting forever for itself.
+    
+    Attributes:
+        read_lock: Context manager holding the lock for reading
+        write_lock: Context manager holding the lock for writing
+    """
+    
+    def __init__(self):
+        """
+        Initialize RWLock instance.
+        """
+        self.__condition = threading.Condition(threading.Lock())
+        self.__readers = {}
+        self.__writer = None
+        self.__write_depth = 0
+        self.__writers_waiting = 0
+        self.read_lock = _Guard(self.acquire_read, self.release_read)
+        self.write_lock = _Guard(self.acquire_write, self.release_write)
+    
+    def acquire_read(self):
+        """
+        Take the lock for reading, waiting for writers to finish.
+        """
+        me = threading.get_ident()
+        with self.__condition:
+            if me in self.__readers:
+                self.__readers[me] += 1
+                return
+            if self.__writer != me:
+                while self.__writer is not None or self.__writers_waiting:
+                    self.__condition.wait()
+            self.__readers[me] = 1
+    
+    def release_read(self):
+        """
+        Release the lock taken by acquire_read().
+        """
+        me = threading.get_ident()
+        with self.__condition:
+            self.__readers[me] -= 1
+            if not self.__readers[me]:
+                del self.__readers[me]
+                if not self.__readers:
+                    self.__condition.notify_all()
+    
+    def acquire_write(self):
+        """
+        Take the lock for writing, waiting for readers and writers to
+        finish.
+        
+        Raises:
+            RuntimeError: If this thread only holds the read lock
+        """
+        me = threading.get_ident()
+        with self.__condition:
+            if self.__writer == me:
+                self.__write_depth += 1
+                return
+            if me in self.__readers:
+                raise RuntimeError("cannot upgrade a read lock to a "
+                                   "write lock")
+            self.__writers_waiting += 1
+            try:
+                while self.__writer is not None or self.__readers:
+                    self.__condition.wait()
+            finally:
+                self.__writers_waiting -= 1
+            self.__writer = me
+            self.__write_depth = 1
+    
+    def release_write(self):
+        """
+        Release the lock taken by acquire_write().
+        """
+        with self.__condition:
+            self.__write_depth -= 1
+            if not self.__write_depth:
+                self.__writer = None
+                self.__condition.notify_all()
+    
+    def held(self):
+        """
+        Tell whether the calling thread holds the lock.
+        
+        Returns:
+            bool: True if it holds it for reading or writing
+        """
+        me = threading.get_ident()
+        return self.__writer == me or me in self.__readers
+    
+    def writing(self):
+        """
+        Tell whether the calling thread holds the write lock.
+        
+        Returns:
+            bool: True if it holds it for writing
+        """
+        return self.__writer == threading.get_ident()
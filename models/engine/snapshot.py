@@ -0,0 +1,304 @@
+#!/usr/bin/python3
+"""
+Binary snapshot format for the AirBnB clone storage engines.
+
+A binary snapshot holds the same records as a FileStorage JSON file,
+laid out so that it can be opened without parsing all of it:
+    
+    header   "<8sHHIQQ": magic, version, reserved, number of records,
+             offset and length of the key block
+    records  the JSON encoding of every object, back to back
+    keys     the "<class name>.id" keys joined by newlines (UTF-8)
+    offsets  number of records + 1 little-endian unsigned 64-bit
+             offsets, record i spanning offsets[i]:offsets[i + 1]
+
+The Snapshot class maps the file with mmap and only reads the header,
+the keys and the offsets when opened; a record is decoded when it is
+asked for. Run this module to convert between the two formats:
+    
+    python3 -m models.engine.snapshot file.json file.hbnb
+    python3 -m models.engine.snapshot file.hbnb file.json
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+from array import array
+from models.engine.codec import get_codec
+
+MAGIC = b"HBNBSNAP"
+VERSION = 1
+HEADER = struct.Struct("<8sHHIQQ")
+
+
+def is_snapshot(path):
+    """
+    Tell whether a file is a binary snapshot.
+    
+    Args:
+        path (str): Path of the file
+    
+    Returns:
+        bool: True if the file starts with the snapshot magic
+    """
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def dump(records):
+    """
+    Build the content of a binary snapshot.
+    
+    Args:
+        records: (key, JSON bytes) pairs, one per object
+    
+    Returns:
+        bytes: The snapshot file
+    
+    Raises:
+        ValueError: If a key is given twice
+    """
+    keys = []
+    parts = []
+    offsets = array('Q', [HEADER.size])
+    for key, record in records:
+        keys.append(key)
+        parts.append(record)
+        offsets.append(offsets[-1] + len(record))
+    if len(set(keys)) != len(keys):
+        seen = set()
+        duplicate = next(key for key in keys
+                         if key in seen or seen.add(key))
+        raise ValueError("duplicate key {} in snapshot".format(duplicate))
+    key_block = "\n".join(keys).encode('utf-8')
+    header = HEADER.pack(MAGIC, VERSION, 0, len(keys), offsets[-1],
+                         len(key_block))
+    if sys.byteorder != 'little':
+        offsets.byteswap()
+    return b"".join([header] + parts + [key_block, offsets.tobytes()])
+
+
+class Snapshot:
+    """
+    Snapshot class giving read access to a binary snapshot file
+    through mmap.
+    
+    Attributes:
+        path (str): Path of the file
+    """
+    
+    def __init__(self, path):
+        """
+        Map a snapshot file and read its index.
+        
+        Args:
+            path (str): Path of the file
+        
+        Raises:
+            ValueError: If the file is not a valid snapshot
+        """
+        self.path = path
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < HEADER.size:
+                raise ValueError("{} is not a snapshot".format(path))
+            self.__map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self.__read_index(size)
+        except ValueError:
+            self.close()
+            raise
+    
+    def __read_index(self, size):
+        """
+        Read the keys and offsets of the records.
+        
+        Args:
+            size (int): Size of the file
+        
+        Raises:
+            ValueError: If the header or the index is damaged
+        """
+        magic, version, reserved, count, key_offset, key_length = \
+            HEADER.unpack_from(self.__map)
+        if magic != MAGIC:
+            raise ValueError("{} is not a snapshot".format(self.path))
+        if version != VERSION:
+            raise ValueError("{} has unknown snapshot version {}".format(
+                self.path, version))
+        offsets_start = key_offset + key_length
+        if offsets_start + 8 * (count + 1) != size:
+            raise ValueError("{} is truncated".format(self.path))
+        
+        offsets = array('Q')
+        offsets.frombytes(self.__map[offsets_start:])
+        if sys.byteorder != 'little':
+            offsets.byteswap()
+        if offsets[0] != HEADER.size or offsets[-1] != key_offset:
+            raise ValueError("{} has a damaged index".format(self.path))
+        keys = self.__map[key_offset:offsets_start].decode('utf-8')
+        keys = keys.split("\n") if count else []
+        if len(keys) != count:
+            raise ValueError("{} has a damaged index".format(self.path))
+        self.__offsets = offsets
+        self.__positions = dict(zip(keys, range(count)))
+    
+    def __len__(self):
+        """
+        Return the number of records.
+        """
+        return len(self.__positions)
+    
+    def __contains__(self, key):
+        """
+        Tell whether a record is stored under key.
+        """
+        return key in self.__positions
+    
+    def __enter__(self):
+        """
+        Return the snapshot itself.
+        """
+        return self
+    
+    def __exit__(self, *exc_info):
+        """
+        Close the snapshot.
+        """
+        self.close()
+        return False
+    
+    def keys(self):
+        """
+        Return the keys of the records.
+        
+        Returns:
+            list: Storage keys, in file order
+        """
+        return list(self.__positions)
+    
+    def raw(self, key):
+        """
+        Return the JSON encoding of a record, without decoding it.
+        
+        Args:
+            key (str): Storage key <class name>.id
+        
+        Returns:
+            bytes: JSON of the record
+        
+        Raises:
+            KeyError: If no record is stored under key
+        """
+        position = self.__positions[key]
+        return self.__map[self.__offsets[position]:
+                          self.__offsets[position + 1]]
+    
+    def record(self, key, codec=None):
+        """
+        Decode a record.
+        
+        Args:
+            key (str): Storage key <class name>.id
+            codec (Codec): JSON codec, defaults to get_codec()
+        
+        Returns:
+            dict: Serialized object
+        
+        Raises:
+            KeyError: If no record is stored under key
+        """
+        if codec is None:
+            codec = get_codec()
+        return codec.loads(self.raw(key))
+    
+    def records(self, codec=None):
+        """
+        Decode every record.
+        
+        Args:
+            codec (Codec): JSON codec, defaults to get_codec()
+        
+        Returns:
+            dict: Serialized objects keyed by <class name>.id
+        """
+        return dict(self.iter_records(codec))
+    
+    def iter_records(self, codec=None):
+        """
+        Decode the records one at a time.
+        
+        Args:
+            codec (Codec): JSON codec, defaults to get_codec()
+        
+        Yields:
+            tuple: (<class name>.id, serialized object), in file order
+        """
+        if codec is None:
+            codec = get_codec()
+        for key in self.__positions:
+            yield key, codec.loads(self.raw(key))
+    
+    def close(self):
+        """
+        Unmap the file.
+        """
+        self.__map.close()
+
+
+def convert(source, target, codec=None):
+    """
+    Convert a JSON storage file to a binary snapshot, or back.
+    
+    The direction is picked from the content of source.
+    
+    Args:
+        source (str): File to read
+        target (str): File to write
+        codec (Codec): JSON codec, defaults to get_codec()
+    
+    Returns:
+        int: Number of records converted
+    """
+    if codec is None:
+        codec = get_codec()
+    if is_snapshot(source):
+        with Snapshot(source) as snapshot:
+            objects_dict = snapshot.records(codec)
+        content = codec.dumps(objects_dict).encode('utf-8')
+    else:
+        with open(source, 'r', encoding='utf-8') as f:
+            objects_dict = codec.loads(f.read())
+        content = dump((key, codec.dumps(record).encode('utf-8'))
+                       for key, record in objects_dict.items())
+    tmp_path = target + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(content)
+    os.replace(tmp_path, target)
+    return len(objects_dict)
+
+
+def main(argv=None):
+    """
+    Convert a storage file from the command line.
+    
+    Args:
+        argv (list): Command line arguments, defaults to sys.argv[1:]
+    """
+    parser = argparse.ArgumentParser(
+        description="Convert a storage file between JSON and the binary "
+                    "snapshot format.")
+    parser.add_argument('source', help="JSON file or binary snapshot")
+    parser.add_argument('target', help="file to write in the other format")
+    args = parser.parse_args(argv)
+    count = convert(args.source, args.target)
+    print("{} records written to {}".format(count, args.target))
+
+
+if __name__ == '__main__':
+    main()
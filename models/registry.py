@@ -0,0 +1,183 @@
+#!/usr/bin/python3
+"""
+Model registry for AirBnB clone project.
+
+BaseModel and every class derived from it are registered here when
+they are defined (see BaseModel.__init_subclass__), so that the storage
+engines, the console and serialization find a class from its name in
+one dictionary lookup, and share the metadata cached for it.
+
+The model modules of the models package are imported the first time
+the whole set of models is asked for, by models(); adding a model only
+takes a module defining a subclass of BaseModel in the package.
+"""
+
+import importlib
+import pkgutil
+import threading
+
+# Metadata of the registered models keyed by class name
+_INFO = {}
+# The registered classes keyed by class name, returned by models()
+_CLASSES = {}
+_discovered = False
+_discover_lock = threading.Lock()
+
+
+class ModelInfo:
+    """
+    ModelInfo class holding the metadata cached for a model class.
+    
+    Attributes:
+        cls: Model class
+        name (str): Name of the class, used in storage keys
+        fields (tuple): id, created_at, updated_at and the public, non
+            callable class attributes of the model, see schema()
+        defaults (dict): Class attribute values of the fields after
+            the first three
+        serializer: Function returning the to_dict() of an instance,
+            set by models.base_model when the class is defined
+        deserializer: Function filling an instance from the keyword
+            arguments of its constructor, set likewise
+    """
+    
+    def __init__(self, cls):
+        """
+        Initialize ModelInfo instance.
+        
+        Args:
+            cls: Model class
+        """
+        self.cls = cls
+        self.name = cls.__name__
+        self.fields = schema(cls)
+        self.defaults = {name: getattr(cls, name)
+                         for name in self.fields[3:]}
+        self.serializer = None
+        self.deserializer = None
+    
+    def __repr__(self):
+        """
+        Return the representation of the metadata.
+        """
+        return "<ModelInfo {} {}>".format(self.name, self.fields)
+
+
+def schema(cls):
+    """
+    Return the attributes every instance of a model has.
+    
+    Args:
+        cls: Model class
+    
+    Returns:
+        tuple: id, created_at, updated_at and the public, non callable
+        class attributes of the model
+    """
+    fields = ['id', 'created_at', 'updated_at']
+    for klass in reversed(cls.__mro__):
+        for name, value in vars(klass).items():
+            if not name.startswith('_') and not callable(value) and \
+                    not isinstance(value, (property, staticmethod,
+                                           classmethod)) and \
+                    name not in fields:
+                fields.append(name)
+    return tuple(fields)
+
+
+def register(cls):
+    """
+    Register a model class under its name.
+    
+    A class defined later with the same name replaces the previous one.
+    
+    Args:
+        cls: Model class
+    
+    Returns:
+        ModelInfo: The metadata of the class
+    """
+    info = ModelInfo(cls)
+    _INFO[info.name] = info
+    _CLASSES[info.name] = cls
+    # Read back through type(obj).__dict__, so that an instance of an
+    # unregistered class never uses the metadata of a parent
+    cls._model_info = info
+    return info
+
+
+def unregister(cls):
+    """
+    Remove a model class from the registry, e.g. one defined by a test.
+    
+    Args:
+        cls: Model class or class name
+    """
+    name = cls if isinstance(cls, str) else cls.__name__
+    _INFO.pop(name, None)
+    _CLASSES.pop(name, None)
+
+
+def discover():
+    """
+    Import the modules of the models package, registering the models
+    they define. Only the first call imports anything.
+    """
+    global _discovered
+    if _discovered:
+        return
+    with _discover_lock:
+        if _discovered:
+            return
+        import models
+        for module in pkgutil.iter_modules(models.__path__):
+            if not module.ispkg:
+                importlib.import_module("models." + module.name)
+        _discovered = True
+
+
+def models():
+    """
+    Return every model class.
+    
+    Returns:
+        dict: Classes keyed by class name; the registry itself, which
+        must not be changed
+    """
+    discover()
+    return _CLASSES
+
+
+def get_model(name):
+    """
+    Return a model class from its name.
+    
+    Args:
+        name (str): Name of the class
+    
+    Returns:
+        class: The model class, or None if there is none of that name
+    """
+    cls = _CLASSES.get(name)
+    if cls is None and not _discovered:
+        cls = models().get(name)
+    return cls
+
+
+def model_info(cls):
+    """
+    Return the metadata of a model class.
+    
+    Args:
+        cls: Model class or class name
+    
+    Returns:
+        ModelInfo: The metadata
+    
+    Raises:
+        KeyError: If the class is not a registered model
+    """
+    name = cls if isinstance(cls, str) else cls.__name__
+    if name not in _INFO:
+        discover()
+    return _INFO[name]
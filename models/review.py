@@ -0,0 +1,24 @@
+#!/usr/bin/python3
+"""
+Review class for AirBnB clone project.
+
+This module contains the Review class that inherits from BaseModel
+and defines review-specific attributes.
+"""
+
+from models.base_model import BaseModel
+
+
+class Review(BaseModel):
+    """
+    Review class that inherits from BaseModel.
+    
+    Public class attributes:
+        place_id: string - empty string (it will be the Place.id)
+        user_id: string - empty string (it will be the User.id)
+        text: string - empty string
+    """
+    
+    place_id = ""
+    user_id = ""
+    text = ""
@@ -0,0 +1,20 @@
+#!/usr/bin/python3
+"""
+State class for AirBnB clone project.
+
+This module contains the State class that inherits from BaseModel
+and defines state-specific attributes.
+"""
+
+from models.base_model import BaseModel
+
+
+class State(BaseModel):
+    """
+    State class that inherits from BaseModel.
+    
+    Public class attributes:
+        name: string - empty string
+    """
+    
+    name = ""
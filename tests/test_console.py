@@ -0,0 +1,155 @@
+#!/usr/bin/python3
+"""
+Unit tests for the command interpreter.
+
+This module contains unit tests for the HBNBCommand class.
+"""
+
+import json
+import unittest
+from io import StringIO
+from unittest.mock import patch
+from console import HBNBCommand
+from models import storage
+from models.user import User
+
+
+class TestConsoleAll(unittest.TestCase):
+    """
+    Test cases for the all command.
+    """
+    
+    def setUp(self):
+        """
+        Create a few users.
+        """
+        self.users = [User() for number in range(5)]
+    
+    def tearDown(self):
+        """
+        Remove the users from storage.
+        """
+        for user in self.users:
+            storage.delete(user)
+    
+    def run_command(self, line):
+        """
+        Run a console command and return what it printed.
+        """
+        with patch('sys.stdout', new=StringIO()) as out:
+            HBNBCommand().onecmd(line)
+        return out.getvalue()
+    
+    def test_same_output_as_list(self):
+        """
+        Test that the streamed output is the printed list of str.
+        """
+        expected = StringIO()
+        print([str(obj) for obj in storage.all().values()], file=expected)
+        self.assertEqual(self.run_command("all"), expected.getvalue())
+        
+        expected = StringIO()
+        print([str(obj) for obj in storage.all(User).values()],
+              file=expected)
+        self.assertEqual(self.run_command("all User"), expected.getvalue())
+    
+    def test_limit_offset_page(self):
+        """
+        Test the cursor options.
+        """
+        users = [str(obj) for obj in storage.all(User).values()]
+        self.assertEqual(self.run_command("all User --limit 2"),
+                         str(users[:2]) + "\n")
+        self.assertEqual(self.run_command("all User --offset 1 --limit 2"),
+                         str(users[1:3]) + "\n")
+        self.assertEqual(self.run_command("all User --limit 2 --page 2"),
+                         str(users[2:4]) + "\n")
+        self.assertEqual(self.run_command("all User --offset 100000"),
+                         "[]\n")
+    
+    def test_jsonl(self):
+        """
+        Test the JSON lines output.
+        """
+        lines = self.run_command("all User --jsonl").splitlines()
+        records = [json.loads(line) for line in lines]
+        self.assertEqual(records,
+                         [obj.to_dict() for obj in storage.all(User).values()])
+    
+    def test_errors(self):
+        """
+        Test the messages for bad classes and options.
+        """
+        self.assertEqual(self.run_command("all Nope"),
+                         "** class doesn't exist **\n")
+        self.assertEqual(self.run_command("all User --limit x"),
+                         "** --limit must be a number **\n")
+        self.assertEqual(self.run_command("all --bogus"),
+                         "** unknown option: --bogus **\n")
+
+
+class TestConsoleBatch(unittest.TestCase):
+    """
+    Test cases for the batch mode.
+    """
+    
+    def test_saves_once_per_batch(self):
+        """
+        Test that a script is run with one save per batch of commands.
+        """
+        script = ["create User\n"] * 5 + ["\n", "show User nope\n",
+                                         "quit\n", "create User\n"]
+        with patch.object(storage, '_write_file') as write, \
+                patch('sys.stdout', new=StringIO()) as out, \
+                patch('sys.stderr', new=StringIO()) as err:
+            count = HBNBCommand().run_batch(script, flush_every=2)
+        lines = out.getvalue().splitlines()
+        for user_id in lines[:5]:
+            storage.delete(storage.get(User, user_id))
+        self.assertEqual(count, 7)
+        self.assertEqual(lines[5], "** no instance found **")
+        self.assertEqual(len(lines), 6)
+        self.assertEqual(write.call_count, 3)
+        self.assertIn("7 commands in", err.getvalue())
+        self.assertIn("4 flushes", err.getvalue())
+
+
+class TestConsoleModels(unittest.TestCase):
+    """
+    Test cases for the model classes known to the console.
+    """
+    
+    def test_every_model_can_be_created(self):
+        """
+        Test that the console finds every registered model.
+        """
+        console = HBNBCommand()
+        for class_name in ("State", "City", "Amenity", "Place", "Review"):
+            with patch.object(storage, 'save'), \
+                    patch('sys.stdout', new=StringIO()) as out:
+                console.onecmd("create {}".format(class_name))
+                obj_id = out.getvalue().strip()
+                console.onecmd("show {} {}".format(class_name, obj_id))
+            self.assertIn("[{}] ({})".format(class_name, obj_id),
+                          out.getvalue())
+            storage.delete(storage.get(class_name, obj_id))
+
+
+class TestConsoleQuit(unittest.TestCase):
+    """
+    Test cases for leaving the console.
+    """
+    
+    def test_quit_and_eof_flush_storage(self):
+        """
+        Test that quit and EOF write what write-behind left pending.
+        """
+        for line in ("quit", "EOF"):
+            with patch.object(storage, 'flush') as flush, \
+                    patch('sys.stdout', new=StringIO()):
+                self.assertTrue(HBNBCommand().onecmd(line))
+            flush.assert_called_once_with()
+
+
+if __name__ == '__main__':
+    unittest.main()
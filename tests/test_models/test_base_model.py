@@ -9,7 +9,10 @@ to ensure all functionality works as expected.
 import unittest
 import json
 from datetime import datetime
+from unittest.mock import patch
+from models import storage
 from models.base_model import BaseModel
+from models.registry import unregister
 
 
 class TestBaseModel(unittest.TestCase):
@@ -373,6 +376,62 @@ class TestBaseModel(unittest.TestCase):
         self.assertEqual(self.base_model.value, original_value)
         self.assertEqual(self.base_model.id, original_id)
         self.assertEqual(self.base_model.created_at, original_created_at)
+    
+    
+    def test_compiled_deserializer(self):
+        """
+        Test that the kwargs fast path builds the same instance without
+        reporting attribute changes to storage.
+        """
+        record = self.base_model.to_dict()
+        record['created_at'] = self.base_model.created_at
+        with patch.object(storage, 'mark_dirty') as mark_dirty:
+            model = BaseModel(**record)
+        mark_dirty.assert_not_called()
+        self.assertEqual(model.__dict__, self.base_model.__dict__)
+        self.assertEqual(model.to_dict(), self.base_model.to_dict())
+    
+    def test_init_reports_no_changes(self):
+        """
+        Test that a new instance is stored without reporting its first
+        attributes as changes.
+        """
+        with patch.object(storage, 'before_change') as before_change, \
+                patch.object(storage, 'mark_dirty') as mark_dirty:
+            model = BaseModel()
+        before_change.assert_not_called()
+        mark_dirty.assert_not_called()
+        self.assertIs(storage.get(BaseModel, model.id), model)
+        storage.delete(model)
+    
+    def test_save_does_not_store_again(self):
+        """
+        Test that save() neither brings back a deleted instance nor
+        stores one built from a dictionary.
+        """
+        with patch.object(storage, 'save'):
+            storage.delete(self.base_model)
+            self.base_model.save()
+            self.assertIsNone(storage.get(BaseModel, self.base_model.id))
+            copy = BaseModel(**self.base_model.to_dict())
+            copy.save()
+            self.assertIsNone(storage.get(BaseModel, copy.id))
+    
+    def test_custom_setattr_deserializer(self):
+        """
+        Test that a model defining __setattr__ gets every attribute
+        through it.
+        """
+        class Tracked(BaseModel):
+            def __setattr__(self, name, value):
+                super().__setattr__(name, value)
+                self.__dict__.setdefault('_seen', []).append(name)
+        
+        unregister(Tracked)
+        record = self.base_model.to_dict()
+        model = Tracked(**record)
+        self.assertEqual(model._seen, ['id', 'created_at', 'updated_at'])
+        self.assertEqual(model.created_at, self.base_model.created_at)
 
 
 if __name__ == '__main__':
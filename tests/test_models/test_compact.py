@@ -0,0 +1,104 @@
+#!/usr/bin/python3
+"""
+Unit tests for the compact model classes.
+
+This module contains unit tests for the __slots__ based variants of
+the model classes built by models.compact.
+"""
+
+import unittest
+from datetime import datetime
+from models import storage
+from models.base_model import BaseModel
+from models.compact import compact, schema
+from models.engine.file_storage import _model_classes
+from models.user import User
+
+
+class TestCompact(unittest.TestCase):
+    """
+    Test cases for compact model classes.
+    """
+    
+    def test_schema(self):
+        """
+        Test that the slots hold the common and declared attributes.
+        """
+        self.assertEqual(schema(BaseModel), ('id', 'created_at', 'updated_at'))
+        self.assertEqual(schema(User), ('id', 'created_at', 'updated_at',
+                                        'email', 'password', 'first_name',
+                                        'last_name'))
+    
+    def test_class_is_built_once(self):
+        """
+        Test that compact() caches the class it builds.
+        """
+        CompactUser = compact(User)
+        self.assertIs(compact(User), CompactUser)
+        self.assertIs(compact(CompactUser), CompactUser)
+        self.assertEqual(CompactUser.__name__, "User")
+        self.assertIs(CompactUser.model, User)
+        self.assertIsNot(compact(BaseModel), CompactUser)
+    
+    def test_no_instance_dict(self):
+        """
+        Test that compact instances do not carry a __dict__.
+        """
+        user = compact(User)()
+        self.assertFalse(hasattr(user, '__dict__'))
+        self.assertIsInstance(user.created_at, datetime)
+        self.assertEqual(user.email, "")
+    
+    def test_overflow_attributes(self):
+        """
+        Test that undeclared attributes go to the overflow dictionary.
+        """
+        user = compact(User)()
+        user.first_name = "Betty"
+        user.nickname = "bet"
+        self.assertEqual(user.nickname, "bet")
+        self.assertEqual(user.to_dict()['nickname'], "bet")
+        del user.nickname
+        with self.assertRaises(AttributeError):
+            user.nickname
+    
+    def test_same_serialized_form(self):
+        """
+        Test that to_dict(), __str__ and the kwargs constructor behave
+        like the regular model.
+        """
+        user = User()
+        user.email = "compact@hbnb.io"
+        user.score = 3
+        CompactUser = compact(User)
+        small = CompactUser(**user.to_dict())
+        self.assertEqual(small.to_dict(), user.to_dict())
+        self.assertEqual(str(small), "[User] ({}) {}".format(
+            user.id, small._get_state()))
+        self.assertEqual(User(**small.to_dict()).to_dict(), user.to_dict())
+    
+    def test_storage_round_trip(self):
+        """
+        Test that storage registers and rolls back compact instances,
+        and hands out compact classes when asked to.
+        """
+        user = compact(User)()
+        key = "User.{}".format(user.id)
+        self.assertIs(storage.all()[key], user)
+        with self.assertRaises(ValueError):
+            with storage.transaction():
+                user.email = "rolled@back.io"
+                user.extra = 1
+                raise ValueError("abort")
+        self.assertEqual(user.email, "")
+        self.assertFalse(hasattr(user, "extra"))
+        
+        classes = _model_classes(compact=True)
+        self.assertIs(classes['User'], compact(User))
+        self.assertIsInstance(classes['User'](**user.to_dict()),
+                              compact(User))
+        storage.delete(user)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,4 @@
+#!/usr/bin/python3
+"""
+Tests package for the storage engines of the AirBnB clone project.
+"""
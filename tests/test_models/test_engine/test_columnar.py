@@ -0,0 +1,133 @@
+#!/usr/bin/python3
+"""
+Unit tests for the columnar view.
+
+This module contains unit tests for ColumnStore and Table, run against
+a storage file written by hand in a temporary directory.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import date
+from unittest.mock import patch
+from models.engine import columnar
+from models.engine.columnar import ColumnStore
+
+
+def as_list(values):
+    """
+    Return the values of a column as a list, whatever its backend.
+    """
+    return values.tolist() if hasattr(values, 'tolist') else list(values)
+
+
+class TestColumnStore(unittest.TestCase):
+    """
+    Test cases for ColumnStore and Table classes.
+    """
+    
+    def setUp(self):
+        """
+        Write a storage file and its journal to a temporary directory.
+        """
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "file.json")
+        objects = {}
+        for number, (day, email) in enumerate([
+                ("2024-01-01", "a@hbnb.io"), ("2024-01-01", "b@alu.io"),
+                ("2024-01-02", "c@hbnb.io"), ("2024-01-03", None)]):
+            record = {'__class__': 'User', 'id': str(number),
+                      'created_at': day + "T10:00:00.000001",
+                      'updated_at': day + "T11:00:00"}
+            if email is not None:
+                record['email'] = email
+            objects["User.{}".format(number)] = record
+        objects["BaseModel.x"] = {'__class__': 'BaseModel', 'id': 'x',
+                                  'created_at': "2024-01-01T00:00:00",
+                                  'updated_at': "2024-01-01T00:00:00"}
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(objects, f)
+        with open(self.path + ".log", 'w', encoding='utf-8') as f:
+            f.write(json.dumps({"op": "del", "key": "BaseModel.x"}) + "\n")
+    
+    def tearDown(self):
+        """
+        Remove the temporary directory.
+        """
+        shutil.rmtree(self.tmp_dir)
+    
+    def check_store(self):
+        """
+        Check the columns and the scans with the current backend.
+        """
+        store = ColumnStore.load(self.path)
+        self.assertEqual(set(store.tables), {"User"})
+        self.assertEqual(store["BaseModel"].count(), 0)
+        users = store["User"]
+        self.assertEqual(len(users), 4)
+        self.assertEqual(as_list(users['email']),
+                         ["a@hbnb.io", "b@alu.io", "c@hbnb.io", ""])
+        
+        by_day = users.group_count(users.day('created_at'))
+        self.assertEqual({str(day): count for day, count in by_day.items()},
+                         {"2024-01-01": 2, "2024-01-02": 1, "2024-01-03": 1})
+        self.assertEqual(users.where('email', "c@hbnb.io").count(), 1)
+        
+        domains = [email.partition('@')[2] for email in users['email']]
+        self.assertEqual(users.group_count(domains),
+                         {"hbnb.io": 2, "alu.io": 1, "": 1})
+        hbnb = users.filter([domain == "hbnb.io" for domain in domains])
+        self.assertEqual(as_list(hbnb['id']), ["0", "2"])
+        self.assertEqual(hbnb.group_count('email'),
+                         {"a@hbnb.io": 1, "c@hbnb.io": 1})
+        return users
+    
+    def test_list_columns(self):
+        """
+        Test the pure Python columns used without NumPy.
+        """
+        with patch.object(columnar, 'np', None):
+            users = self.check_store()
+            self.assertEqual(users.day('updated_at')[0], date(2024, 1, 1))
+    
+    @unittest.skipIf(columnar.np is None, "NumPy is not installed")
+    def test_numpy_columns(self):
+        """
+        Test the NumPy columns, with datetime64 timestamps.
+        """
+        users = self.check_store()
+        self.assertEqual(users['created_at'].dtype,
+                         columnar.np.dtype('datetime64[us]'))
+    
+    def test_rotated_journal_and_late_attributes(self):
+        """
+        Test that a journal left by an interrupted compaction is applied
+        before the live one, and that an attribute first seen in a later
+        record gets the default in the earlier ones.
+        """
+        for suffix, name in ((".log.compacting", "Older"), (".log", "Newer")):
+            with open(self.path + suffix, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({"op": "set", "key": "User.9", "value": {
+                    '__class__': 'User', 'id': "9", 'first_name': name,
+                    'created_at': "2024-01-04T00:00:00",
+                    'updated_at': "2024-01-04T00:00:00"}}) + "\n")
+        with patch.object(columnar, 'np', None):
+            users = ColumnStore.load(self.path)["User"]
+        self.assertEqual(len(users), 5)
+        self.assertEqual(as_list(users['first_name']),
+                         ["", "", "", "", "Newer"])
+    
+    def test_no_instances(self):
+        """
+        Test that loading builds no model instance.
+        """
+        with patch('models.base_model.BaseModel.__init__') as init:
+            ColumnStore.load(self.path)
+        init.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
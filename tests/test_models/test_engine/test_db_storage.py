@@ -0,0 +1,202 @@
+#!/usr/bin/python3
+"""
+Unit tests for DBStorage class.
+
+This module contains unit tests for the SQLite storage engine, run
+against a temporary database.
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+import models.base_model
+from models.base_model import BaseModel
+from models.engine.db_storage import DBStorage
+from models.place import Place
+from models.user import User
+
+
+class TestDBStorage(unittest.TestCase):
+    """
+    Test cases for DBStorage class.
+    """
+    
+    def setUp(self):
+        """
+        Make the models use a DBStorage on a temporary database.
+        """
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "hbnb.db")
+        self.storage = DBStorage(self.path)
+        self.storage.reload()
+        patcher = patch.object(models.base_model, 'storage', self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def tearDown(self):
+        """
+        Close and remove the temporary database.
+        """
+        self.storage.close()
+        shutil.rmtree(self.tmp_dir)
+    
+    def reopen(self):
+        """
+        Return a new DBStorage on the same database.
+        """
+        storage = DBStorage(self.path)
+        storage.reload()
+        self.addCleanup(storage.close)
+        return storage
+    
+    def count_rows(self, table):
+        """
+        Return the number of rows of a table, read independently.
+        """
+        with sqlite3.connect(self.path) as connection:
+            return connection.execute(
+                'SELECT COUNT(*) FROM "{}"'.format(table)).fetchone()[0]
+    
+    def test_reload_creates_tables(self):
+        """
+        Test that reload() creates one table per model class.
+        """
+        self.assertEqual(self.count_rows("BaseModel"), 0)
+        self.assertEqual(self.count_rows("User"), 0)
+    
+    def test_save_writes_pending_objects(self):
+        """
+        Test that new objects are only written by save().
+        """
+        user = User()
+        user.email = "db@hbnb.io"
+        BaseModel()
+        self.assertEqual(self.count_rows("User"), 0)
+        self.storage.save()
+        self.assertEqual(self.count_rows("User"), 1)
+        self.assertEqual(self.count_rows("BaseModel"), 1)
+        
+        loaded = self.reopen().get(User, user.id)
+        self.assertIsInstance(loaded, User)
+        self.assertEqual(loaded.email, "db@hbnb.io")
+        self.assertEqual(loaded.created_at, user.created_at)
+    
+    def test_all(self):
+        """
+        Test that all() returns stored and pending objects.
+        """
+        user = User()
+        self.storage.save()
+        model = BaseModel()
+        objects = self.storage.all()
+        self.assertEqual(set(objects), {"User.{}".format(user.id),
+                                        "BaseModel.{}".format(model.id)})
+        self.assertEqual(list(self.storage.all("User")),
+                         ["User.{}".format(user.id)])
+        self.assertEqual(list(self.reopen().all(BaseModel)), [])
+    
+    def test_update_and_delete(self):
+        """
+        Test that attribute changes and deletions reach the database.
+        """
+        user = User()
+        other = User()
+        self.storage.save()
+        user.first_name = "Changed"
+        self.storage.delete(other)
+        self.storage.save()
+        
+        storage = self.reopen()
+        self.assertEqual(storage.get("User", user.id).first_name, "Changed")
+        self.assertIsNone(storage.get("User", other.id))
+        self.assertIsNone(self.storage.get("User", other.id))
+    
+    def test_stream(self):
+        """
+        Test that stream() yields the objects of all(), stored first.
+        """
+        stored = User()
+        self.storage.save()
+        pending = User()
+        stored.first_name = "Changed"
+        self.assertEqual(list(self.storage.stream(User)), [stored, pending])
+        self.assertEqual(list(self.storage.stream()),
+                         list(self.storage.all().values()))
+    
+    def test_get_reuses_instance(self):
+        """
+        Test that reading the same row twice returns the same object.
+        """
+        user = User()
+        self.storage.save()
+        storage = self.reopen()
+        first = storage.get(User, user.id)
+        self.assertIs(storage.get(User, user.id), first)
+        self.assertIs(storage.all(User)["User.{}".format(user.id)], first)
+    
+    def test_transaction(self):
+        """
+        Test that a transaction writes once and rolls back on error.
+        """
+        with self.storage.transaction():
+            users = [User() for number in range(5)]
+            for user in users:
+                user.save()
+            self.assertEqual(self.count_rows("User"), 0)
+        self.assertEqual(self.count_rows("User"), 5)
+        
+        with self.assertRaises(RuntimeError):
+            with self.storage.transaction():
+                users[0].email = "rolled@back.io"
+                users[0].save()
+                User().save()
+                raise RuntimeError("abort")
+        self.assertNotIn("email", users[0].__dict__)
+        self.storage.save()
+        self.assertEqual(self.count_rows("User"), 5)
+        self.assertEqual(self.reopen().find(User, email="rolled@back.io"), [])
+    
+    def test_find(self):
+        """
+        Test attribute queries in SQL, including class defaults.
+        """
+        alice = User()
+        alice.email = "alice@hbnb.io"
+        User().email = "bob@hbnb.io"
+        blank = User()
+        self.storage.save()
+        storage = self.reopen()
+        self.assertEqual([user.id for user in
+                          storage.find(User, email="alice@hbnb.io")],
+                         [alice.id])
+        self.assertEqual([user.id for user in storage.find(User, email="")],
+                         [blank.id])
+        self.assertEqual(len(storage.find(User)), 3)
+    
+    def test_find_lists_and_timestamps(self):
+        """
+        Test queries on list attributes and on timestamps given as ISO
+        strings.
+        """
+        place = Place()
+        place.amenity_ids = ["pool", "wifi"]
+        bare = Place()
+        self.storage.save()
+        storage = self.reopen()
+        self.assertEqual([obj.id for obj in storage.find(
+            Place, amenity_ids=["pool", "wifi"])], [place.id])
+        self.assertEqual([obj.id for obj in storage.find(
+            Place, amenity_ids=[])], [bare.id])
+        self.assertEqual([obj.id for obj in storage.find(
+            Place, created_at=place.created_at.isoformat())], [place.id])
+        with self.assertRaises(ValueError):
+            storage.find(Place, amenity_ids=[object()])
+        with self.assertRaises(ValueError):
+            storage.find(Place, updated_at=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
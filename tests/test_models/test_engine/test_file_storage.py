@@ -0,0 +1,1327 @@
+#!/usr/bin/python3
+"""
+Unit tests for FileStorage class.
+
+This module contains unit tests for the FileStorage engine, run against
+a temporary file so that the project's file.json is left untouched.
+"""
+
+import asyncio
+import gzip
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from datetime import timedelta
+from unittest.mock import patch
+from models import storage
+from models.base_model import BaseModel
+from models.engine.codec import CODECS, get_codec
+from models.engine.file_storage import FileStorage
+from models.engine.snapshot import Snapshot, is_snapshot
+from models.user import User
+
+
+class TestFileStorage(unittest.TestCase):
+    """
+    Test cases for FileStorage class.
+    """
+    
+    # Class level state of FileStorage and the value it starts with
+    STATE = {
+        '_FileStorage__objects': dict,
+        '_FileStorage__dirty': dict,
+        '_FileStorage__encoded': dict,
+        '_FileStorage__deleted': set,
+        '_FileStorage__by_class': dict,
+        '_FileStorage__indexes': dict,
+        '_FileStorage__undo': list,
+        '_FileStorage__generation': lambda: None,
+        '_FileStorage__unloaded': set,
+        '_FileStorage__snapshot': lambda: None,
+        '_FileStorage__reload_pending': bool,
+        '_FileStorage__retired': lambda: None,
+        '_FileStorage__behind_saves': int,
+        '_FileStorage__behind_since': lambda: None,
+        '_FileStorage__flush_stats': lambda: {
+            'flushes': 0, 'errors': 0, 'last_ms': None, 'max_ms': 0.0,
+            'total_ms': 0.0},
+    }
+    
+    def setUp(self):
+        """
+        Point the storage at an empty temporary file.
+        """
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "file.json")
+        self.saved_path = FileStorage._FileStorage__file_path
+        self.saved_journal = storage.journal
+        self.saved_state = {}
+        for name, factory in self.STATE.items():
+            self.saved_state[name] = getattr(FileStorage, name)
+            setattr(FileStorage, name, factory())
+        FileStorage._FileStorage__file_path = self.path
+    
+    def tearDown(self):
+        """
+        Restore the storage state changed by setUp.
+        """
+        storage.journal = self.saved_journal
+        storage._wait_compaction()
+        FileStorage._FileStorage__file_path = self.saved_path
+        for name, value in self.saved_state.items():
+            setattr(FileStorage, name, value)
+        shutil.rmtree(self.tmp_dir)
+    
+    def read_file(self):
+        """
+        Return the decoded content of the storage file.
+        """
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def start_process(self, code):
+        """
+        Start Python code in another process sharing the storage file.
+        """
+        env = dict(os.environ, HBNB_STORAGE_SHARED="1",
+                   PYTHONPATH=os.getcwd())
+        return subprocess.Popen([sys.executable, "-c",
+                                 "from models import storage\n"
+                                 "from models.user import User\n" + code],
+                                cwd=self.tmp_dir, env=env)
+    
+    def run_process(self, code):
+        """
+        Run Python code in another process and wait for it.
+        """
+        self.assertEqual(self.start_process(code).wait(), 0)
+    
+    def forget_objects(self):
+        """
+        Drop the objects held in memory, as if the program restarted.
+        """
+        FileStorage._FileStorage__objects = {}
+        storage.reindex()
+    
+    def test_new_registers_object(self):
+        """
+        Test that new() stores objects under <class name>.id.
+        """
+        user = User()
+        self.assertIs(storage.all()["User.{}".format(user.id)], user)
+    
+    def test_save_and_reload(self):
+        """
+        Test that saved objects come back from reload().
+        """
+        model = BaseModel()
+        model.name = "Reloaded"
+        model.save()
+        self.assertIn("BaseModel.{}".format(model.id), self.read_file())
+        
+        self.forget_objects()
+        storage.reload()
+        reloaded = storage.all()["BaseModel.{}".format(model.id)]
+        self.assertIsNot(reloaded, model)
+        self.assertEqual(reloaded.name, "Reloaded")
+        self.assertEqual(reloaded.created_at, model.created_at)
+    
+    def test_deferred_reload(self):
+        """
+        Test that defer_reload() reads the file on the first use of the
+        objects, keeping both the stored and the new objects.
+        """
+        stored = User()
+        stored.save()
+        self.forget_objects()
+        storage.defer_reload()
+        self.assertEqual(FileStorage._FileStorage__objects, {})
+        
+        created = User()
+        self.assertFalse(FileStorage._FileStorage__reload_pending)
+        self.assertEqual(set(storage.all()), {
+            "User.{}".format(stored.id), "User.{}".format(created.id)})
+        
+        storage.defer_reload()
+        storage.reload()
+        self.assertFalse(FileStorage._FileStorage__reload_pending)
+    
+    def test_deferred_reload_entry_points(self):
+        """
+        Test that every public way to the objects runs the deferred
+        reload first.
+        """
+        stored = User()
+        stored.save()
+        calls = [
+            storage.all, storage.counts, storage.dirty,
+            lambda: list(storage.stream(User)),
+            lambda: storage.get(User, stored.id),
+            lambda: storage.find(User, id=stored.id),
+            lambda: storage.find_range(User, "id"),
+            lambda: storage.add_index(User, "email"),
+            lambda: storage.transaction().__enter__(),
+            lambda: asyncio.run(storage.asave()),
+            lambda: storage.aall(),
+        ]
+        for call in calls:
+            self.forget_objects()
+            storage.defer_reload()
+            call()
+            self.assertFalse(FileStorage._FileStorage__reload_pending)
+            self.assertIn("User.{}".format(stored.id),
+                          FileStorage._FileStorage__objects)
+    
+    @patch.object(storage, 'lazy', True)
+    def test_lazy_reload_defers_instances(self):
+        """
+        Test that lazy reload() only builds instances when accessed.
+        """
+        user = User()
+        user.email = "lazy@hbnb.io"
+        other = BaseModel()
+        storage.save()
+        user_key = "User.{}".format(user.id)
+        other_key = "BaseModel.{}".format(other.id)
+        
+        self.forget_objects()
+        storage.reload()
+        objects = storage.all()
+        self.assertIn(user_key, objects)
+        self.assertEqual(len(objects), 2)
+        self.assertIs(type(dict.__getitem__(objects, user_key)), dict)
+        
+        loaded = objects[user_key]
+        self.assertIsInstance(loaded, User)
+        self.assertEqual(loaded.email, "lazy@hbnb.io")
+        self.assertIs(objects[user_key], loaded)
+        self.assertIs(type(dict.__getitem__(objects, other_key)), dict)
+        
+        # Entries that were never accessed are written back untouched
+        storage.save()
+        self.assertEqual(self.read_file()[other_key], other.to_dict())
+        self.assertIsInstance(list(objects.values())[1], BaseModel)
+    
+    def test_eager_reload(self):
+        """
+        Test that reload() builds every instance when lazy is disabled.
+        """
+        model = BaseModel()
+        storage.save()
+        self.forget_objects()
+        with patch.object(storage, 'lazy', False):
+            storage.reload()
+        value = dict.__getitem__(storage.all(), "BaseModel.{}".format(model.id))
+        self.assertIsInstance(value, BaseModel)
+    
+    def test_all_by_class(self):
+        """
+        Test that all() can be restricted to one class.
+        """
+        user = User()
+        model = BaseModel()
+        self.assertEqual(storage.all(User), {"User.{}".format(user.id): user})
+        self.assertEqual(storage.all("BaseModel"),
+                         {"BaseModel.{}".format(model.id): model})
+        storage.delete(user)
+        self.assertEqual(storage.all(User), {})
+    
+    @patch.object(storage, 'lazy', True)
+    def test_stream_hydrates_one_at_a_time(self):
+        """
+        Test that stream() yields the objects of all() lazily.
+        """
+        users = [User() for number in range(3)]
+        BaseModel()
+        storage.save()
+        self.forget_objects()
+        storage.reload()
+        objects = storage.all()
+        
+        stream = storage.stream(User)
+        first = next(stream)
+        self.assertEqual(first.id, users[0].id)
+        self.assertIs(type(dict.__getitem__(
+            objects, "User.{}".format(users[1].id))), dict)
+        self.assertEqual([obj.id for obj in stream],
+                         [user.id for user in users[1:]])
+        self.assertEqual(list(storage.stream()), list(objects.values()))
+    
+    def test_find_with_hash_index(self):
+        """
+        Test find() through an attribute index kept up to date on new(),
+        attribute changes and delete().
+        """
+        storage.add_index(User, "email")
+        alice = User()
+        alice.email = "alice@hbnb.io"
+        bob = User()
+        bob.email = "bob@hbnb.io"
+        self.assertEqual(storage.find(User, email="alice@hbnb.io"), [alice])
+        
+        alice.email = "alice@mail.com"
+        self.assertEqual(storage.find(User, email="alice@hbnb.io"), [])
+        self.assertEqual(storage.find(User, email="alice@mail.com"), [alice])
+        storage.delete(bob)
+        self.assertEqual(storage.find(User, email="bob@hbnb.io"), [])
+    
+    def test_find_unhashable_values_with_index(self):
+        """
+        Test that an index does not hide objects holding, or criteria
+        asking for, unhashable values.
+        """
+        storage.add_index(BaseModel, "tags")
+        listed = BaseModel()
+        listed.tags = ["a"]
+        named = BaseModel()
+        named.tags = "a"
+        self.assertEqual(storage.find(BaseModel, tags=["a"]), [listed])
+        self.assertEqual(storage.find(BaseModel, tags="a"), [named])
+        storage.delete(listed)
+        self.assertEqual(storage.find(BaseModel, tags=["a"]), [])
+        self.assertEqual(FileStorage._FileStorage__indexes[
+            "BaseModel"]["tags"].unhashable, {})
+    
+    def test_find_without_index(self):
+        """
+        Test that find() falls back to the objects of the class.
+        """
+        user = User()
+        user.first_name = "Betty"
+        user.last_name = "Holberton"
+        User().first_name = "Betty"
+        found = storage.find("User", first_name="Betty", last_name="Holberton")
+        self.assertEqual(found, [user])
+        self.assertEqual(storage.find(BaseModel, first_name="Betty"), [])
+    
+    @patch.object(storage, 'lazy', True)
+    def test_find_after_lazy_reload(self):
+        """
+        Test that indexes are built from raw entries without hydrating
+        the objects that do not match.
+        """
+        alice = User()
+        alice.email = "alice@hbnb.io"
+        User().email = "bob@hbnb.io"
+        storage.save()
+        self.forget_objects()
+        storage.reload()
+        storage.add_index(User, "email")
+        
+        found = storage.find(User, email="alice@hbnb.io")
+        self.assertEqual([user.id for user in found], [alice.id])
+        raw = [value for value in dict.values(storage.all())
+               if type(value) is dict]
+        self.assertEqual(len(raw), 1)
+    
+    @patch.object(storage, 'lazy', True)
+    def test_find_timestamps_after_lazy_reload(self):
+        """
+        Test that the timestamps of raw entries compare as datetimes.
+        """
+        first = User()
+        second = User()
+        second.created_at = first.created_at + timedelta(seconds=1)
+        storage.save()
+        self.forget_objects()
+        storage.reload()
+        
+        found = storage.find(User, created_at=first.created_at)
+        self.assertEqual([user.id for user in found], [first.id])
+        storage.add_index(User, "created_at", ordered=True)
+        found = storage.find_range(User, "created_at",
+                                   low=second.created_at)
+        self.assertEqual([user.id for user in found], [second.id])
+    
+    def test_find_range(self):
+        """
+        Test range lookups with and without a sorted index.
+        """
+        for number in (5, 1, 3, 4):
+            BaseModel().number = number
+        BaseModel().name = "No number"
+        expected = [3, 4, 5]
+        found = storage.find_range(BaseModel, "number", low=3)
+        self.assertEqual([model.number for model in found], expected)
+        
+        storage.add_index(BaseModel, "number", ordered=True)
+        found = storage.find_range(BaseModel, "number", low=3)
+        self.assertEqual([model.number for model in found], expected)
+        found = storage.find_range(BaseModel, "number", high=3)
+        self.assertEqual([model.number for model in found], [1, 3])
+        found[0].number = 10
+        found = storage.find_range(BaseModel, "number", 4, 10)
+        self.assertEqual([model.number for model in found], [4, 5, 10])
+    
+    def test_delete(self):
+        """
+        Test that delete() removes the object from storage and file.
+        """
+        model = BaseModel()
+        model.save()
+        storage.delete(model)
+        storage.delete(None)
+        storage.save()
+        self.assertNotIn("BaseModel.{}".format(model.id), storage.all())
+        self.assertEqual(self.read_file(), {})
+    
+    def test_mark_dirty_tracks_attributes(self):
+        """
+        Test that setting attributes on stored objects marks them dirty.
+        """
+        model = BaseModel()
+        key = "BaseModel.{}".format(model.id)
+        storage.save()
+        self.assertEqual(storage.dirty(), {})
+        
+        model.name = "Dirty"
+        model.number = 1
+        self.assertEqual(storage.dirty(), {key: {"name", "number"}})
+        storage.save()
+        self.assertEqual(storage.dirty(), {})
+    
+    def test_unstored_objects_are_not_dirty(self):
+        """
+        Test that objects built from a dictionary are not tracked.
+        """
+        original = BaseModel()
+        storage.save()
+        model = BaseModel(**original.to_dict())
+        model.name = "Detached"
+        self.assertEqual(storage.dirty(), {})
+    
+    def test_save_reuses_encoding_of_clean_objects(self):
+        """
+        Test that save() only serializes objects changed since the
+        previous save.
+        """
+        clean = BaseModel()
+        changed = BaseModel()
+        clean.name = "Clean"
+        storage.save()
+        
+        changed.name = "Changed"
+        with patch.object(FileStorage, '_encode', autospec=True,
+                          side_effect=FileStorage._encode) as encode:
+            storage.save()
+        encode.assert_called_once_with(storage, changed)
+        
+        saved = self.read_file()
+        self.assertEqual(saved["BaseModel.{}".format(clean.id)]["name"],
+                         "Clean")
+        self.assertEqual(saved["BaseModel.{}".format(changed.id)]["name"],
+                         "Changed")
+    
+    def test_save_is_atomic(self):
+        """
+        Test that a failed write leaves the previous file intact.
+        """
+        model = BaseModel()
+        storage.save()
+        before = self.read_file()
+        BaseModel()
+        with patch('models.engine.file_storage.os.replace',
+                   side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                storage.save()
+        self.assertEqual(self.read_file(), before)
+        self.assertIn("BaseModel.{}".format(model.id), before)
+    
+    def test_reload_keeps_corrupt_file(self):
+        """
+        Test that an unreadable file is moved aside instead of being
+        overwritten by the next save().
+        """
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write('{"BaseModel.1": {"id": ')
+        with self.assertWarns(RuntimeWarning):
+            storage.reload()
+        self.assertEqual(storage.all(), {})
+        self.assertFalse(os.path.exists(self.path))
+        with open(self.path + ".corrupt", 'r', encoding='utf-8') as f:
+            self.assertEqual(f.read(), '{"BaseModel.1": {"id": ')
+    
+    def test_durability_fsync(self):
+        """
+        Test that every save is forced to disk in fsync mode.
+        """
+        BaseModel()
+        with patch.object(storage, 'durability', "fsync"), \
+                patch('models.engine.file_storage.os.fsync') as fsync:
+            storage.save()
+        # The file and its directory
+        self.assertEqual(fsync.call_count, 2)
+    
+    def test_durability_group(self):
+        """
+        Test that group commit defers the sync to a single flush.
+        """
+        BaseModel()
+        with patch.object(storage, 'durability', "group"), \
+                patch.object(storage, 'group_commit_ms', 60000), \
+                patch('models.engine.file_storage.os.fsync') as fsync:
+            storage.save()
+            storage.save()
+            self.assertEqual(fsync.call_count, 0)
+            storage.sync()
+        self.assertEqual(fsync.call_count, 2)
+        self.assertEqual(len(self.read_file()), 1)
+    
+    def test_durability_os(self):
+        """
+        Test that nothing is forced to disk in the default mode.
+        """
+        BaseModel()
+        with patch('models.engine.file_storage.os.fsync') as fsync:
+            storage.save()
+        fsync.assert_not_called()
+    
+    def test_transaction_saves_once(self):
+        """
+        Test that saves inside a transaction are deferred to its end.
+        """
+        with patch.object(storage, '_write_file',
+                          wraps=storage._write_file) as write_file:
+            with storage.transaction():
+                for number in range(10):
+                    model = BaseModel()
+                    model.number = number
+                    model.save()
+                self.assertFalse(os.path.exists(self.path))
+        write_file.assert_called_once()
+        self.assertEqual(len(self.read_file()), 10)
+    
+    def test_transaction_rollback(self):
+        """
+        Test that a failing transaction undoes its changes.
+        """
+        kept = User()
+        kept.email = "kept@hbnb.io"
+        removed = User()
+        storage.add_index(User, "email")
+        storage.save()
+        before = self.read_file()
+        
+        with self.assertRaises(ValueError):
+            with storage.transaction():
+                kept.email = "changed@hbnb.io"
+                kept.first_name = "Changed"
+                storage.delete(removed)
+                created = BaseModel()
+                created.save()
+                raise ValueError("abort")
+        
+        self.assertEqual(kept.email, "kept@hbnb.io")
+        self.assertFalse(hasattr(kept, "first_name") and
+                         "first_name" in kept.__dict__)
+        self.assertIs(storage.get(User, removed.id), removed)
+        self.assertIsNone(storage.get(BaseModel, created.id))
+        self.assertEqual(storage.find(User, email="kept@hbnb.io"), [kept])
+        self.assertEqual(self.read_file(), before)
+        storage.save()
+        self.assertEqual(self.read_file(), before)
+    
+    def test_nested_transaction_rollback(self):
+        """
+        Test that an inner transaction only undoes its own changes.
+        """
+        model = BaseModel()
+        with storage.transaction():
+            model.name = "Outer"
+            try:
+                with storage.transaction():
+                    model.name = "Inner"
+                    raise KeyError("inner")
+            except KeyError:
+                pass
+            self.assertEqual(model.name, "Outer")
+            model.save()
+        self.assertEqual(
+            self.read_file()["BaseModel.{}".format(model.id)]["name"], "Outer")
+    
+    def test_codecs_write_the_same_objects(self):
+        """
+        Test that every available codec round-trips the stored objects.
+        """
+        for codec in CODECS.values():
+            user = User()
+            user.email = "codec@hbnb.io"
+            user.tags = ["a", "b"]
+            with patch.object(storage, 'codec', codec):
+                storage.save()
+                self.assertEqual(
+                    self.read_file()["User.{}".format(user.id)],
+                    user.to_dict())
+                self.forget_objects()
+                storage.reload()
+            self.assertEqual(storage.get(User, user.id).to_dict(),
+                             user.to_dict())
+    
+    def test_codecs_keep_non_finite_floats(self):
+        """
+        Test that infinite floats are neither lost nor turned into null
+        by any codec.
+        """
+        for codec in CODECS.values():
+            model = BaseModel()
+            model.latitude = float("inf")
+            model.none = None
+            with patch.object(storage, 'codec', codec):
+                storage.save()
+                self.forget_objects()
+                storage.reload()
+            reloaded = storage.get(BaseModel, model.id)
+            self.assertEqual(reloaded.latitude, float("inf"), codec.name)
+            self.assertIsNone(reloaded.none)
+    
+    def test_unknown_codec_setting(self):
+        """
+        Test that an unavailable $HBNB_JSON_CODEC falls back to the
+        default codec with a warning.
+        """
+        with patch.dict(os.environ, {'HBNB_JSON_CODEC': "nope"}):
+            with self.assertWarns(RuntimeWarning):
+                codec = get_codec()
+            del os.environ['HBNB_JSON_CODEC']
+            self.assertIs(codec, get_codec())
+        with self.assertRaises(ValueError):
+            get_codec("nope")
+    
+    def test_journal_appends_changed_objects(self):
+        """
+        Test that journaled saves append records instead of rewriting.
+        """
+        storage.journal = True
+        first = BaseModel()
+        second = BaseModel()
+        second.save()
+        self.assertFalse(os.path.exists(self.path))
+        with open(self.path + ".log", 'r', encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(sorted(r["key"] for r in records), sorted([
+            "BaseModel.{}".format(first.id),
+            "BaseModel.{}".format(second.id)]))
+        
+        first.name = "Changed"
+        first.save()
+        storage.delete(second)
+        storage.save()
+        with open(self.path + ".log", 'r', encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(len(records), 4)
+    
+    def test_journal_replayed_on_reload(self):
+        """
+        Test that reload() applies the journal over the snapshot.
+        """
+        kept = BaseModel()
+        dropped = BaseModel()
+        storage.save()
+        storage.journal = True
+        kept.name = "Journaled"
+        kept.save()
+        storage.delete(dropped)
+        storage.save()
+        
+        self.forget_objects()
+        storage.reload()
+        objects = storage.all()
+        self.assertEqual(objects["BaseModel.{}".format(kept.id)].name,
+                         "Journaled")
+        self.assertNotIn("BaseModel.{}".format(dropped.id), objects)
+    
+    def test_journal_skips_torn_record(self):
+        """
+        Test that a record cut short by a crash is ignored.
+        """
+        storage.journal = True
+        model = BaseModel()
+        storage.save()
+        with open(self.path + ".log", 'a', encoding='utf-8') as f:
+            f.write('{"op": "del", "ke')
+        
+        self.forget_objects()
+        storage.reload()
+        self.assertIn("BaseModel.{}".format(model.id), storage.all())
+    
+    def test_journal_compaction(self):
+        """
+        Test that compaction folds the journal into the snapshot.
+        """
+        storage.journal = True
+        with patch.object(storage, 'journal_max_bytes', 1):
+            model = BaseModel()
+            storage.save()
+            storage.compact(wait=True)
+        self.assertFalse(os.path.exists(self.path + ".log"))
+        self.assertFalse(os.path.exists(self.path + ".log.compacting"))
+        self.assertIn("BaseModel.{}".format(model.id), self.read_file())
+    
+    def test_journal_compaction_streams(self):
+        """
+        Test that compaction folds changes and deletions into the
+        snapshot a record at a time.
+        """
+        kept = BaseModel()
+        dropped = BaseModel()
+        storage.save()
+        storage.journal = True
+        kept.name = "Compacted"
+        kept.save()
+        storage.delete(dropped)
+        added = BaseModel()
+        storage.save()
+        with patch.object(storage, '_load_snapshot',
+                          side_effect=AssertionError("loaded whole")):
+            storage.compact(wait=True)
+        on_disk = self.read_file()
+        self.assertEqual(list(on_disk), ["BaseModel.{}".format(kept.id),
+                                         "BaseModel.{}".format(added.id)])
+        self.assertEqual(on_disk["BaseModel.{}".format(kept.id)]["name"],
+                         "Compacted")
+    
+    def test_journal_interrupted_compaction(self):
+        """
+        Test that reload() applies a journal left rotated by an
+        interrupted compaction before the live one.
+        """
+        storage.journal = True
+        model = BaseModel()
+        model.name = "Older"
+        model.save()
+        os.rename(self.path + ".log", self.path + ".log.compacting")
+        model.name = "Newer"
+        model.save()
+        
+        self.forget_objects()
+        storage.reload()
+        self.assertEqual(storage.get(BaseModel, model.id).name, "Newer")
+    
+    @patch.object(storage, 'shared', True)
+    def test_shared_merge_interrupted_compaction(self):
+        """
+        Test that save() merges the journals of another process oldest
+        first.
+        """
+        storage.journal = True
+        model = BaseModel()
+        model.save()
+        key = "BaseModel.{}".format(model.id)
+        for name, suffix in (("Older", ".log.compacting"), ("Newer", ".log")):
+            record = dict(model.to_dict(), name=name)
+            with open(self.path + suffix, 'w', encoding='utf-8') as f:
+                f.write(json.dumps({"op": "set", "key": key,
+                                    "value": record}) + "\n")
+        
+        BaseModel().save()
+        self.assertEqual(storage.get(BaseModel, model.id).name, "Newer")
+    
+    
+    @patch.object(storage, 'shared', True)
+    def test_shared_save_merges_other_processes(self):
+        """
+        Test that save() keeps the objects saved by another process and
+        adopts its changes to objects that are clean here.
+        """
+        mine = User()
+        gone = User()
+        storage.save()
+        self.run_process(
+            "user = storage.get(User, {!r})\n"
+            "user.first_name = 'Other'\n"
+            "storage.delete(storage.get(User, {!r}))\n"
+            "User().save()\n".format(mine.id, gone.id))
+        
+        added = BaseModel()
+        storage.save()
+        on_disk = self.read_file()
+        self.assertEqual(len(on_disk), 3)
+        self.assertIn("BaseModel.{}".format(added.id), on_disk)
+        self.assertNotIn("User.{}".format(gone.id), on_disk)
+        self.assertEqual(storage.get(User, mine.id).first_name, "Other")
+        self.assertIsNone(storage.get(User, gone.id))
+        self.assertEqual(set(storage.all()), set(on_disk))
+        self.assertEqual(len(storage.find(User)), 2)
+    
+    @patch.object(storage, 'shared', True)
+    def test_shared_merge_keeps_references(self):
+        """
+        Test that save() updates the clean objects in place, so that a
+        reference taken before the merge still saves its changes.
+        """
+        same = User()
+        changed = User()
+        storage.save()
+        self.forget_objects()
+        storage.reload()
+        same = storage.get(User, same.id)
+        changed = storage.get(User, changed.id)
+        self.run_process(
+            "storage.get(User, {!r}).first_name = 'Other'\n"
+            "storage.save()\n".format(changed.id))
+        
+        User().save()
+        self.assertIs(storage.get(User, same.id), same)
+        self.assertIs(storage.get(User, changed.id), changed)
+        self.assertEqual(changed.first_name, "Other")
+        same.email = "kept@hbnb.io"
+        storage.save()
+        self.assertEqual(
+            self.read_file()["User.{}".format(same.id)]["email"],
+            "kept@hbnb.io")
+    
+    @patch.object(storage, 'shared', True)
+    def test_shared_dirty_objects_win(self):
+        """
+        Test that an object changed here overwrites the other version.
+        """
+        user = User()
+        storage.save()
+        self.run_process(
+            "user = storage.get(User, {!r})\n"
+            "user.first_name = 'Other'\n"
+            "user.save()\n".format(user.id))
+        user.first_name = "Mine"
+        storage.save()
+        self.assertEqual(
+            self.read_file()["User.{}".format(user.id)]["first_name"], "Mine")
+    
+    def test_shared_processes_do_not_lose_updates(self):
+        """
+        Test that processes saving at the same time keep every object.
+        """
+        workers = [self.start_process("for number in range(30):\n"
+                                      "    User().save()\n")
+                   for number in range(3)]
+        for worker in workers:
+            self.assertEqual(worker.wait(), 0)
+        self.assertEqual(len(self.read_file()), 90)
+    
+    
+    @patch.object(storage, 'threadsafe', True)
+    def test_threadsafe_concurrent_writers_and_readers(self):
+        """
+        Test that threads can create, save and list objects at once.
+        """
+        errors = []
+        
+        def create():
+            try:
+                for number in range(50):
+                    User().save()
+            except Exception as error:
+                errors.append(error)
+        
+        def scan():
+            try:
+                for number in range(50):
+                    for obj in storage.all().values():
+                        str(obj)
+                    list(storage.stream(User))
+            except Exception as error:
+                errors.append(error)
+        
+        threads = [threading.Thread(target=create) for number in range(4)]
+        threads += [threading.Thread(target=scan) for number in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(self.read_file()), 200)
+        self.assertEqual(len(storage.all(User)), 200)
+    
+    @patch.object(storage, 'threadsafe', True)
+    def test_threadsafe_saves_are_coalesced(self):
+        """
+        Test that saves made while the flusher writes share one write.
+        """
+        write_file = storage._write_file
+        
+        def slow_write(*args, **kwargs):
+            time.sleep(0.05)
+            write_file(*args, **kwargs)
+        
+        users = [User() for number in range(8)]
+        with patch.object(storage, '_write_file',
+                          side_effect=slow_write) as write:
+            threads = [threading.Thread(target=user.save) for user in users]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertLess(write.call_count, len(users))
+        self.assertEqual(len(self.read_file()), len(users))
+    
+    @patch.object(storage, 'threadsafe', True)
+    def test_threadsafe_transaction_isolation(self):
+        """
+        Test that other threads wait for a transaction to end.
+        """
+        user = User()
+        seen = []
+        
+        def update():
+            user.first_name = "Other"
+            seen.append(storage.get(User, user.id).first_name)
+        
+        thread = threading.Thread(target=update)
+        with storage.transaction():
+            user.first_name = "Mine"
+            thread.start()
+            thread.join(0.1)
+            self.assertTrue(thread.is_alive())
+            self.assertEqual(user.first_name, "Mine")
+        thread.join()
+        self.assertEqual(seen, ["Other"])
+        storage.save()
+        self.assertEqual(self.read_file()["User.{}".format(user.id)][
+            "first_name"], "Other")
+    
+    
+    def test_asave_coalesces_concurrent_calls(self):
+        """
+        Test that concurrent asave() calls share writes and all return
+        once their changes are on disk.
+        """
+        users = [User() for number in range(10)]
+        
+        async def save_all():
+            await asyncio.gather(*(storage.asave() for user in users))
+        
+        with patch.object(storage, '_write_file',
+                          wraps=storage._write_file) as write:
+            asyncio.run(save_all())
+        self.assertLessEqual(write.call_count, 2)
+        self.assertEqual(len(self.read_file()), len(users))
+        
+        # Changes made while a write runs go to the next one
+        async def save_twice():
+            first = asyncio.ensure_future(storage.asave())
+            await asyncio.sleep(0)
+            users[0].first_name = "Later"
+            await asyncio.gather(first, storage.asave())
+        
+        asyncio.run(save_twice())
+        self.assertEqual(self.read_file()["User.{}".format(users[0].id)][
+            "first_name"], "Later")
+    
+    @patch.object(storage, 'journal', True)
+    def test_asave_journal(self):
+        """
+        Test that asave() appends to the journal in journal mode.
+        """
+        user = User()
+        asyncio.run(storage.asave())
+        self.assertTrue(os.path.exists(self.path + ".log"))
+        self.forget_objects()
+        storage.reload()
+        self.assertIsNotNone(storage.get(User, user.id))
+    
+    @patch.object(storage, 'journal', True)
+    def test_save_waits_for_asave_write(self):
+        """
+        Test that a save() made while an asave() write runs is written
+        after it.
+        """
+        user = User()
+        append = storage._append_journal
+        calls = []
+        
+        def slow_append(lines):
+            # Only the write of asave() is slow
+            calls.append(lines)
+            if len(calls) == 1:
+                time.sleep(0.2)
+            append(lines)
+        
+        async def save_both():
+            user.email = "first"
+            task = asyncio.ensure_future(storage.asave())
+            await asyncio.sleep(0.02)
+            user.email = "second"
+            storage.save()
+            await task
+        
+        with patch.object(storage, '_append_journal', slow_append):
+            asyncio.run(save_both())
+        self.forget_objects()
+        storage.reload()
+        self.assertEqual(storage.get(User, user.id).email, "second")
+    
+    def test_aget_and_aall(self):
+        """
+        Test the async lookups, including objects created or deleted
+        while iterating.
+        """
+        users = [User() for number in range(5)]
+        
+        async def collect():
+            self.assertIs(await storage.aget(User, users[0].id), users[0])
+            found = []
+            async for obj in storage.aall(User, batch=2):
+                found.append(obj)
+                if len(found) == 1:
+                    User()
+                    storage.delete(users[4])
+            return found
+        
+        self.assertEqual(asyncio.run(collect()), users[:4])
+    
+    
+    def shard_files(self):
+        """
+        Return the names of the shard files.
+        """
+        return sorted(os.listdir(self.path + ".d"))
+    
+    @patch.object(storage, 'shards', "class")
+    def test_class_shards_write_only_dirty_shards(self):
+        """
+        Test that save() only rewrites the shards of changed objects.
+        """
+        user = User()
+        model = BaseModel()
+        storage.save()
+        self.assertEqual(self.shard_files(), ["BaseModel.json", "User.json"])
+        self.assertFalse(os.path.exists(self.path))
+        
+        user.first_name = "Sharded"
+        with patch.object(storage, '_write_file',
+                          wraps=storage._write_file) as write:
+            storage.save()
+        self.assertEqual([call[0][0] for call in write.call_args_list],
+                         [os.path.join(self.path + ".d", "User.json")])
+        
+        storage.delete(model)
+        storage.save()
+        self.assertEqual(self.shard_files(), ["User.json"])
+    
+    @patch.object(storage, 'shards', "class")
+    @patch.object(storage, 'lazy', True)
+    def test_class_shards_load_on_first_access(self):
+        """
+        Test that lazy reload() reads each shard when first needed.
+        """
+        user = User()
+        model = BaseModel()
+        storage.save()
+        self.forget_objects()
+        storage.reload()
+        unloaded = FileStorage._FileStorage__unloaded
+        self.assertEqual(unloaded, {"BaseModel.json", "User.json"})
+        self.assertEqual(storage.get(User, user.id).id, user.id)
+        self.assertEqual(unloaded, {"BaseModel.json"})
+        self.assertEqual(len(storage.all(User)), 1)
+        
+        # Saving a new object first reads the rest of its shard
+        other = User()
+        storage.save()
+        self.assertEqual(unloaded, {"BaseModel.json"})
+        self.assertIn("BaseModel.{}".format(model.id), storage.all())
+        self.assertEqual(unloaded, set())
+        self.forget_objects()
+        storage.reload()
+        self.assertEqual(len(storage.all(User)), 2)
+        self.assertIsNotNone(storage.get(User, other.id))
+    
+    @patch.object(storage, 'shards', "class")
+    @patch.object(storage, 'lazy', True)
+    def test_class_shards_keep_objects_stored_before_loading(self):
+        """
+        Test that reading a shard on first access does not replace the
+        objects stored since reload().
+        """
+        user = User()
+        user.first_name = "Stale"
+        storage.save()
+        self.forget_objects()
+        storage.reload()
+        
+        fresh = User(**dict(user.to_dict(), first_name="Fresh"))
+        storage.new(fresh)
+        storage.save()
+        self.assertIs(storage.get(User, user.id), fresh)
+        self.forget_objects()
+        storage.reload()
+        self.assertEqual(storage.get(User, user.id).first_name, "Fresh")
+    
+    @patch.object(storage, 'shards', 4)
+    @patch.object(storage, 'lazy', False)
+    @patch.object(storage, 'shard_pool_min_bytes', 0)
+    def test_hash_shards_parallel_reload(self):
+        """
+        Test hash bucket shards read back by worker processes.
+        """
+        users = [User() for number in range(20)]
+        storage.save()
+        self.assertEqual(len(self.shard_files()), 4)
+        self.forget_objects()
+        storage.reload()
+        self.assertEqual({obj.id for obj in storage.all(User).values()},
+                         {user.id for user in users})
+        self.assertIsInstance(storage.get(User, users[0].id), User)
+    
+    def test_shards_keep_single_file_objects(self):
+        """
+        Test that switching to shards keeps the objects of file.json,
+        and that the journal cannot be combined with shards.
+        """
+        user = User()
+        storage.save()
+        self.forget_objects()
+        with patch.object(storage, 'shards', "class"):
+            storage.reload()
+            self.assertIsNotNone(storage.get(User, user.id))
+            storage.save()
+            self.assertEqual(self.shard_files(), ["User.json"])
+            with patch.object(storage, 'journal', True):
+                with self.assertRaises(ValueError):
+                    storage.save()
+    
+    @patch.object(storage, 'snapshot_format', "binary")
+    @patch.object(storage, 'lazy', True)
+    def test_binary_snapshot_decodes_records_on_access(self):
+        """
+        Test that a lazy reload() of the binary snapshot only decodes
+        the records that are looked up, and that save() keeps the
+        records never read.
+        """
+        user = User()
+        user.first_name = "Mapped"
+        model = BaseModel()
+        storage.save()
+        binary_path = os.path.join(self.tmp_dir, "file.hbnb")
+        self.assertTrue(is_snapshot(binary_path))
+        self.assertFalse(os.path.exists(self.path))
+        
+        self.forget_objects()
+        storage.reload()
+        unloaded = FileStorage._FileStorage__unloaded
+        self.assertEqual(len(unloaded), 2)
+        self.assertEqual(storage.get(User, user.id).first_name, "Mapped")
+        self.assertEqual(unloaded, {"BaseModel.{}".format(model.id)})
+        
+        storage.get(User, user.id).first_name = "Changed"
+        storage.save()
+        self.assertEqual(len(unloaded), 1)
+        self.forget_objects()
+        storage.reload()
+        self.assertEqual(len(storage.all()), 2)
+        self.assertEqual(storage.get(User, user.id).first_name, "Changed")
+        self.assertIsInstance(storage.get(BaseModel, model.id), BaseModel)
+    
+    @patch.object(storage, 'snapshot_format', "binary")
+    @patch.object(storage, 'lazy', True)
+    def test_binary_snapshot_replaces_unread_records(self):
+        """
+        Test that storing or deleting an object whose record was never
+        read replaces the record of the mapped snapshot.
+        """
+        user = User()
+        user.first_name = "Stale"
+        model = BaseModel()
+        storage.save()
+        self.forget_objects()
+        storage.reload()
+        
+        fresh = User(**dict(user.to_dict(), first_name="Fresh"))
+        storage.new(fresh)
+        storage.delete(model)
+        self.assertEqual(FileStorage._FileStorage__unloaded, set())
+        storage.save()
+        
+        self.forget_objects()
+        storage.reload()
+        self.assertEqual(storage.get(User, user.id).first_name, "Fresh")
+        self.assertIsNone(storage.get(BaseModel, model.id))
+    
+    def test_layout_switch_both_ways(self):
+        """
+        Test that switching from the binary snapshot back to the JSON
+        file keeps the latest objects, not those of the old JSON file.
+        """
+        users = [User() for number in range(3)]
+        storage.save()
+        self.forget_objects()
+        with patch.object(storage, 'snapshot_format', "binary"):
+            storage.reload()
+            storage.delete(storage.get(User, users[0].id))
+            storage.get(User, users[1].id).first_name = "Changed"
+            storage.save()
+        self.assertFalse(os.path.exists(self.path))
+        
+        self.forget_objects()
+        storage.reload()
+        self.assertEqual(len(storage.all()), 2)
+        self.assertIsNone(storage.get(User, users[0].id))
+        self.assertEqual(storage.get(User, users[1].id).first_name,
+                         "Changed")
+        storage.save()
+        self.assertFalse(os.path.exists(
+            os.path.join(self.tmp_dir, "file.hbnb")))
+        with patch.object(storage, 'shards', "class"):
+            self.forget_objects()
+            storage.reload()
+            self.assertEqual(len(storage.all()), 2)
+    
+    def test_binary_snapshot_keeps_json_objects(self):
+        """
+        Test that switching to the binary snapshot keeps the objects of
+        file.json, and that the journal cannot be combined with it.
+        """
+        user = User()
+        storage.save()
+        self.forget_objects()
+        with patch.object(storage, 'snapshot_format', "binary"):
+            storage.reload()
+            self.assertIsNotNone(storage.get(User, user.id))
+            storage.save()
+            with Snapshot(os.path.join(self.tmp_dir, "file.hbnb")) as snap:
+                self.assertEqual(snap.keys(), ["User.{}".format(user.id)])
+            with patch.object(storage, 'journal', True):
+                with self.assertRaises(ValueError):
+                    storage.save()
+    
+    @patch.object(storage, 'lazy', False)
+    def test_reload_streams_the_file(self):
+        """
+        Test that reload() decodes the file a chunk at a time, with the
+        journal applied on the way.
+        """
+        users = [User() for number in range(500)]
+        storage.save()
+        storage.journal = True
+        storage.delete(users[0])
+        users[1].first_name = "Journaled"
+        storage.save()
+        self.forget_objects()
+        with patch.object(storage.codec, 'loads',
+                          wraps=storage.codec.loads) as loads:
+            storage.reload()
+        self.assertGreater(loads.call_count, 2)
+        self.assertLess(max(len(call[0][0]) for call in loads.call_args_list),
+                        os.path.getsize(self.path))
+        self.assertEqual(list(storage.all(User)),
+                         ["User.{}".format(user.id) for user in users[1:]])
+        self.assertEqual(storage.get(User, users[1].id).first_name,
+                         "Journaled")
+    
+    def wait_for_file(self):
+        """
+        Wait up to two seconds for the storage file to be written.
+        """
+        deadline = time.monotonic() + 2
+        while not os.path.exists(self.path) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return os.path.exists(self.path)
+    
+    @patch.object(storage, 'threadsafe', True)
+    @patch.object(storage, 'write_behind', True)
+    @patch.object(storage, 'write_behind_ms', 60000)
+    def test_write_behind_defers_saves(self):
+        """
+        Test that write-behind saves are written once, by flush().
+        """
+        users = [User() for number in range(3)]
+        with patch.object(storage, '_write_file',
+                          wraps=storage._write_file) as write:
+            for number in range(100):
+                users[number % 3].last_name = str(number)
+                users[number % 3].save()
+            self.assertFalse(os.path.exists(self.path))
+            stats = storage.flush_stats()
+            self.assertEqual(stats['pending_saves'], 100)
+            self.assertEqual(stats['pending_objects'], 3)
+            self.assertGreaterEqual(stats['oldest_pending_ms'], 0)
+            storage.flush()
+        self.assertEqual(write.call_count, 1)
+        self.assertEqual(self.read_file()["User.{}".format(users[0].id)][
+            'last_name'], "99")
+        stats = storage.flush_stats()
+        self.assertEqual((stats['pending_saves'], stats['pending_objects'],
+                          stats['flushes']), (0, 0, 1))
+        self.assertIsNone(stats['oldest_pending_ms'])
+        self.assertGreater(stats['last_ms'], 0)
+    
+    @patch.object(storage, 'threadsafe', True)
+    @patch.object(storage, 'write_behind', True)
+    @patch.object(storage, 'write_behind_ms', 20)
+    def test_write_behind_flushes_after_delay(self):
+        """
+        Test that pending saves are written write_behind_ms later.
+        """
+        User().save()
+        self.assertTrue(self.wait_for_file())
+        storage.flush()
+        self.assertEqual(len(self.read_file()), 1)
+    
+    @patch.object(storage, 'threadsafe', True)
+    @patch.object(storage, 'write_behind', True)
+    @patch.object(storage, 'write_behind_ms', 60000)
+    @patch.object(storage, 'write_behind_changes', 5)
+    def test_write_behind_flushes_after_changes(self):
+        """
+        Test that enough pending objects trigger a write at once, and
+        that write-behind needs threadsafe.
+        """
+        users = [User() for number in range(4)]
+        storage.save()
+        time.sleep(0.05)
+        self.assertFalse(os.path.exists(self.path))
+        users.append(User())
+        storage.save()
+        self.assertTrue(self.wait_for_file())
+        storage.flush()
+        self.assertEqual(len(self.read_file()), 5)
+        with patch.object(storage, 'threadsafe', False):
+            with self.assertRaises(ValueError):
+                storage.save()
+    
+    def test_compressed_file_by_extension(self):
+        """
+        Test that a .gz storage file is written and read compressed.
+        """
+        FileStorage._FileStorage__file_path = self.path + ".gz"
+        user = User()
+        user.first_name = "Compressed"
+        storage.save()
+        with gzip.open(self.path + ".gz", 'rt', encoding='utf-8') as f:
+            self.assertIn("User.{}".format(user.id), json.load(f))
+        self.forget_objects()
+        storage.reload()
+        self.assertEqual(storage.get(User, user.id).first_name, "Compressed")
+    
+    @patch.object(storage, 'compression', "lzma")
+    def test_compression_setting_keeps_plain_objects(self):
+        """
+        Test that turning compression on keeps the objects of the plain
+        file, and that it cannot be combined with shards.
+        """
+        with patch.object(storage, 'compression', None):
+            user = User()
+            storage.save()
+        self.forget_objects()
+        storage.reload()
+        self.assertIsNotNone(storage.get(User, user.id))
+        storage.save()
+        self.assertTrue(os.path.exists(self.path + ".xz"))
+        # The plain file is moved aside once the compressed one is saved
+        self.assertFalse(os.path.exists(self.path))
+        self.assertTrue(os.path.exists(self.path + ".migrated"))
+        self.forget_objects()
+        storage.reload()
+        self.assertIsNotNone(storage.get(User, user.id))
+        with patch.object(storage, 'shards', "class"):
+            with self.assertRaises(ValueError):
+                storage.reload()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+#!/usr/bin/python3
+"""
+Unit tests for the streaming JSON files.
+
+This module contains unit tests for the incremental reader and writer
+of models.engine.jsonstream and for the compressed files it opens.
+"""
+
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from models.engine import jsonstream
+from models.engine.jsonstream import iter_items, load_file, object_chunks, \
+    open_file
+
+
+class TestJsonStream(unittest.TestCase):
+    """
+    Test cases for the streaming JSON reader and writer.
+    """
+    
+    OBJECT = {
+        "User.1": {"id": "1", "__class__": "User", "age": 12345,
+                   "ratio": -1.5e3, "tags": ["a", "b,c"], "nested": {}},
+        "BaseModel.2": {"id": "2", "name": "café \"quoted\" }, \"x"},
+        "Nested.4": {"a": {"b": {}}, "c": [{"d": 1}, {"e": 2}]},
+        "Empty.3": [],
+    }
+    
+    def setUp(self):
+        """
+        Create a temporary directory.
+        """
+        self.tmp_dir = tempfile.mkdtemp()
+    
+    def tearDown(self):
+        """
+        Remove the temporary directory.
+        """
+        shutil.rmtree(self.tmp_dir)
+    
+    def test_items_across_chunks(self):
+        """
+        Test that members split over read chunks are parsed whole.
+        """
+        for text in (json.dumps(self.OBJECT, indent=2),
+                     json.dumps(self.OBJECT)):
+            for chunk_size in (1, 2, 7, 64, len(text)):
+                for loads in (None, json.loads):
+                    items = list(iter_items(io.StringIO(text), chunk_size,
+                                            loads))
+                    self.assertEqual(items, list(self.OBJECT.items()))
+        self.assertEqual(list(iter_items(io.StringIO(" { } "))), [])
+        self.assertEqual(list(iter_items(io.StringIO('{"n": 123}'), 2)),
+                         [("n", 123)])
+    
+    def test_invalid_documents(self):
+        """
+        Test that anything but one whole JSON object is rejected.
+        """
+        for text in ("", "[]", '{"a": 1', '{"a" 1}', '{1: 2}',
+                     '{"a": 1,}', '{"a": 1} {}', '{"a": tru}'):
+            with self.assertRaises(ValueError, msg=text):
+                list(iter_items(io.StringIO(text), 3))
+            with self.assertRaises(ValueError, msg=text):
+                list(iter_items(io.StringIO(text), 3, json.loads))
+    
+    def test_object_chunks(self):
+        """
+        Test that the written chunks form the joined JSON object.
+        """
+        parts = ['"a": 1', '"b": {"c": 2}']
+        self.assertEqual("".join(object_chunks(parts)),
+                         "{" + ", ".join(parts) + "}")
+        self.assertEqual("".join(object_chunks([])), "{}")
+    
+    def test_compressed_files(self):
+        """
+        Test writing and reading back each available compression.
+        """
+        extensions = [".gz", ".xz", ".lzma"]
+        if jsonstream.zstandard is not None:
+            extensions.append(".zst")
+        text = json.dumps(self.OBJECT)
+        for extension in extensions:
+            path = os.path.join(self.tmp_dir, "file.json" + extension)
+            compression = jsonstream.compression_of(path)
+            with open_file(path, 'w', compression) as f:
+                f.write(text)
+            with open(path, 'rb') as f:
+                self.assertNotIn(b"BaseModel", f.read())
+            self.assertEqual(load_file(path, compression), self.OBJECT)
+            
+            with open(path, 'r+b') as f:
+                f.truncate(os.path.getsize(path) // 2)
+            with self.assertRaises(ValueError):
+                load_file(path, compression)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,183 @@
+#!/usr/bin/python3
+"""
+Unit tests for the metrics.
+
+This module contains unit tests for models.engine.metrics and for the
+metrics collected by FileStorage and the console.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from io import StringIO
+from unittest.mock import patch
+from console import HBNBCommand
+from models import storage
+from models.engine.file_storage import FileStorage
+from models.engine.metrics import Histogram, Metrics, metrics
+from models.user import User
+
+
+class TestHistogram(unittest.TestCase):
+    """
+    Test cases for the Histogram class.
+    """
+    
+    def test_summary(self):
+        """
+        Test the count, bounds and quantiles of recorded durations.
+        """
+        histogram = Histogram()
+        self.assertIsNone(histogram.summary()['p50_ms'])
+        for number in range(99):
+            histogram.record(0.0001)
+        histogram.record(0.5)
+        summary = histogram.summary()
+        self.assertEqual(summary['count'], 100)
+        self.assertAlmostEqual(summary['min_ms'], 0.1)
+        self.assertAlmostEqual(summary['max_ms'], 500)
+        # Quantiles are the upper bounds of power of two buckets
+        self.assertGreaterEqual(summary['p50_ms'], 0.1)
+        self.assertLess(summary['p50_ms'], 0.2)
+        self.assertLess(summary['p99_ms'], 0.2)
+        self.assertEqual(histogram.quantile(1), 0.5)
+
+
+class TestMetrics(unittest.TestCase):
+    """
+    Test cases for the Metrics class.
+    """
+    
+    def test_register_wraps_only_while_enabled(self):
+        """
+        Test that registered methods are timed while enabled, and put
+        back as they were when disabled.
+        """
+        class Model:
+            def work(self, value):
+                """Double value."""
+                return value * 2
+        
+        original = Model.__dict__['work']
+        collector = Metrics()
+        collector.register(Model, {'work': 'model.work'})
+        self.assertIs(Model.__dict__['work'], original)
+        self.assertEqual(Model().work(2), 4)
+        self.assertEqual(collector.snapshot()['histograms'], {})
+        
+        collector.enable()
+        self.assertEqual(Model().work(3), 6)
+        self.assertEqual(Model.work.__doc__, "Double value.")
+        self.assertEqual(
+            collector.snapshot()['histograms']['model.work']['count'], 1)
+        
+        collector.disable()
+        self.assertIs(Model.__dict__['work'], original)
+        Model().work(4)
+        self.assertEqual(
+            collector.snapshot()['histograms']['model.work']['count'], 1)
+    
+    def test_counters_gauges_and_reset(self):
+        """
+        Test that counters add up, gauges are read when reported and
+        reset() clears the counters.
+        """
+        collector = Metrics()
+        collector.incr('bytes', 10)
+        collector.incr('bytes', 5)
+        collector.gauge('objects', lambda: {'User': 2})
+        current = collector.snapshot()
+        self.assertEqual(current['counters'], {'bytes': 15})
+        self.assertEqual(current['gauges'], {'objects': {'User': 2}})
+        self.assertIn("objects.User", collector.report())
+        collector.reset()
+        self.assertEqual(collector.snapshot()['counters'], {})
+
+
+class TestStorageMetrics(unittest.TestCase):
+    """
+    Test cases for the metrics of FileStorage and the console.
+    """
+    
+    def setUp(self):
+        """
+        Enable the metrics and point the storage at a temporary file.
+        """
+        self.tmp_dir = tempfile.mkdtemp()
+        self.saved_path = FileStorage._FileStorage__file_path
+        self.saved_objects = FileStorage._FileStorage__objects
+        self.was_enabled = metrics.enabled
+        FileStorage._FileStorage__file_path = os.path.join(self.tmp_dir,
+                                                           "file.json")
+        FileStorage._FileStorage__objects = {}
+        storage.reindex()
+        metrics.enable()
+        metrics.reset()
+    
+    def tearDown(self):
+        """
+        Restore the storage and the metrics.
+        """
+        if not self.was_enabled:
+            metrics.disable()
+        metrics.reset()
+        FileStorage._FileStorage__file_path = self.saved_path
+        FileStorage._FileStorage__objects = self.saved_objects
+        storage.reindex()
+        shutil.rmtree(self.tmp_dir)
+    
+    def test_storage_operations(self):
+        """
+        Test that new, save and reload are timed and the bytes written
+        counted.
+        """
+        for number in range(3):
+            User()
+        storage.save()
+        storage.reload()
+        current = metrics.snapshot()
+        histograms = current['histograms']
+        self.assertEqual(histograms['storage.new']['count'], 3)
+        for name in ('storage.save', 'storage.reload', 'storage.write',
+                     'storage.disk'):
+            self.assertEqual(histograms[name]['count'], 1, name)
+        # The changed objects; the whole file is encoded as it is written
+        self.assertEqual(histograms['storage.encode']['count'], 1)
+        self.assertEqual(current['counters']['storage.bytes_written'],
+                         os.path.getsize(
+                             FileStorage._FileStorage__file_path))
+        self.assertEqual(current['gauges']['objects'], {'User': 3})
+    
+    def test_stats_command(self):
+        """
+        Test that stats reports the commands run and can be reset.
+        """
+        console = HBNBCommand()
+        with patch('sys.stdout', new=StringIO()) as out:
+            console.onecmd("create User")
+            console.onecmd("stats --json")
+        report = json.loads(out.getvalue().splitlines()[-1])
+        self.assertEqual(report['histograms']['console.create']['count'], 1)
+        self.assertEqual(report['gauges']['objects'], {'User': 1})
+        
+        with patch('sys.stdout', new=StringIO()) as out:
+            console.onecmd("stats")
+        self.assertIn("console.create", out.getvalue())
+        self.assertIn("storage.bytes_written", out.getvalue())
+        
+        with patch('sys.stdout', new=StringIO()) as out:
+            console.onecmd("stats reset")
+            console.onecmd("stats bogus")
+        self.assertEqual(metrics.snapshot()['counters'], {})
+        self.assertEqual(out.getvalue(), "** unknown option: bogus **\n")
+        
+        metrics.disable()
+        with patch('sys.stdout', new=StringIO()) as out:
+            console.onecmd("stats")
+        self.assertIn("metrics are disabled", out.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
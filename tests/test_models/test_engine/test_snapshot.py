@@ -0,0 +1,114 @@
+#!/usr/bin/python3
+"""
+Unit tests for the binary snapshot format.
+
+This module contains unit tests for the Snapshot class and the
+conversion between JSON storage files and binary snapshots.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from models.engine.snapshot import Snapshot, convert, dump, is_snapshot
+
+
+class TestSnapshot(unittest.TestCase):
+    """
+    Test cases for the binary snapshot format.
+    """
+    
+    RECORDS = {
+        "User.1": {"id": "1", "__class__": "User", "email": "a@b.c"},
+        "BaseModel.2": {"id": "2", "__class__": "BaseModel",
+                        "name": "caf\u00e9"},
+    }
+    
+    def setUp(self):
+        """
+        Create a temporary directory.
+        """
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "file.hbnb")
+    
+    def tearDown(self):
+        """
+        Remove the temporary directory.
+        """
+        shutil.rmtree(self.tmp_dir)
+    
+    def write_snapshot(self, records):
+        """
+        Write records to the binary snapshot file.
+        """
+        with open(self.path, 'wb') as f:
+            f.write(dump((key, json.dumps(record).encode('utf-8'))
+                         for key, record in records.items()))
+    
+    def test_round_trip(self):
+        """
+        Test that records are read back by key.
+        """
+        self.write_snapshot(self.RECORDS)
+        self.assertTrue(is_snapshot(self.path))
+        with Snapshot(self.path) as snapshot:
+            self.assertEqual(len(snapshot), 2)
+            self.assertEqual(snapshot.keys(), list(self.RECORDS))
+            self.assertIn("User.1", snapshot)
+            self.assertNotIn("User.2", snapshot)
+            self.assertEqual(snapshot.record("BaseModel.2"),
+                             self.RECORDS["BaseModel.2"])
+            self.assertEqual(snapshot.records(), self.RECORDS)
+            with self.assertRaises(KeyError):
+                snapshot.raw("User.2")
+    
+    def test_empty_snapshot(self):
+        """
+        Test a snapshot without records.
+        """
+        self.write_snapshot({})
+        with Snapshot(self.path) as snapshot:
+            self.assertEqual(len(snapshot), 0)
+            self.assertEqual(snapshot.records(), {})
+    
+    def test_duplicate_keys(self):
+        """
+        Test that a key can only be written once.
+        """
+        with self.assertRaises(ValueError):
+            dump([("User.1", b"{}"), ("User.2", b"{}"), ("User.1", b"{}")])
+    
+    def test_damaged_files(self):
+        """
+        Test that files that are not whole snapshots are rejected.
+        """
+        self.write_snapshot(self.RECORDS)
+        with open(self.path, 'rb') as f:
+            content = f.read()
+        for damaged in (content[:-1], b"{}" + content[2:], b"HBNB"):
+            with open(self.path, 'wb') as f:
+                f.write(damaged)
+            with self.assertRaises(ValueError):
+                Snapshot(self.path)
+    
+    def test_convert_both_ways(self):
+        """
+        Test converting a JSON file to a snapshot and back.
+        """
+        json_path = os.path.join(self.tmp_dir, "file.json")
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(self.RECORDS, f)
+        self.assertFalse(is_snapshot(json_path))
+        self.assertEqual(convert(json_path, self.path), 2)
+        with Snapshot(self.path) as snapshot:
+            self.assertEqual(snapshot.records(), self.RECORDS)
+        
+        back_path = os.path.join(self.tmp_dir, "back.json")
+        self.assertEqual(convert(self.path, back_path), 2)
+        with open(back_path, 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f), self.RECORDS)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+#!/usr/bin/python3
+"""
+Unit tests for the model registry.
+
+This module contains unit tests for models.registry and for the model
+classes it discovers.
+"""
+
+import unittest
+from models import registry, storage
+from models.amenity import Amenity
+from models.base_model import BaseModel
+from models.city import City
+from models.engine.file_storage import _model_classes
+from models.place import Place
+from models.review import Review
+from models.state import State
+from models.user import User
+
+
+class TestRegistry(unittest.TestCase):
+    """
+    Test cases for the model registry.
+    """
+    
+    def test_models_are_discovered(self):
+        """
+        Test that every model of the package is registered by name.
+        """
+        self.assertEqual(registry.models(), {
+            'BaseModel': BaseModel, 'User': User, 'State': State,
+            'City': City, 'Amenity': Amenity, 'Place': Place,
+            'Review': Review})
+        self.assertIs(_model_classes(), registry.models())
+        self.assertIs(registry.get_model('Place'), Place)
+        self.assertIsNone(registry.get_model('Unknown'))
+    
+    def test_subclass_registers_itself(self):
+        """
+        Test that defining a subclass of BaseModel registers it.
+        """
+        class Booking(Place):
+            nights = 1
+        
+        try:
+            self.assertIs(registry.get_model('Booking'), Booking)
+            self.assertIs(_model_classes()['Booking'], Booking)
+            info = registry.model_info(Booking)
+            self.assertEqual(info.fields[-1], 'nights')
+            self.assertEqual(info.defaults['nights'], 1)
+            self.assertEqual(info.defaults['price_by_night'], 0)
+        finally:
+            registry.unregister(Booking)
+    
+    def test_model_info(self):
+        """
+        Test the metadata cached for a model.
+        """
+        info = registry.model_info('Review')
+        self.assertIs(info.cls, Review)
+        self.assertEqual(info.fields, ('id', 'created_at', 'updated_at',
+                                       'place_id', 'user_id', 'text'))
+        self.assertEqual(info.defaults, {'place_id': "", 'user_id': "",
+                                         'text': ""})
+        with self.assertRaises(KeyError):
+            registry.model_info('Unknown')
+    
+    def test_new_models_round_trip(self):
+        """
+        Test that the new models serialize and come back as themselves.
+        """
+        for cls in (State, City, Amenity, Place, Review):
+            obj = cls()
+            obj.name = "Named"
+            try:
+                copy = cls(**obj.to_dict())
+                self.assertIsInstance(copy, cls)
+                self.assertEqual(copy.to_dict(), obj.to_dict())
+                self.assertIn("{}.{}".format(cls.__name__, obj.id),
+                              storage.all(cls))
+            finally:
+                storage.delete(obj)
+
+
+if __name__ == '__main__':
+    unittest.main()